@@ -0,0 +1,94 @@
+"""
+Pages/s for BaseAgent.fetch_async with a per-request client vs. the shared pooled client.
+
+Runs fully offline against a keep-alive HTTP/1.1 server on localhost:
+
+    python -m benchmarks.bench_async_client --pages 500 --concurrency 10
+"""
+
+import argparse
+import asyncio
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from webcreeper.agents.atlas.atlas import Atlas
+
+PAGE = b"<html><head><title>bench</title></head><body>" + b"<p>lorem ipsum</p>" * 50 + b"</body></html>"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True  # headers and body are separate writes
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(PAGE)))
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def run(base_url: str, pages: int, concurrency: int, pooled: bool) -> float:
+    atlas = Atlas(
+        settings={
+            "save_results": False,
+            "respect_robots": False,
+            "rate_limit_delay": 0.0,
+            "max_retries": 0,
+            "base_url": base_url,
+        }
+    )
+    atlas.logger.setLevel(logging.WARNING)
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with sem:
+            return await atlas.fetch_async(f"{base_url}/page/{i}")
+
+    if pooled:
+        await atlas.open_async_client()
+    try:
+        start = time.perf_counter()
+        results = await asyncio.gather(*(one(i) for i in range(pages)))
+        elapsed = time.perf_counter() - start
+    finally:
+        await atlas.close_async_client()
+
+    ok = sum(1 for r in results if r)
+    if ok != pages:
+        print(f"warning: only {ok}/{pages} fetches succeeded")
+    return pages / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+
+    server = start_server()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        before = asyncio.run(run(base_url, args.pages, args.concurrency, pooled=False))
+        after = asyncio.run(run(base_url, args.pages, args.concurrency, pooled=True))
+    finally:
+        server.shutdown()
+
+    print(f"per-request client: {before:8.1f} pages/s")
+    print(f"pooled client:      {after:8.1f} pages/s  ({after / before:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
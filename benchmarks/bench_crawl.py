@@ -0,0 +1,227 @@
+"""
+End-to-end Atlas.crawl_async throughput against a synthetic site on localhost (fully offline).
+
+Reports pages/s, p50/p99 page latency (fetch + parse + links + hooks for one page), peak RSS
+and CPU time for each combination of the swept settings:
+
+    python -m benchmarks.bench_crawl --pages 2000 --latency-ms 20 --concurrency 4 16 64
+    python -m benchmarks.bench_crawl --parser html.parser lxml --parse-executor none process
+    python -m benchmarks.bench_crawl --error-rate 0.02 --throttle-rate 0.05 --duplicate-rate 0.1
+
+The site (benchmarks.synthetic_site) is served from this process; each crawl runs in a fresh
+child process so RSS and CPU are measured for the crawler alone. For CI, save a baseline and
+fail on regressions:
+
+    python -m benchmarks.bench_crawl --json baseline.json
+    python -m benchmarks.bench_crawl --baseline baseline.json --max-regression 0.2
+    python -m benchmarks.bench_crawl --min-pages-per-second 200
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import multiprocessing
+import resource
+import sys
+import time
+
+from benchmarks.synthetic_site import SyntheticSite
+from webcreeper.agents.atlas.atlas import Atlas
+
+
+class TimedAtlas(Atlas):
+    """Atlas that records the wall time of each page it processes."""
+
+    def __init__(self, settings: dict = {}):
+        super().__init__(settings)
+        self.page_times = []
+
+    async def _process_url_async(self, url: str, depth: int) -> list[str]:
+        start = time.perf_counter()
+        try:
+            return await super()._process_url_async(url, depth)
+        finally:
+            self.page_times.append(time.perf_counter() - start)
+
+
+def percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def peak_rss_bytes() -> int:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def crawl(base_url: str, settings: dict) -> dict:
+    """Run one crawl in this process and measure it."""
+    atlas = TimedAtlas(
+        settings={
+            "save_results": False,
+            "respect_robots": False,
+            "rate_limit_delay": 0.0,
+            "crawl_entire_website": True,
+            "base_url": base_url,
+            **settings,
+        }
+    )
+    atlas.logger.setLevel(logging.ERROR)
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    cpu_before = usage.ru_utime + usage.ru_stime
+    start = time.perf_counter()
+    asyncio.run(atlas.crawl_async(f"{base_url}/page/0"))
+    elapsed = time.perf_counter() - start
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    pages = len(atlas.graph)
+    return {
+        "pages": pages,
+        "requests": len(atlas.page_times),
+        "seconds": elapsed,
+        "pages_per_second": pages / elapsed if elapsed > 0 else 0.0,
+        "p50_ms": percentile(atlas.page_times, 0.50) * 1000,
+        "p99_ms": percentile(atlas.page_times, 0.99) * 1000,
+        "peak_rss_mib": peak_rss_bytes() / 2**20,
+        "cpu_seconds": usage.ru_utime + usage.ru_stime - cpu_before,
+    }
+
+
+def _child(base_url: str, settings: dict, conn):
+    try:
+        conn.send(crawl(base_url, settings))
+    except Exception as e:  # reported by the parent
+        conn.send({"error": f"{type(e).__name__}: {e}"})
+    finally:
+        conn.close()
+
+
+def crawl_in_subprocess(base_url: str, settings: dict) -> dict:
+    ctx = multiprocessing.get_context("spawn")  # fresh interpreter: no RSS inherited from the server
+    parent, child = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_child, args=(base_url, settings, child))
+    proc.start()
+    child.close()
+    try:
+        result = parent.recv()
+    except EOFError:
+        result = {"error": f"crawler process exited with code {proc.exitcode}"}
+    proc.join()
+    return result
+
+
+def profiles(args) -> list[dict]:
+    extra = {}
+    for item in args.set or ():
+        key, _, value = item.partition("=")
+        extra[key] = json.loads(value) if value[:1] in '[{"0123456789-' or value in ("true", "false", "null") else value
+    combos = itertools.product(args.concurrency, args.parser, args.parse_executor)
+    return [
+        {
+            "max_concurrency": concurrency,
+            "html_parser": parser,
+            "parse_executor": None if executor == "none" else executor,
+            **extra,
+        }
+        for concurrency, parser, executor in combos
+    ]
+
+
+def profile_name(settings: dict) -> str:
+    return " ".join(f"{k}={v}" for k, v in settings.items())
+
+
+def check_regressions(results: dict, args) -> list[str]:
+    failures = []
+    if args.min_pages_per_second is not None:
+        for name, r in results.items():
+            if r.get("pages_per_second", 0.0) < args.min_pages_per_second:
+                failures.append(f"{name}: {r.get('pages_per_second', 0.0):.1f} pages/s < {args.min_pages_per_second}")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        for name, r in results.items():
+            if name not in baseline:
+                continue
+            before, after = baseline[name]["pages_per_second"], r.get("pages_per_second", 0.0)
+            if after < before * (1 - args.max_regression):
+                failures.append(
+                    f"{name}: {after:.1f} pages/s vs baseline {before:.1f} (>{args.max_regression:.0%} slower)"
+                )
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    site_group = parser.add_argument_group("synthetic site")
+    site_group.add_argument("--pages", type=int, default=1000)
+    site_group.add_argument("--fanout", type=int, default=10)
+    site_group.add_argument("--page-size", type=int, default=8192, help="approximate HTML bytes per page")
+    site_group.add_argument("--latency-ms", type=float, default=0.0)
+    site_group.add_argument("--latency-jitter-ms", type=float, default=0.0)
+    site_group.add_argument("--latency-dist", choices=("fixed", "uniform", "lognormal"), default="fixed")
+    site_group.add_argument("--error-rate", type=float, default=0.0, help="fraction of 500 responses")
+    site_group.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of 429 responses")
+    site_group.add_argument("--duplicate-rate", type=float, default=0.0, help="fraction of pages duplicating another")
+    site_group.add_argument("--alias-rate", type=float, default=0.0, help="fraction of links with tracking params")
+    site_group.add_argument("--seed", type=int, default=0)
+    sweep = parser.add_argument_group("crawler settings (every combination is run)")
+    sweep.add_argument("--concurrency", type=int, nargs="+", default=[16])
+    sweep.add_argument("--parser", nargs="+", default=["html.parser"])
+    sweep.add_argument("--parse-executor", nargs="+", default=["none"], choices=("none", "thread", "process"))
+    sweep.add_argument("--set", nargs="+", metavar="KEY=VALUE", help="extra Atlas settings for every run")
+    gate = parser.add_argument_group("CI gating")
+    gate.add_argument("--json", metavar="PATH", help="write results as JSON (usable as a --baseline)")
+    gate.add_argument("--baseline", metavar="PATH", help="JSON from an earlier --json run")
+    gate.add_argument("--max-regression", type=float, default=0.2, help="allowed pages/s drop vs. baseline")
+    gate.add_argument("--min-pages-per-second", type=float, default=None)
+    args = parser.parse_args()
+
+    site = SyntheticSite(
+        pages=args.pages,
+        fanout=args.fanout,
+        page_size=args.page_size,
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        latency_dist=args.latency_dist,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        duplicate_rate=args.duplicate_rate,
+        alias_rate=args.alias_rate,
+        seed=args.seed,
+    )
+
+    header = f"{'pages':>7}{'pages/s':>10}{'p50 ms':>9}{'p99 ms':>9}{'RSS MiB':>9}{'CPU s':>8}  settings"
+    print(header)
+    print("-" * len(header))
+    results = {}
+    with site.serve() as base_url:
+        for settings in profiles(args):
+            name = profile_name(settings)
+            r = results[name] = crawl_in_subprocess(base_url, settings)
+            if "error" in r:
+                print(f"{'-':>7}{'-':>10}{'-':>9}{'-':>9}{'-':>9}{'-':>8}  {name}: {r['error']}")
+                continue
+            print(
+                f"{r['pages']:>7}{r['pages_per_second']:>10.1f}{r['p50_ms']:>9.1f}{r['p99_ms']:>9.1f}"
+                f"{r['peak_rss_mib']:>9.1f}{r['cpu_seconds']:>8.2f}  {name}"
+            )
+
+    if args.json:
+        site_config = {k: v for k, v in vars(site).items() if not k.startswith("_") and k != "requests"}
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"site": site_config, "results": results}, f, indent=2)
+
+    failures = [f"{name}: {r['error']}" for name, r in results.items() if "error" in r]
+    failures += check_regressions(results, args)
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
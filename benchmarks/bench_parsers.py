@@ -0,0 +1,66 @@
+"""
+Parse + text + link extraction time per page for each installed html_parser backend.
+
+Uses the HTML fixtures in test/fixtures/html plus one large page built from them:
+
+    python -m benchmarks.bench_parsers --repeat 50
+"""
+
+import argparse
+import glob
+import os
+import time
+
+from webcreeper.creeper_core.parsers import available_backends, get_backend
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "..", "test", "fixtures", "html")
+
+
+def load_pages() -> dict[str, str]:
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURE_DIR, "*.html"))):
+        with open(path, encoding="utf-8") as f:
+            pages[os.path.basename(path)] = f.read()
+    # A ~0.5 MB page: every fixture repeated, as on long listing or archive pages.
+    pages["large (synthetic)"] = "<html><body>" + "".join(pages.values()) * 40 + "</body></html>"
+    return pages
+
+
+def time_backend(name: str, html: str, repeat: int) -> float:
+    backend = get_backend(name)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        tree = backend.parse(html)
+        backend.text(tree)
+        backend.anchors(tree)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    backends = available_backends()
+    pages = load_pages()
+
+    header = f"{'page':<28}{'KiB':>8}" + "".join(f"{name:>16}" for name in backends)
+    print(header)
+    print("-" * len(header))
+    totals = dict.fromkeys(backends, 0.0)
+    for label, html in pages.items():
+        repeat = max(1, args.repeat // 20) if len(html) > 500_000 else args.repeat
+        row = f"{label:<28}{len(html) / 1024:>8.1f}"
+        for name in backends:
+            seconds = time_backend(name, html, repeat)
+            totals[name] += seconds
+            row += f"{seconds * 1000:>13.2f} ms"
+        print(row)
+
+    base = totals["html.parser"]
+    print("-" * len(header))
+    print(f"{'speedup vs html.parser':<36}" + "".join(f"{base / totals[name]:>15.1f}x" for name in backends))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Memory and insert/lookup time of each url_set kind for N synthetic URLs:
+
+    python -m benchmarks.bench_urlsets --sizes 1000000 10000000
+
+Memory is measured with tracemalloc (Python allocations retained after inserting N URLs);
+for "set" that includes the URL strings themselves, which the compact kinds do not keep.
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from webcreeper.creeper_core.urlset import URL_SET_KINDS, make_url_set
+
+
+def urls(n: int, offset: int = 0):
+    for i in range(offset, offset + n):
+        yield f"https://host{i % 997}.example.com/section/{i // 997}/article-{i}.html?page={i % 7}"
+
+
+def measure(kind: str, n: int, error_rate: float) -> dict:
+    tracemalloc.start()
+    start = time.perf_counter()
+    url_set = make_url_set(kind, error_rate=error_rate)
+    for url in urls(n):
+        url_set.add(url)
+    insert_s = time.perf_counter() - start
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    probes = min(n, 200_000)
+    start = time.perf_counter()
+    hits = sum(url in url_set for url in urls(probes))
+    lookup_s = time.perf_counter() - start
+    false_hits = sum(url in url_set for url in urls(probes, offset=n))
+    assert hits == probes
+    return {
+        "memory": memory,
+        "insert_us": insert_s / n * 1e6,
+        "lookup_us": lookup_s / probes * 1e6,
+        "false_positive_rate": false_hits / probes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000_000])
+    parser.add_argument("--kinds", nargs="+", default=list(URL_SET_KINDS), choices=URL_SET_KINDS)
+    parser.add_argument("--error-rate", type=float, default=0.001)
+    args = parser.parse_args()
+
+    header = f"{'N':>11}  {'kind':<12}{'memory MiB':>12}{'B/url':>8}{'insert us':>11}{'lookup us':>11}{'false pos':>11}"
+    print(header)
+    print("-" * len(header))
+    for n in args.sizes:
+        for kind in args.kinds:
+            r = measure(kind, n, args.error_rate)
+            print(
+                f"{n:>11,}  {kind:<12}{r['memory'] / 2**20:>12.1f}{r['memory'] / n:>8.1f}"
+                f"{r['insert_us']:>11.2f}{r['lookup_us']:>11.2f}{r['false_positive_rate']:>11.5f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
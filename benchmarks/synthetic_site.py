@@ -0,0 +1,186 @@
+"""
+A synthetic website served from localhost, for offline crawl benchmarks and tests.
+
+Page i lives at /page/i. Everything about a page (links, text, latency, errors) is derived
+from a seeded RNG keyed by its path, so every run of a given configuration serves the same
+site. Configurable:
+  - pages, fanout:      site size and links per page (page 0 reaches every page)
+  - page_size:          approximate HTML bytes per page (filler paragraphs)
+  - latency_ms, latency_jitter_ms, latency_dist: per-response delay ("fixed", "uniform", "lognormal")
+  - error_rate:         fraction of responses that are 500s
+  - throttle_rate:      fraction of responses that are 429s (with Retry-After: 0)
+  - duplicate_rate:     fraction of pages serving exactly the HTML of another page
+  - alias_rate:         fraction of links carrying tracking params or a fragment
+
+    site = SyntheticSite(pages=1000, fanout=10, latency_ms=20)
+    with site.serve() as base_url:
+        ...
+"""
+
+import contextlib
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = (
+    "crawler frontier graph anchor latency robots sitemap politeness token bucket parser "
+    "document canonical redirect fingerprint bloom filter queue host worker checkpoint"
+).split()
+
+ALIAS_SUFFIXES = ("?utm_source=bench", "?utm_medium=link&gclid=1", "#section")
+
+
+class SyntheticSite:
+    def __init__(
+        self,
+        pages: int = 1000,
+        fanout: int = 10,
+        page_size: int = 8192,
+        latency_ms: float = 0.0,
+        latency_jitter_ms: float = 0.0,
+        latency_dist: str = "fixed",
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        duplicate_rate: float = 0.0,
+        alias_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        if latency_dist not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency_dist '{latency_dist}'; expected 'fixed', 'uniform' or 'lognormal'")
+        self.pages = max(1, pages)
+        self.fanout = max(1, fanout)
+        self.page_size = page_size
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.latency_dist = latency_dist
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.duplicate_rate = duplicate_rate
+        self.alias_rate = alias_rate
+        self.seed = seed
+        self.requests = 0  # responses served, all kinds
+        self._lock = threading.Lock()
+        self._request_rng = random.Random(seed)
+
+    # -------------------- content --------------------
+
+    def _rng(self, *key) -> random.Random:
+        return random.Random(":".join(map(str, (self.seed, *key))))  # str seeds hash stably across runs
+
+    def original_of(self, i: int) -> int:
+        """Page whose HTML page i serves (itself unless it is a duplicate)."""
+        rng = self._rng("dup", i)
+        if i and rng.random() < self.duplicate_rate:
+            return rng.randrange(i)
+        return i
+
+    def links(self, i: int) -> list[str]:
+        """Outgoing hrefs: tree children first (so every page is reachable), then random pages."""
+        rng = self._rng("links", i)
+        targets = [c for c in range(i * self.fanout + 1, (i + 1) * self.fanout + 1) if c < self.pages]
+        while len(targets) < self.fanout:
+            targets.append(rng.randrange(self.pages))
+        hrefs = []
+        for t in targets:
+            if rng.random() < self.alias_rate:
+                hrefs.append(f"/page/{t}" + rng.choice(ALIAS_SUFFIXES))
+            else:
+                hrefs.append(f"/page/{t}")
+        return hrefs
+
+    def html(self, i: int) -> bytes:
+        i = self.original_of(i)
+        rng = self._rng("text", i)
+        anchors = "".join(
+            f'<li><a href="{href}">{rng.choice(WORDS)} {n}</a></li>' for n, href in enumerate(self.links(i))
+        )
+        head = f"<html><head><title>Page {i}</title></head><body><h1>Page {i}</h1><ul>{anchors}</ul>"
+        filler = []
+        size = len(head)
+        while size < self.page_size:
+            paragraph = "<p>" + " ".join(rng.choice(WORDS) for _ in range(40)) + f" {i}</p>"
+            filler.append(paragraph)
+            size += len(paragraph)
+        return (head + "".join(filler) + "</body></html>").encode("utf-8")
+
+    # -------------------- responses --------------------
+
+    def latency(self) -> float:
+        """Seconds to delay one response."""
+        with self._lock:
+            rng = self._request_rng
+            if self.latency_dist == "uniform":
+                ms = rng.uniform(self.latency_ms - self.latency_jitter_ms, self.latency_ms + self.latency_jitter_ms)
+            elif self.latency_dist == "lognormal" and self.latency_ms > 0:
+                sigma = math.log1p(self.latency_jitter_ms / self.latency_ms) if self.latency_jitter_ms else 0.5
+                ms = rng.lognormvariate(math.log(self.latency_ms) - sigma**2 / 2, sigma)
+            else:
+                ms = self.latency_ms
+        return max(0.0, ms) / 1000
+
+    def respond(self, path: str) -> tuple[int, dict, bytes]:
+        """(status, headers, body) for a GET of path."""
+        with self._lock:
+            self.requests += 1
+            roll = self._request_rng.random()
+        if path.startswith("/robots.txt"):
+            return 404, {}, b""
+        if not path.startswith("/page/"):
+            return 404, {}, b""
+        try:
+            i = int(path[len("/page/") :].split("?", 1)[0])
+        except ValueError:
+            return 404, {}, b""
+        if not 0 <= i < self.pages:
+            return 404, {}, b""
+        if roll < self.throttle_rate:
+            return 429, {"Retry-After": "0"}, b""
+        if roll < self.throttle_rate + self.error_rate:
+            return 500, {}, b""
+        return 200, {"Content-Type": "text/html; charset=utf-8"}, self.html(i)
+
+    # -------------------- server --------------------
+
+    def make_server(self, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                delay = site.latency()
+                if delay:
+                    time.sleep(delay)
+                status, headers, body = site.respond(self.path)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        class Server(ThreadingHTTPServer):
+            daemon_threads = True
+            request_queue_size = 1024  # the default listen backlog of 5 drops SYNs under concurrent connects
+
+        server = Server((host, port), Handler)
+        return server
+
+    @contextlib.contextmanager
+    def serve(self, host: str = "127.0.0.1", port: int = 0):
+        """Serve the site in a background thread; yields the base URL (page 0 is base_url + "/page/0")."""
+        server = self.make_server(host, port)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            yield f"http://{host}:{server.server_address[1]}"
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
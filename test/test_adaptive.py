@@ -0,0 +1,107 @@
+import asyncio
+import time
+import unittest
+from email.utils import formatdate
+
+import httpx
+
+from webcreeper.agents.atlas.atlas import Atlas
+from webcreeper.creeper_core.adaptive import AdaptiveController, parse_retry_after
+from webcreeper.creeper_core.scheduler import HostScheduler
+
+
+class TestRetryAfter(unittest.TestCase):
+    def test_seconds_and_http_date(self):
+        self.assertEqual(parse_retry_after("120"), 120.0)
+        now = time.time()
+        self.assertAlmostEqual(parse_retry_after(formatdate(now + 30, usegmt=True), now=now), 30.0, delta=1.0)
+        self.assertEqual(parse_retry_after(formatdate(now - 30, usegmt=True), now=now), 0.0)
+        self.assertIsNone(parse_retry_after("soon"))
+        self.assertIsNone(parse_retry_after(None))
+
+
+class TestAdaptiveController(unittest.TestCase):
+    def test_additive_increase_and_multiplicative_decrease(self):
+        scheduler = HostScheduler(delay=0.2)
+        control = AdaptiveController(scheduler, max_limit=4)
+        for _ in range(60):
+            control.on_response("a.example", 200, 0.01)
+        self.assertEqual(scheduler.get_limit("a.example"), 4)
+        self.assertEqual(scheduler.get_delay("a.example"), 0.0)
+
+        control.on_response("a.example", 429, 0.01, retry_after=5)
+        control.on_response("a.example", 429, 0.01)  # already in flight when the limit was cut
+        stats = control.stats()["a.example"]
+        self.assertEqual((stats["limit"], stats["decreases"], stats["pushbacks"]), (2, 1, 2))
+        self.assertEqual(scheduler.get_limit("a.example"), 2)
+        self.assertGreater(scheduler.get_delay("a.example"), 0.0)
+
+    def test_latency_rise_and_errors_back_off_above_the_floor(self):
+        scheduler = HostScheduler()
+        control = AdaptiveController(scheduler, max_limit=8, initial_limit=4)
+        control.set_floor("slow.example", 1.0)
+        for _ in range(5):
+            control.on_response("slow.example", 200, 0.1)
+        self.assertEqual(scheduler.get_delay("slow.example"), 1.0)  # never below the Crawl-delay
+        for _ in range(3):
+            control.on_response("slow.example", 200, 0.5)
+        self.assertEqual(control.stats()["slow.example"]["decreases"], 1)
+
+        control.on_error("down.example")
+        self.assertEqual(scheduler.get_limit("down.example"), 2)
+        self.assertGreater(control.stats()["down.example"]["error_rate"], 0)
+
+
+class TestAdaptiveCrawl(unittest.TestCase):
+    def crawl(self, handler, **settings):
+        atlas = Atlas(
+            settings={
+                "save_results": False,
+                "respect_robots": False,
+                "max_depth": 1,
+                "rate_limit_delay": 0.05,
+                "adaptive_concurrency": True,
+                **settings,
+            }
+        )
+
+        async def run():
+            atlas._async_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            await atlas.crawl_async("https://example.com/")
+
+        asyncio.run(run())
+        return atlas
+
+    def test_fast_host_converges_to_max_concurrency(self):
+        links = "".join(f'<a href="/p{i}">{i}</a>' for i in range(30))
+
+        def handler(request):
+            return httpx.Response(200, html=links if request.url.path == "/" else f"<p>{request.url.path}</p>")
+
+        atlas = self.crawl(handler, max_concurrency=8, adaptive_max_per_host=4)
+        self.assertEqual(len(atlas.graph), 31)
+        host = atlas.get_host_stats()["example.com"]
+        self.assertEqual((host["limit"], host["adaptive"]["limit"]), (4, 4))
+        self.assertLess(host["delay"], 0.05)  # faster than the configured rate_limit_delay
+        self.assertIn("example.com", atlas.get_metrics()["adaptive"])
+        self.assertIn('webcreeper_host_concurrency_limit{host="example.com"} 4', atlas.get_metrics_prometheus())
+
+    def test_retry_after_pauses_the_host(self):
+        sent = []
+
+        def handler(request):
+            sent.append(time.monotonic())
+            if len(sent) == 1:
+                return httpx.Response(429, headers={"Retry-After": "5"})
+            return httpx.Response(200, html="<p>ok</p>")
+
+        atlas = self.crawl(handler, max_retries=1, backoff_factor=0.0, status_forcelist=[429], max_retry_after=0.3)
+        self.assertEqual(len(sent), 2)
+        self.assertGreaterEqual(sent[1] - sent[0], 0.25)  # capped Retry-After, not the zero backoff
+        metrics = atlas.get_metrics()
+        self.assertEqual(metrics["counters"]["retry_after_pauses"], 1)
+        self.assertEqual(metrics["adaptive"]["example.com"]["pushbacks"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,3 +1,4 @@
+import asyncio
 import unittest
 
 from webcreeper.agents.atlas.atlas import Atlas
@@ -33,7 +34,7 @@ class TestAtlasAsync(unittest.IsolatedAsyncioTestCase):
         )
 
         async def fake_fetch(url: str):
-            if url == "https://example.com":
+            if url == "https://example.com/":
                 return (
                     '<a href="/a">A</a><a href="/b">B</a>',
                     "text/html",
@@ -55,14 +56,70 @@ class TestAtlasAsync(unittest.IsolatedAsyncioTestCase):
         await atlas.crawl_async("https://example.com", on_page_crawled=async_callback, hooks=[hook])
 
         # max_depth=1 means start page + one layer children are crawled
-        self.assertIn("https://example.com", atlas.graph)
+        self.assertIn("https://example.com/", atlas.graph)
         self.assertIn("https://example.com/a", atlas.graph)
         self.assertIn("https://example.com/b", atlas.graph)
         self.assertNotIn("https://example.com/c", atlas.graph)
         self.assertNotIn("https://example.com/d", atlas.graph)
         self.assertTrue(hook.started)
         self.assertTrue(hook.finished)
-        self.assertEqual(set(hook.pages), {"https://example.com", "https://example.com/a", "https://example.com/b"})
+        self.assertEqual(set(hook.pages), {"https://example.com/", "https://example.com/a", "https://example.com/b"})
+
+    async def test_streaming_crawl_keeps_shortest_depth(self):
+        # /t is first reached through the fast chain b -> c -> t (depth 3), then through the
+        # slow page a (depth 2); its child /u must still be crawled as with level-by-level BFS.
+        pages = {
+            "https://example.com/": '<a href="/a">A</a><a href="/b">B</a>',
+            "https://example.com/a": '<a href="/t">T via A</a>',
+            "https://example.com/b": '<a href="/c">C</a>',
+            "https://example.com/c": '<a href="/t">T</a>',
+            "https://example.com/t": '<a href="/u">U</a>',
+            "https://example.com/u": '<a href="/v">V</a>',
+        }
+
+        async def fake_fetch(url: str):
+            if url == "https://example.com/a":
+                await asyncio.sleep(0.05)
+            return (pages.get(url, ""), "text/html")
+
+        for kind in ("set", "fingerprint"):
+            with self.subTest(url_set=kind):
+                atlas = Atlas(settings={"save_results": False, "max_depth": 3, "max_concurrency": 4, "url_set": kind})
+                atlas.fetch_async = fake_fetch
+                atlas.should_visit = lambda url: True
+                atlas.is_allowed_path = lambda url: True
+
+                await atlas.crawl_async("https://example.com")
+
+                self.assertIn("https://example.com/u", atlas.graph)
+                self.assertNotIn("https://example.com/v", atlas.graph)
+                self.assertEqual(len(atlas.graph), 6)
+
+    async def test_parse_executor_matches_inline_parsing(self):
+        pages = {
+            "https://example.com/": '<a href="/a">A</a><a href="/b#top">B</a><a href="mailto:x@example.com">M</a>',
+            "https://example.com/a": '<p>same</p><a href="/c">C</a>',
+            "https://example.com/b": '<p>same</p><a href="/c">C</a>',
+            "https://example.com/c": "<p>leaf</p>",
+        }
+
+        async def crawl(mode):
+            atlas = Atlas(settings={"save_results": False, "max_depth": 2, "parse_executor": mode, "parse_workers": 2})
+
+            async def fake_fetch(url: str):
+                return (pages.get(url, ""), "text/html")
+
+            atlas.fetch_async = fake_fetch
+            atlas.should_visit = lambda url: True
+            atlas.is_allowed_path = lambda url: True
+            await atlas.crawl_async("https://example.com")
+            self.assertIsNone(atlas._parse_executor)
+            return atlas.graph
+
+        inline = await crawl(None)
+        self.assertEqual(len(inline), 3)  # /a and /b share content; one is skipped as duplicate
+        self.assertEqual(await crawl("thread"), inline)
+        self.assertEqual(await crawl("process"), inline)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,136 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+from webcreeper.agents.atlas.atlas import Atlas
+from webcreeper.creeper_core.checkpoint import CrawlCheckpoint
+from webcreeper.creeper_core.hooks import CrawlHook
+
+PAGES = {
+    "https://example.com/": '<a href="/a">A</a><a href="/b">B</a>',
+    "https://example.com/a": '<a href="/c">C</a>',
+    "https://example.com/b": '<a href="/d">D</a>',
+    "https://example.com/c": "<p>c</p>",
+    "https://example.com/d": "<p>d</p>",
+}
+
+
+class TestAtlasCheckpoint(unittest.IsolatedAsyncioTestCase):
+    def make_atlas(self, tmp: str, resume: bool) -> Atlas:
+        atlas = Atlas(
+            settings={
+                "storage_path": tmp,
+                "crawl_entire_website": True,
+                "max_concurrency": 1,
+                "checkpoint_path": os.path.join(tmp, "checkpoint.sqlite"),
+                "resume": resume,
+            }
+        )
+        atlas.should_visit = lambda url: True
+        atlas.is_allowed_path = lambda url: True
+        return atlas
+
+    async def test_resume_continues_without_refetching(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            first = self.make_atlas(tmp, resume=False)
+            fetched_first = []
+
+            async def fetch_then_hang(url: str):
+                if len(fetched_first) == 3:
+                    await asyncio.Event().wait()  # simulate the process dying mid-crawl
+                fetched_first.append(url)
+                return (PAGES.get(url, ""), "text/html")
+
+            first.fetch_async = fetch_then_hang
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(first.crawl_async("https://example.com"), 0.5)
+
+            second = self.make_atlas(tmp, resume=True)
+            fetched_second = []
+
+            async def fetch(url: str):
+                fetched_second.append(url)
+                return (PAGES.get(url, ""), "text/html")
+
+            second.fetch_async = fetch
+            await second.crawl_async("https://example.com")
+
+            self.assertFalse(set(fetched_first) & set(fetched_second))
+            self.assertEqual(set(fetched_first) | set(fetched_second), set(PAGES))
+            self.assertEqual(set(second.graph), set(PAGES))
+
+    async def test_fresh_crawl_resets_checkpoint(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for _ in range(2):
+                atlas = self.make_atlas(tmp, resume=False)
+                fetched = []
+
+                async def fetch(url: str):
+                    fetched.append(url)
+                    return (PAGES.get(url, ""), "text/html")
+
+                atlas.fetch_async = fetch
+                await atlas.crawl_async("https://example.com")
+                self.assertEqual(set(fetched), set(PAGES))
+
+    async def test_failed_results_flush_stops_the_crawl(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            atlas = self.make_atlas(tmp, resume=False)
+            atlas.settings["checkpoint_interval"] = 0
+
+            async def fetch(url: str):
+                return (PAGES.get(url, ""), "text/html")
+
+            def disk_full():
+                raise OSError("No space left on device")
+
+            atlas.fetch_async = fetch
+            atlas._flush_results = disk_full
+            with self.assertRaisesRegex(OSError, "No space left"):
+                await asyncio.wait_for(atlas.crawl_async("https://example.com"), 5)
+
+    async def test_queued_hooks_finish_before_the_page_is_done(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            atlas = self.make_atlas(tmp, resume=False)
+            atlas.settings.update({"checkpoint_interval": 0, "hook_queue_size": 4})
+
+            class StuckOnA(CrawlHook):
+                async def on_page(self, url, html, context):
+                    if url.endswith("/a"):
+                        await asyncio.Event().wait()  # the process dies while this hook runs
+                    return {"url": url}
+
+            async def fetch(url: str):
+                return (PAGES.get(url, ""), "text/html")
+
+            atlas.fetch_async = fetch
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(atlas.crawl_async("https://example.com", hooks=[StuckOnA()]), 0.5)
+
+            checkpoint = CrawlCheckpoint(os.path.join(tmp, "checkpoint.sqlite"))
+            done = checkpoint.load()["done"]
+            checkpoint.close()
+            with open(os.path.join(tmp, "results.jsonl")) as f:
+                saved = {json.loads(line)["url"] for line in f}
+            self.assertIn("https://example.com/c", done)  # a's sibling b and its child d finished
+            self.assertNotIn("https://example.com/a", done)
+            self.assertLessEqual(done, saved)
+
+    async def test_failed_setup_releases_what_it_opened(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            atlas = self.make_atlas(tmp, resume=False)
+            atlas.settings["parse_executor"] = "bogus"
+            with self.assertRaises(ValueError):
+                await atlas.crawl_async("https://example.com")
+
+            self.assertIsNone(atlas._results_writer)
+            self.assertIsNone(atlas._checkpoint)
+            self.assertIsNone(atlas._async_client)
+            self.assertFalse([t for t in threading.enumerate() if t.name.startswith("webcreeper-jsonl-writer")])
+
+
+if __name__ == "__main__":
+    unittest.main()
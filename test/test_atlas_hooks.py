@@ -1,6 +1,11 @@
+import asyncio
+import threading
+import time
 import unittest
+from unittest import mock
 
 from webcreeper.agents.atlas.atlas import Atlas
+from webcreeper.creeper_core import parsers as parsers_module
 from webcreeper.creeper_core.hooks import CrawlHook
 
 
@@ -57,14 +62,186 @@ class TestAtlasHooks(unittest.TestCase):
 
         self.assertTrue(hook.started, "on_start hook should run")
         self.assertTrue(hook.finished, "on_finish hook should run")
-        self.assertEqual(hook.pages, ["https://example.com"])
+        self.assertEqual(hook.pages, ["https://example.com/"])
 
         graph = atlas.get_graph()
-        self.assertIn("https://example.com", graph)
-        targets = [link["target"] for link in graph["https://example.com"]]
+        self.assertIn("https://example.com/", graph)
+        targets = [link["target"] for link in graph["https://example.com/"]]
         self.assertIn("https://example.com/allowed", targets)
         self.assertNotIn("https://example.com/blocked", targets)
 
+    def test_page_is_parsed_once_and_shared_with_hooks(self):
+        titles = []
+
+        class SoupHook(CrawlHook):
+            def on_page(self, url, html, context):
+                titles.append(context["document"].soup.title.string)
+
+        atlas = Atlas(settings={"save_results": False, "max_depth": 0})
+        atlas.should_visit = lambda url: True
+        atlas.is_allowed_path = lambda url: True
+
+        async def fake_fetch(url):
+            return ("<html><head><title>T</title></head><body><a href='/x'>X</a></body></html>", "text/html")
+
+        atlas.fetch_async = fake_fetch
+
+        real_soup = parsers_module.BeautifulSoup
+        with mock.patch.object(parsers_module, "BeautifulSoup", side_effect=real_soup) as soup_cls:
+            atlas.crawl("https://example.com", hooks=[SoupHook()])
+
+        self.assertEqual(soup_cls.call_count, 1)
+        self.assertEqual(titles, ["T"])
+        self.assertEqual(atlas.graph["https://example.com/"][0]["target"], "https://example.com/x")
+
+
+class TestBatchLinkHooks(unittest.TestCase):
+    HTML = (
+        '<a href="/keep">k</a><a href="/drop">d</a><a href="/also-keep">a</a>'
+        '<a href="/blocked">b</a><a href="https://example.com/x?utm_source=y#z">x</a>'
+    )
+
+    def links(self, hooks):
+        atlas = Atlas(settings={"save_results": False})
+        atlas.hooks = hooks
+        records = asyncio.run(atlas.extract_links_async(self.HTML, "https://example.com/"))
+        return atlas, [r["target"] for r in records], records
+
+    def test_keep_mask_and_filtered_list(self):
+        calls = []
+
+        class Mask(CrawlHook):
+            def on_links_discovered(self, source_url, links, context):
+                calls.append((source_url, list(links), context["source_url"]))
+                return ["drop" not in url for url, _ in links]
+
+        class Filtered(CrawlHook):
+            async def on_links_discovered(self, source_url, links, context):
+                return [link for link in links if not link[0].endswith("/x")]
+
+        _, targets, records = self.links([Mask(), Filtered(), TrackingHook()])
+        self.assertEqual(targets, ["https://example.com/keep", "https://example.com/also-keep"])
+        self.assertEqual([r["source_chunk"] for r in records], ["chunk_0", "chunk_1"])
+        self.assertEqual(len(calls), 1)  # once per page, not per link
+        self.assertEqual(calls[0][0], "https://example.com/")
+        self.assertEqual(len(calls[0][1]), 5)
+
+    def test_batch_hooks_skip_the_per_link_path_and_bad_returns_keep_links(self):
+        class Both(CrawlHook):
+            def on_link_discovered(self, source_url, target_url, anchor_text, context):
+                raise AssertionError("per-link method must not be called")
+
+            def on_links_discovered(self, source_url, links, context):
+                return [True]  # wrong length: logged and ignored
+
+        atlas, targets, _ = self.links([Both()])
+        self.assertEqual(len(targets), 5)
+        self.assertEqual(
+            atlas._filter_discovered_links("https://example.com/", [("https://example.com/a", "")]),
+            [("https://example.com/a", "")],
+        )
+
+
+class TestHookExecution(unittest.TestCase):
+    PAGES = {
+        f"https://example.com/{i}": f"<p>page {i}</p>" + "".join(f'<a href="/{j}">{j}</a>' for j in range(6))
+        for i in range(6)
+    }
+
+    def crawl(self, make_hooks, **settings):
+        atlas = Atlas(
+            settings={"save_results": False, "crawl_entire_website": True, "respect_robots": False, **settings}
+        )
+        results = []
+
+        async def fake_fetch(url):
+            return (self.PAGES.get(url, "<p>root</p><a href='/0'>0</a>"), "text/html")
+
+        atlas.fetch_async = fake_fetch
+        atlas._save_result = results.append
+        atlas.crawl("https://example.com/", hooks=make_hooks(atlas))
+        return atlas, results
+
+    def test_hooks_run_concurrently_and_time_out_in_isolation(self):
+        class Waiter(CrawlHook):
+            async def on_page(self, url, html, context):
+                await context["peer_done"].wait()  # only finishes if Setter runs at the same time
+                return {"url": url, "hook": "waiter"}
+
+        class Setter(CrawlHook):
+            async def on_page(self, url, html, context):
+                context["peer_done"].set()
+                return {"url": url, "hook": "setter"}
+
+        class Stuck(CrawlHook):
+            timeout = 0.05
+
+            async def on_page(self, url, html, context):
+                await asyncio.Event().wait()
+
+        atlas = Atlas(settings={"save_results": False})
+        ctx = {"peer_done": None}
+
+        async def run():
+            ctx["peer_done"] = asyncio.Event()
+            atlas.hooks = [Waiter(), Stuck(), Setter()]
+            return await asyncio.wait_for(atlas._collect_page_results_async("https://example.com/", "", ctx), 2)
+
+        results = asyncio.run(run())
+        self.assertEqual([r["hook"] for r in results], ["waiter", "setter"])
+        self.assertEqual(atlas.get_metrics()["error_reasons"], {"hook_timeout": 1})
+
+    def test_sync_hooks_run_in_the_hook_executor(self):
+        threads = set()
+
+        class Blocking(CrawlHook):
+            def on_page(self, url, html, context):
+                threads.add(threading.current_thread().name)
+                return {"url": url}
+
+        _, results = self.crawl(lambda atlas: [Blocking()], hook_executor="thread", hook_workers=2)
+        self.assertEqual(len(results), 7)
+        self.assertTrue(threads and all(name.startswith("webcreeper-hook") for name in threads))
+
+    def test_hook_timeout_applies_to_sync_hooks_without_an_executor(self):
+        release = threading.Event()
+
+        class Blocking(CrawlHook):
+            def on_page(self, url, html, context):
+                if url == "https://example.com/0":
+                    release.wait(5)  # a sync call that would stall the event loop
+                return {"url": url, "thread": threading.current_thread().name}
+
+        started = time.monotonic()
+        try:
+            # The timed-out call keeps its pool worker busy; the second one serves the other pages.
+            atlas, results = self.crawl(lambda atlas: [Blocking()], hook_timeout=0.1, hook_workers=2)
+        finally:
+            release.set()
+        self.assertLess(time.monotonic() - started, 3)
+        self.assertEqual(len(results), 6)
+        self.assertTrue(all(r["thread"].startswith("webcreeper-hook") for r in results))
+        self.assertEqual(atlas.get_metrics()["error_reasons"], {"hook_timeout": 1})
+
+    def test_hook_queue_applies_backpressure_and_drains(self):
+        depths = []
+
+        class Slow(CrawlHook):
+            def __init__(self, atlas):
+                self.atlas = atlas
+
+            async def on_page(self, url, html, context):
+                depths.append(self.atlas._page_hook_queue.qsize())
+                await asyncio.sleep(0.01)
+                return {"url": url}
+
+        atlas, results = self.crawl(
+            lambda atlas: [Slow(atlas)], hook_queue_size=2, hook_queue_workers=1, max_concurrency=4
+        )
+        self.assertEqual(sorted(r["url"] for r in results), sorted(["https://example.com/", *self.PAGES]))
+        self.assertLessEqual(max(depths), 2)
+        self.assertIsNone(atlas._page_hook_queue)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,191 @@
+import os
+import tempfile
+import unittest
+
+import httpx
+
+from webcreeper.agents.atlas.atlas import Atlas
+from webcreeper.creeper_core.hooks import CrawlHook
+
+
+def make_atlas(**overrides):
+    settings = {
+        "save_results": False,
+        "respect_robots": False,
+        "rate_limit_delay": 0.0,
+        "max_retries": 0,
+    }
+    settings.update(overrides)
+    return Atlas(settings=settings)
+
+
+class TestFetchAsyncClient(unittest.IsolatedAsyncioTestCase):
+    async def test_crawl_reuses_one_client_and_closes_it(self):
+        pages = {
+            "/": '<a href="/a">A</a><a href="/b">B</a>',
+            "/a": "<p>a</p>",
+            "/b": "<p>b</p>",
+        }
+        seen = []
+
+        def handler(request: httpx.Request):
+            seen.append(request.url.path)
+            return httpx.Response(200, html=pages.get(request.url.path, ""))
+
+        atlas = make_atlas(max_depth=1)
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        atlas._async_client = client
+
+        await atlas.crawl_async("https://example.com")
+
+        self.assertEqual(sorted(seen), ["/", "/a", "/b"])
+        self.assertTrue(client.is_closed)
+        self.assertIsNone(atlas._async_client)
+
+    async def test_open_async_client_is_idempotent(self):
+        atlas = make_atlas(base_url="https://example.com")
+        self.assertIsNone(atlas._async_client)
+        client = await atlas.open_async_client()
+        self.assertIs(await atlas.open_async_client(), client)
+        await atlas.close_async_client()
+        self.assertTrue(client.is_closed)
+
+    def test_normalize_url_keeps_non_default_port(self):
+        atlas = make_atlas()
+        self.assertEqual(atlas._normalize_url("http://127.0.0.1:8080/x"), "http://127.0.0.1:8080/x")
+        self.assertEqual(atlas._normalize_url("https://Example.com:443/x"), "https://example.com/x")
+
+
+class CountingStream(httpx.AsyncByteStream):
+    """Response body served in chunks, counting how many were pulled."""
+
+    def __init__(self, chunk: bytes, count: int):
+        self.chunk = chunk
+        self.count = count
+        self.served = 0
+
+    async def __aiter__(self):
+        for _ in range(self.count):
+            self.served += 1
+            yield self.chunk
+
+
+class TestStreamedBodies(unittest.IsolatedAsyncioTestCase):
+    async def test_body_over_max_content_length_is_aborted_mid_stream(self):
+        stream = CountingStream(b"x" * 16_384, count=64)  # 1 MiB, no Content-Length
+
+        def handler(request: httpx.Request):
+            return httpx.Response(200, headers={"Content-Type": "text/html"}, stream=stream)
+
+        atlas = make_atlas(max_content_length=50_000)
+        atlas._async_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        self.assertIsNone(await atlas.fetch_async("https://example.com/big"))
+        self.assertLessEqual(stream.served, 4)
+        self.assertIn("https://example.com/big", atlas.get_disallowed_report())
+
+    async def test_unwanted_content_type_is_not_downloaded(self):
+        stream = CountingStream(b"%PDF-1.7 ...", count=100)
+        skipped = []
+
+        def handler(request: httpx.Request):
+            if request.url.path == "/":
+                return httpx.Response(200, html='<a href="/doc.pdf">PDF</a>')
+            return httpx.Response(200, headers={"Content-Type": "application/pdf"}, stream=stream)
+
+        class SkipHook(CrawlHook):
+            def on_page_skipped(self, url, reason, context):
+                skipped.append((url, reason))
+
+        atlas = make_atlas(max_depth=1)
+        atlas._async_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        await atlas.crawl_async("https://example.com", hooks=[SkipHook()])
+
+        self.assertEqual(stream.served, 0)
+        self.assertEqual(skipped, [("https://example.com/doc.pdf", "non_html:application/pdf")])
+        self.assertEqual(list(atlas.graph), ["https://example.com/"])
+
+    async def test_small_body_is_decoded_with_declared_charset(self):
+        def handler(request: httpx.Request):
+            return httpx.Response(
+                200, headers={"Content-Type": "text/html; charset=latin-1"}, content="<p>café</p>".encode("latin-1")
+            )
+
+        atlas = make_atlas(max_content_length=10_000)
+        atlas._async_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        text, content_type = await atlas.fetch_async("https://example.com/")
+        self.assertEqual(text, "<p>café</p>")
+        self.assertEqual(content_type, "text/html; charset=latin-1")
+
+
+class RecordingHook(CrawlHook):
+    def __init__(self, changed_only: bool = False):
+        self.changed_only = changed_only
+        self.pages = []
+        self.skipped = []
+
+    def on_page(self, url: str, html: str, context: dict):
+        self.pages.append(url)
+
+    def on_page_skipped(self, url: str, reason: str, context: dict):
+        self.skipped.append((url, reason))
+
+
+class TestConditionalGet(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.pages = {
+            "/": ('<a href="/a">A</a><a href="/b">B</a>', '"v1"'),
+            "/a": ('<a href="/c">C</a>', '"v1"'),
+            "/b": ("<p>b</p>", '"v1"'),
+            "/c": ("<p>c</p>", '"v1"'),
+        }
+        self.requests = []
+
+    def handler(self, request: httpx.Request):
+        body, etag = self.pages[request.url.path]
+        self.requests.append((request.url.path, request.headers.get("If-None-Match")))
+        if request.headers.get("If-None-Match") == etag:
+            return httpx.Response(304, headers={"ETag": etag})
+        return httpx.Response(200, html=body, headers={"ETag": etag})
+
+    async def crawl(self, cache_path, hook):
+        atlas = make_atlas(max_depth=2, http_cache_path=cache_path)
+        atlas._async_client = httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+        await atlas.crawl_async("https://example.com", hooks=[hook])
+        return atlas, hook
+
+    async def test_recrawl_revalidates_and_reuses_stored_links(self):
+        requests = self.requests
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_path = os.path.join(tmp, "validators.sqlite")
+            first, first_hook = await self.crawl(cache_path, RecordingHook(changed_only=True))
+            self.assertTrue(all(inm is None for _, inm in requests))
+            self.assertEqual(len(first_hook.pages), 4)
+
+            # /b changes; everything else answers 304.
+            self.pages["/b"] = ("<p>b, updated</p>", '"v2"')
+            requests.clear()
+            second, second_hook = await self.crawl(cache_path, RecordingHook(changed_only=True))
+
+        self.assertEqual(sorted(requests), [("/", '"v1"'), ("/a", '"v1"'), ("/b", '"v1"'), ("/c", '"v1"')])
+        self.assertEqual(second.graph, first.graph)  # /c is still reached through the unchanged /a
+        self.assertEqual(second_hook.pages, ["https://example.com/b"])
+        self.assertEqual(
+            sorted(url for url, reason in second_hook.skipped if reason == "not_modified"),
+            ["https://example.com/", "https://example.com/a", "https://example.com/c"],
+        )
+
+    async def test_hook_needing_every_page_turns_revalidation_off(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_path = os.path.join(tmp, "validators.sqlite")
+            await self.crawl(cache_path, RecordingHook(changed_only=True))
+            self.requests.clear()
+            atlas, hook = await self.crawl(cache_path, RecordingHook())
+
+        self.assertTrue(all(inm is None for _, inm in self.requests))
+        self.assertEqual(len(hook.pages), 4)
+        self.assertEqual(hook.skipped, [])
+        self.assertTrue(atlas.revalidate)  # back on for fetch_async outside a crawl
+
+
+if __name__ == "__main__":
+    unittest.main()
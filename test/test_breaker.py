@@ -0,0 +1,117 @@
+import asyncio
+import time
+import unittest
+
+import httpx
+
+from webcreeper.agents.atlas.atlas import Atlas
+from webcreeper.creeper_core.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from webcreeper.creeper_core.hooks import CrawlHook
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_on_failure_rate_then_probes(self):
+        breaker = CircuitBreaker(failure_threshold=3, failure_rate=0.5, window=10, open_seconds=0.05)
+        for ok in (True, False, True, False):
+            breaker.record_success("a") if ok else breaker.record_failure("a")
+        self.assertEqual(breaker.state("a"), CLOSED)
+        self.assertTrue(breaker.record_failure("a"))  # 3 of 5 failed
+        self.assertEqual(breaker.state("a"), OPEN)
+        self.assertFalse(breaker.allow("a"))
+        self.assertTrue(breaker.allow("b"))
+
+        time.sleep(0.06)
+        self.assertEqual(breaker.state("a"), HALF_OPEN)
+        self.assertTrue(breaker.allow("a"))  # the probe
+        self.assertTrue(breaker.blocked("a"))
+        self.assertTrue(breaker.record_failure("a"))
+        self.assertAlmostEqual(breaker.retry_in("a"), 0.1, delta=0.02)  # open twice as long
+
+        time.sleep(0.11)
+        self.assertTrue(breaker.allow("a"))
+        breaker.record_success("a")
+        self.assertEqual(breaker.state("a"), CLOSED)
+        stats = breaker.stats()["a"]
+        self.assertEqual((stats["trips"], stats["refused"], stats["recent_requests"]), (2, 1, 0))
+
+
+class TestAtlasCircuitBreaker(unittest.TestCase):
+    DOWN = [f"https://down.example/{i}" for i in range(8)]
+    UP = [f"https://up.example/{i}" for i in range(3)]
+
+    def crawl(self, handler, **settings):
+        errors = []
+
+        class Errors(CrawlHook):
+            def on_page_error(self, url, error, context):
+                errors.append((url, error, context.get("circuit")))
+
+        atlas = Atlas(
+            settings={
+                "save_results": False,
+                "respect_robots": False,
+                "rate_limit_delay": 0.0,
+                "max_retries": 0,
+                "max_depth": 1,
+                "max_concurrency": 4,
+                "max_concurrency_per_host": 1,
+                "allowed_domains": ["up.example", "down.example"],
+                "circuit_breaker": True,
+                **settings,
+            }
+        )
+        start = "".join(f'<a href="{url}">{url}</a>' for url in self.UP + self.DOWN)
+
+        async def run():
+            async def route(request):
+                if request.url.path == "/":
+                    return httpx.Response(200, html=start)
+                return await handler(request)
+
+            atlas._async_client = httpx.AsyncClient(transport=httpx.MockTransport(route))
+            await atlas.crawl_async("https://up.example/", hooks=[Errors()])
+
+        asyncio.run(run())
+        return atlas, errors
+
+    def test_failing_host_fails_fast(self):
+        down_requests = []
+
+        async def handler(request):
+            if request.url.host == "down.example":
+                down_requests.append(request.url.path)
+                raise httpx.ConnectTimeout("timed out", request=request)
+            return httpx.Response(200, html=f"<p>{request.url.path}</p>")
+
+        atlas, errors = self.crawl(handler, circuit_failure_threshold=3, circuit_open_seconds=60)
+        self.assertEqual(len(down_requests), 3)
+        self.assertEqual(
+            sorted(url for url in atlas.graph if "up.example" in url), sorted(["https://up.example/", *self.UP])
+        )
+        kinds = [error for _, error, _ in errors]
+        self.assertEqual((kinds.count("fetch_failed"), kinds.count("circuit_open")), (2, 6))
+        self.assertEqual(errors[-1][2]["state"], OPEN)
+        self.assertEqual(atlas.get_metrics()["counters"]["circuit_trips"], 1)
+        self.assertEqual(atlas.get_host_stats()["down.example"]["circuit"]["state"], OPEN)
+
+    def test_defer_waits_for_the_host_to_recover(self):
+        down_requests = []
+
+        async def handler(request):
+            if request.url.host == "down.example":
+                down_requests.append(request.url.path)
+                if len(down_requests) <= 2:
+                    return httpx.Response(503)
+            return httpx.Response(200, html=f"<p>{request.url.host}{request.url.path}</p>")
+
+        atlas, errors = self.crawl(
+            handler, circuit_failure_threshold=2, circuit_open_seconds=0.2, circuit_open_action="defer"
+        )
+        self.assertEqual([error for _, error, _ in errors], ["fetch_failed", "circuit_open"])
+        self.assertEqual(len(down_requests), len(self.DOWN))  # nothing refused, nothing fetched twice
+        self.assertEqual(len([url for url in atlas.graph if "down.example" in url]), len(self.DOWN) - 2)
+        self.assertEqual(atlas.get_metrics()["circuits"]["down.example"]["state"], CLOSED)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import asyncio
+import unittest
+
+from webcreeper.agents.atlas.atlas import Atlas
+from webcreeper.creeper_core.canonical import UrlCanonicalizer
+from webcreeper.creeper_core.document import PageDocument
+from webcreeper.creeper_core.parsers import available_backends
+from webcreeper.creeper_core.urlset import fingerprint64
+from webcreeper.creeper_core.validators import FetchResult
+
+
+class TestUrlCanonicalizer(unittest.TestCase):
+    def test_aliases_share_one_key_and_fingerprint(self):
+        canon = UrlCanonicalizer(tracking_params=["gclid"])
+        aliases = [
+            "https://www.Example.com/shoes?size=9&color=red",
+            "HTTPS://example.com:443/shoes?color=red&size=9#reviews",
+            "https://example.com/shoes?utm_source=mail&color=red&gclid=abc&size=9",
+        ]
+        keys = {canon.key(u) for u in aliases}
+        self.assertEqual(keys, {"https://example.com/shoes?color=red&size=9"})
+        self.assertEqual(canon.fingerprint(aliases[0]), fingerprint64("https://example.com/shoes?color=red&size=9"))
+        self.assertEqual(canon.key("https://example.com"), "https://example.com/")
+        self.assertEqual(canon.key("http://example.com:8080/x"), "http://example.com:8080/x")
+
+    def test_keys_are_cached(self):
+        canon = UrlCanonicalizer(cache_size=8)
+        for _ in range(3):
+            canon.key("https://example.com/a?b=1")
+        info = canon.cache_info()
+        self.assertEqual((info.hits, info.misses), (2, 1))
+
+    def test_canonical_link_in_every_backend(self):
+        html = '<head><link rel="alternate" href="/amp"><link rel="Canonical" href="/p/1#x"></head><a href="/q">Q</a>'
+        for parser in available_backends():
+            with self.subTest(parser=parser):
+                document = PageDocument("https://example.com/p/1?ref=nav", html, parser)
+                self.assertEqual(document.canonical_url, "https://example.com/p/1")
+        self.assertIsNone(PageDocument("https://example.com/", "<p>x</p>").canonical_url)
+
+
+class TestAtlasUrlIdentity(unittest.TestCase):
+    def crawl(self, pages: dict, redirects: dict = None, **settings):
+        atlas = Atlas(
+            settings={"save_results": False, "crawl_entire_website": True, "respect_robots": False, **settings}
+        )
+        fetched = []
+
+        async def fake_fetch(url: str):
+            fetched.append(url)
+            final = (redirects or {}).get(url, url)
+            return FetchResult(pages.get(final, ""), "text/html", url=final)
+
+        skipped = []
+        self.on_page = []
+        on_page = self.on_page
+
+        class SkipHook:
+            def on_page(self, url, html, context):
+                on_page.append(url)
+
+            def on_page_skipped(self, url, reason, context):
+                skipped.append((url, reason))
+
+        atlas.fetch_async = fake_fetch
+        asyncio.run(atlas.crawl_async("https://example.com", hooks=[SkipHook()]))
+        return atlas, fetched, skipped
+
+    def test_tracking_and_query_order_variants_are_fetched_once(self):
+        pages = {
+            "https://example.com/": (
+                '<a href="/p?b=2&a=1">P</a><a href="/p?a=1&b=2&utm_campaign=x">P again</a>'
+                '<a href="https://www.example.com/p?a=1&b=2#top">P once more</a>'
+            ),
+            "https://example.com/p?a=1&b=2": '<a href="/">Home</a>',
+        }
+        atlas, fetched, _ = self.crawl(pages)
+        self.assertEqual(sorted(fetched), ["https://example.com/", "https://example.com/p?a=1&b=2"])
+        self.assertEqual(
+            [link["target"] for link in atlas.graph["https://example.com/"]], ["https://example.com/p?a=1&b=2"]
+        )
+
+    def test_redirect_and_rel_canonical_aliases_are_not_refetched(self):
+        pages = {
+            "https://example.com/": (
+                '<a href="/old">Old</a><a href="/print">Print</a><a href="/new">New</a><a href="/item">Item</a>'
+            ),
+            "https://example.com/new": "<p>new</p>",
+            "https://example.com/print": '<link rel="canonical" href="/item"><p>print</p>',
+            "https://example.com/item": "<p>item</p>",
+        }
+        atlas, fetched, skipped = self.crawl(
+            pages, redirects={"https://example.com/old": "https://example.com/new"}, respect_canonical=True
+        )
+        # /old is crawled as /new; /print claims /item, so neither alias target is fetched again.
+        self.assertNotIn("https://example.com/new", fetched)
+        self.assertNotIn("https://example.com/item", fetched)
+        self.assertEqual(
+            set(atlas.graph), {"https://example.com/", "https://example.com/old", "https://example.com/print"}
+        )
+        self.assertIn("https://example.com/item", atlas.visited)
+        self.assertEqual(skipped, [])
+
+    def test_site_wide_canonical_still_follows_links(self):
+        # A common CMS misconfiguration: every page declares the home page as its canonical URL.
+        pages = {"https://example.com/": '<link rel="canonical" href="/"><a href="/1">next</a>'}
+        for i in range(1, 6):
+            pages[f"https://example.com/{i}"] = f'<link rel="canonical" href="/"><p>{i}</p><a href="/{i + 1}">next</a>'
+        pages["https://example.com/5"] = '<link rel="canonical" href="/"><p>last</p>'
+
+        atlas, _, _ = self.crawl(pages)
+        self.assertEqual(set(atlas.graph), set(pages))
+        self.assertEqual(len(self.on_page), 6)
+
+        atlas, _, skipped = self.crawl(pages, respect_canonical=True)
+        self.assertEqual(set(atlas.graph), set(pages))  # links of the duplicates are followed
+        self.assertEqual(self.on_page, ["https://example.com/"])
+        self.assertEqual(sorted(skipped), [(f"https://example.com/{i}", "duplicate_url") for i in range(1, 6)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import asyncio
+import os
+import random
+import tempfile
+import unittest
+
+from webcreeper.agents.atlas.atlas import Atlas
+from webcreeper.creeper_core.frontier import Frontier
+
+
+def drain(frontier: Frontier) -> list:
+    out = []
+    while frontier:
+        out.append(frontier.pop())
+    return out
+
+
+class TestFrontier(unittest.TestCase):
+    def test_spilling_preserves_depth_then_fifo_order(self):
+        rng = random.Random(7)
+        items = [(f"https://example.com/{i}", rng.randint(0, 4)) for i in range(3000)]
+        expected = sorted(items, key=lambda item: item[1])  # stable: FIFO within a depth
+
+        frontier = Frontier(memory_limit=50, batch_size=64)
+        for url, depth in items:
+            frontier.push(url, depth)
+        self.assertEqual(len(frontier), len(items))
+        self.assertGreater(frontier.spilled_total, 0)
+        self.assertEqual(drain(frontier), expected)
+        with self.assertRaises(IndexError):
+            frontier.pop()
+        frontier.close()
+
+    def test_interleaved_push_and_pop(self):
+        frontier = Frontier(memory_limit=3, batch_size=2)
+        reference = Frontier()
+        popped, expected = [], []
+        for i in range(200):
+            for f in (frontier, reference):
+                f.push(f"u{i}", i % 3)
+                f.push(f"v{i}", i % 3 + 1)
+            if i % 3 == 0:
+                popped.append(frontier.pop())
+                expected.append(reference.pop())
+        popped += drain(frontier)
+        expected += drain(reference)
+        self.assertEqual(popped, expected)
+        frontier.close()
+
+    def test_spill_file_lifecycle(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "spill", "frontier.sqlite")
+            frontier = Frontier(memory_limit=1, spill_path=path)
+            frontier.push("a", 0)
+            frontier.push("b", 0)
+            self.assertEqual(drain(frontier), [("a", 0), ("b", 0)])
+            frontier.close()
+            self.assertTrue(os.path.exists(path))  # caller-provided paths are kept
+
+        frontier = Frontier(memory_limit=0, batch_size=1)
+        frontier.push("a", 0)
+        temp_path = frontier.spill_path
+        self.assertTrue(os.path.exists(temp_path))
+        frontier.close()
+        self.assertFalse(os.path.exists(temp_path))
+
+    def test_atlas_crawl_with_spilling_frontier(self):
+        links = "".join(f'<a href="/p{i}">P{i}</a>' for i in range(30))
+        pages = {"https://example.com/": links}
+        pages.update({f"https://example.com/p{i}": f'<a href="/p{i}/child">C{i}</a>' for i in range(30)})
+
+        def run(settings):
+            atlas = Atlas(settings={"save_results": False, "max_depth": 2, "deduplicate_content": False, **settings})
+
+            async def fake_fetch(url: str):
+                return (pages.get(url, f"<p>{url}</p>"), "text/html")
+
+            atlas.fetch_async = fake_fetch
+            atlas.should_visit = lambda url: True
+            atlas.is_allowed_path = lambda url: True
+            asyncio.run(atlas.crawl_async("https://example.com"))
+            return atlas.graph
+
+        in_memory = run({})
+        spilled = run({"frontier_memory_limit": 5})
+        self.assertEqual(len(in_memory), 61)
+        self.assertEqual(spilled, in_memory)
+
+
+if __name__ == "__main__":
+    unittest.main()
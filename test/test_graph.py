@@ -0,0 +1,103 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from webcreeper.agents.atlas.atlas import Atlas
+from webcreeper.creeper_core.graph import CompactLinkGraph, make_graph
+
+
+def links(*targets, prefix=""):
+    return [
+        {"target": t, "anchor_text": f"{prefix}{t[-1]}", "source_chunk": f"chunk_{i}"} for i, t in enumerate(targets)
+    ]
+
+
+class TestCompactLinkGraph(unittest.TestCase):
+    def setUp(self):
+        self.rows = {
+            "https://example.com/": links("https://example.com/a", "https://example.com/b"),
+            "https://example.com/a": links("https://example.com/b", "https://example.com/"),
+            "https://example.com/b": [],
+        }
+
+    def test_mapping_matches_dict_graph(self):
+        graph = CompactLinkGraph(self.rows)
+        self.assertEqual(len(graph), 3)
+        self.assertEqual(graph.to_dict(), self.rows)
+        self.assertEqual(dict(graph.items()), self.rows)
+        self.assertIn("https://example.com/b", graph)
+        self.assertNotIn("https://example.com/c", graph)
+        self.assertEqual(graph.targets("https://example.com/a"), ["https://example.com/b", "https://example.com/"])
+        with self.assertRaises(KeyError):
+            graph["https://example.com/c"]
+
+    def test_rewrite_delete_and_custom_chunks(self):
+        graph = CompactLinkGraph(self.rows)
+        custom = [{"target": "https://example.com/c", "anchor_text": "C", "source_chunk": "p1_chunk_0"}]
+        graph["https://example.com/"] = custom
+        self.assertEqual(graph["https://example.com/"], custom)
+        del graph["https://example.com/a"]
+        self.assertEqual(list(graph), ["https://example.com/", "https://example.com/b"])
+        self.assertEqual(graph.num_edges, 1)
+
+    def test_csr_and_edge_list_export(self):
+        graph = CompactLinkGraph(self.rows)
+        indptr, indices, anchor_ids = graph.to_csr()
+        self.assertEqual(len(indptr), graph.num_nodes + 1)
+        root = graph.node_id("https://example.com/")
+        row = indices[indptr[root] : indptr[root + 1]]
+        self.assertEqual([graph.node_url(t) for t in row], ["https://example.com/a", "https://example.com/b"])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "edges.tsv")
+            graph.save_edge_list(path, urls=True)
+            with open(path, encoding="utf-8") as f:
+                edges = [tuple(line.rstrip("\n").split("\t")) for line in f]
+        expected = [(src, link["target"]) for src, row in self.rows.items() for link in row]
+        self.assertEqual(sorted(edges), sorted(expected))
+
+    def test_npz_round_trip(self):
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            self.skipTest("numpy not installed")
+        graph = CompactLinkGraph(self.rows)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "graph.npz")
+            graph.save_npz(path)
+            loaded = CompactLinkGraph.load_npz(path)
+        self.assertEqual(loaded.to_dict(), self.rows)
+        self.assertEqual(loaded.num_nodes, graph.num_nodes)
+
+    def test_make_graph(self):
+        self.assertIsInstance(make_graph("dict"), dict)
+        self.assertIsInstance(make_graph("compact"), CompactLinkGraph)
+        with self.assertRaises(ValueError):
+            make_graph("networkx")
+
+    def test_atlas_crawl_with_compact_graph(self):
+        pages = {
+            "https://example.com/": '<a href="/a">A</a><a href="/b">B</a>',
+            "https://example.com/a": '<a href="/b">B again</a>',
+            "https://example.com/b": "<p>leaf</p>",
+        }
+        graphs = {}
+        for store in ("dict", "compact"):
+            atlas = Atlas(settings={"save_results": False, "graph_store": store, "max_depth": 2})
+
+            async def fake_fetch(url: str):
+                return (pages.get(url, ""), "text/html")
+
+            atlas.fetch_async = fake_fetch
+            atlas.should_visit = lambda url: True
+            atlas.is_allowed_path = lambda url: True
+            asyncio.run(atlas.crawl_async("https://example.com"))
+            graphs[store] = dict(atlas.get_graph())
+
+        self.assertEqual(graphs["compact"], graphs["dict"])
+        self.assertEqual(len(graphs["compact"]), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
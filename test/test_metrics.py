@@ -0,0 +1,93 @@
+import os
+import tempfile
+import unittest
+
+import httpx
+
+from webcreeper.agents.atlas.atlas import Atlas
+from webcreeper.creeper_core.metrics import CrawlMetrics, Histogram
+
+
+class TestCrawlMetrics(unittest.TestCase):
+    def test_histogram_quantiles(self):
+        h = Histogram()
+        for ms in range(1, 101):
+            h.observe(ms / 1000)
+        summary = h.summary()
+        self.assertEqual(summary["count"], 100)
+        self.assertAlmostEqual(summary["avg"], 0.0505)
+        self.assertEqual(summary["max"], 0.1)
+        self.assertTrue(0.025 <= summary["p50"] <= 0.05)
+        self.assertTrue(0.05 <= summary["p99"] <= 0.1)
+
+    def test_prometheus_text(self):
+        metrics = CrawlMetrics()
+        metrics.record_response("example.com", 200, 1234, 0.02)
+        metrics.record_skip("non_html:application/pdf")
+        metrics.observe("parse", 0.003)
+        text = metrics.to_prometheus()
+        self.assertIn('webcreeper_responses_total{code="200"} 1', text)
+        self.assertIn('webcreeper_skipped_pages_total{reason="non_html"} 1', text)
+        self.assertIn('webcreeper_phase_seconds_bucket{phase="parse",le="0.005"} 1', text)
+        self.assertIn('webcreeper_phase_seconds_count{phase="parse"} 1', text)
+
+    def test_disabled_metrics_record_nothing(self):
+        metrics = CrawlMetrics(enabled=False)
+        metrics.incr("pages_crawled")
+        with metrics.timer("parse"):
+            pass
+        self.assertEqual(metrics.snapshot()["counters"], {})
+        self.assertEqual(metrics.phases["parse"].count, 0)
+
+
+class TestAtlasMetrics(unittest.IsolatedAsyncioTestCase):
+    async def test_crawl_records_counters_and_phases(self):
+        pages = {
+            "/": '<a href="/a">A</a><a href="/missing">M</a><a href="/doc.pdf">D</a>',
+            "/a": "<p>a</p>",
+        }
+
+        def handler(request: httpx.Request):
+            path = request.url.path
+            if path.endswith(".pdf"):
+                return httpx.Response(200, headers={"Content-Type": "application/pdf"}, content=b"%PDF")
+            if path not in pages:
+                return httpx.Response(404)
+            return httpx.Response(200, html=pages[path])
+
+        snapshots = []
+
+        class MetricsHook:
+            def on_metrics(self, metrics, context):
+                snapshots.append(metrics)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            prom_path = os.path.join(tmp, "metrics.prom")
+            atlas = Atlas(
+                settings={
+                    "save_results": False,
+                    "respect_robots": False,
+                    "max_retries": 0,
+                    "metrics_prometheus_path": prom_path,
+                }
+            )
+            atlas._async_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            await atlas.crawl_async("https://example.com", hooks=[MetricsHook()])
+            with open(prom_path, encoding="utf-8") as f:
+                prom = f.read()
+
+        metrics = atlas.get_metrics()
+        self.assertEqual(metrics["counters"]["pages_crawled"], 2)
+        self.assertEqual(metrics["counters"]["pages_fetched"], 2)
+        self.assertEqual(metrics["status_codes"], {200: 3, 404: 1})
+        self.assertEqual(metrics["skip_reasons"], {"non_html": 1})
+        self.assertEqual(metrics["error_reasons"], {"fetch_failed": 1})
+        self.assertEqual(metrics["hosts"]["example.com"]["requests"], 4)
+        for phase in ("queue_wait", "ttfb", "download", "parse", "link_extraction", "hooks"):
+            self.assertGreater(metrics["phases"][phase]["count"], 0, phase)
+        self.assertEqual(snapshots[-1]["counters"], metrics["counters"])
+        self.assertIn('webcreeper_events_total{event="pages_crawled"} 2', prom)
+
+
+if __name__ == "__main__":
+    unittest.main()
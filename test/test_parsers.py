@@ -0,0 +1,63 @@
+import glob
+import os
+import unittest
+
+from webcreeper.agents.atlas.atlas import Atlas
+from webcreeper.creeper_core.parsers import available_backends, get_backend
+
+FIXTURES = sorted(glob.glob(os.path.join(os.path.dirname(__file__), "fixtures", "html", "*.html")))
+
+EDGE_CASES = [
+    "",
+    "   ",
+    "<!-- only a comment -->",
+    "<p>plain text, no markup around links</p>",
+    '<a href="/x">one <!-- hidden --> <b>two</b>three</a><a href="">empty</a><a name="anchor">no href</a>',
+    "<p>caf&eacute; &amp; cr&egrave;me&nbsp;br&ucirc;l&eacute;e</p><script>var x = '<a href=\"/js\">js</a>';</script>",
+]
+
+
+class TestParserParity(unittest.TestCase):
+    def setUp(self):
+        self.reference = get_backend("html.parser")
+        self.backends = [name for name in available_backends() if name != "html.parser"]
+        if not self.backends:
+            self.skipTest("no optional parser backend installed (lxml / selectolax)")
+
+    def assert_same_output(self, html: str, label: str):
+        tree = self.reference.parse(html)
+        expected = (self.reference.text(tree), self.reference.anchors(tree))
+        for name in self.backends:
+            backend = get_backend(name)
+            tree = backend.parse(html)
+            with self.subTest(page=label, backend=name):
+                self.assertEqual(backend.text(tree), expected[0])
+                self.assertEqual(backend.anchors(tree), expected[1])
+
+    def test_fixture_corpus(self):
+        self.assertTrue(FIXTURES)
+        for path in FIXTURES:
+            with open(path, encoding="utf-8") as f:
+                self.assert_same_output(f.read(), os.path.basename(path))
+
+    def test_edge_cases(self):
+        for i, html in enumerate(EDGE_CASES):
+            self.assert_same_output(html, f"edge-{i}")
+
+    def test_atlas_links_identical_across_backends(self):
+        with open(FIXTURES[0], encoding="utf-8") as f:
+            html = f.read()
+        graphs = {}
+        for name in ["html.parser"] + self.backends:
+            atlas = Atlas(settings={"save_results": False, "html_parser": name})
+            graphs[name] = atlas.extract_links(html, "https://blog.example.com/posts/scaling-crawlers")
+        for name in self.backends:
+            self.assertEqual(graphs[name], graphs["html.parser"])
+
+    def test_unknown_backend_is_rejected(self):
+        with self.assertRaises(ValueError):
+            Atlas(settings={"save_results": False, "html_parser": "regex"})
+
+
+if __name__ == "__main__":
+    unittest.main()
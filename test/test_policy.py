@@ -0,0 +1,70 @@
+import re
+import unittest
+
+from webcreeper.agents.atlas.atlas import Atlas
+from webcreeper.creeper_core.policy import HostMatcher, PatternSet, UrlPolicy
+
+
+class TestUrlPolicy(unittest.TestCase):
+    def test_host_matcher(self):
+        exact = HostMatcher(["www.Example.com", "docs.example.org:443"])
+        self.assertTrue(exact.matches("example.com"))
+        self.assertTrue(exact.matches("docs.example.org"))
+        self.assertFalse(exact.matches("api.example.com"))
+
+        sub = HostMatcher(["example.com"], subdomains=True)
+        self.assertTrue(sub.matches("a.b.example.com"))
+        self.assertFalse(sub.matches("notexample.com"))
+        self.assertFalse(HostMatcher([]))
+
+    def test_pattern_set_matches_like_separate_searches(self):
+        patterns = [r"/blog/\d+", r"\.pdf$", r"(a)\1", re.compile("LOGIN", re.I), "(?i)cart"]
+        combined = PatternSet(patterns)
+        compiled = [p if isinstance(p, re.Pattern) else re.compile(p) for p in patterns]
+        urls = ["/blog/12", "/x.pdf", "/aa", "/Login", "/CART", "/about", "/blog/x", "/a"]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(combined.search(url), any(p.search(url) for p in compiled))
+        self.assertEqual(combined.first_match("/x.pdf").pattern, r"\.pdf$")
+        self.assertFalse(PatternSet([]))
+
+    def test_pattern_set_keeps_conditional_groups_apart(self):
+        patterns = ["(x)", r"^(<)?a(?(1)>)$", r"^(?P<q>')?b(?(q)')$"]
+        combined = PatternSet(patterns)
+        for text in ["<a>", "<a", "a", "'b'", "'b", "b", "x"]:
+            with self.subTest(text=text):
+                self.assertEqual(combined.search(text), any(re.search(p, text) for p in patterns))
+
+    def test_domains_paths_and_patterns(self):
+        policy = UrlPolicy(
+            allowed_domains=["example.com"],
+            blocked_domains=["private.example.com"],
+            allow_subdomains=True,
+            block_patterns=[r"\?print=1"],
+            allowed_paths=["/docs", "/blog"],
+            blocked_paths=["/docs/internal"],
+        )
+        self.assertTrue(policy.host_allowed("www.example.com"))
+        self.assertTrue(policy.host_allowed("api.example.com:8080"))
+        self.assertFalse(policy.host_allowed("private.example.com"))
+        self.assertFalse(policy.host_allowed("other.org"))
+        self.assertFalse(policy.host_allowed("other.org"))  # cached decision
+        self.assertTrue(policy.path_allowed("/docs/intro"))
+        self.assertFalse(policy.path_allowed("/docs/internal/keys"))
+        self.assertFalse(policy.path_allowed("/shop"))
+        self.assertFalse(policy.patterns_allow("https://example.com/docs?print=1"))
+        self.assertTrue(policy.patterns_allow("https://example.com/docs"))
+
+    def test_atlas_policy_follows_base_url(self):
+        atlas = Atlas(settings={"save_results": False, "respect_robots": False, "allowed_paths": ["/docs"]})
+        self.assertTrue(atlas.should_visit("https://anything.org/docs"))  # no crawl yet: own host allowed
+        atlas.settings["base_url"] = "https://example.com"
+        atlas.reset_url_policy()
+        self.assertTrue(atlas.should_visit("https://www.example.com/docs#top"))
+        self.assertFalse(atlas.should_visit("https://anything.org/docs"))
+        self.assertTrue(atlas.is_allowed_path("https://example.com/docs/a"))
+        self.assertFalse(atlas.is_allowed_path("https://example.com/blog"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from webcreeper.agents.atlas.atlas import Atlas
+from webcreeper.creeper_core.robots import RobotsCache
+
+ROBOTS = """
+User-agent: *
+Disallow: /private
+Crawl-delay: 2
+"""
+
+
+class TestRobotsAsync(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_lookups_share_one_fetch_and_apply_crawl_delay(self):
+        atlas = Atlas(settings={"save_results": False, "base_url": "https://example.com"})
+        calls = []
+
+        async def fake_download(url):
+            calls.append(url)
+            await asyncio.sleep(0.01)
+            return 200, ROBOTS
+
+        atlas._download_robots_txt_async = fake_download
+
+        urls = [f"https://example.com/page/{i}" for i in range(10)] + ["https://example.com/private/x"]
+        decisions = await asyncio.gather(*(atlas.should_visit_async(u) for u in urls))
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(decisions, [True] * 10 + [False])
+        self.assertEqual(atlas.host_scheduler.get_delay("example.com"), 2.0)
+
+    def test_sync_lookup_fetches_inline(self):
+        atlas = Atlas(settings={"save_results": False, "base_url": "https://example.com"})
+        atlas._download_robots_txt = lambda url: (200, ROBOTS)
+        self.assertFalse(atlas.is_allowed_by_robots("https://example.com/private/x"))
+        self.assertTrue(atlas.is_allowed_by_robots("https://example.com/public"))
+
+
+class TestRobotsCache(unittest.TestCase):
+    def test_persistence_and_ttl(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "robots.json")
+            cache = RobotsCache(ttl=3600, path=path)
+            cache.set("example.com", 200, ROBOTS)
+            cache.set("down.example", 0, None)
+            cache.save()
+
+            reloaded = RobotsCache(ttl=3600, path=path)
+            self.assertIn("example.com", reloaded)
+            self.assertNotIn("down.example", reloaded)
+            self.assertFalse(reloaded.get("example.com").can_fetch("bot", "https://example.com/private"))
+
+            reloaded._entries["example.com"]["fetched_at"] -= 7200
+            self.assertNotIn("example.com", reloaded)
+
+
+if __name__ == "__main__":
+    unittest.main()
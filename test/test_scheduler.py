@@ -0,0 +1,67 @@
+import asyncio
+import unittest
+
+from webcreeper.creeper_core.scheduler import HostScheduler, TokenBucket
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_concurrent_reservations_get_distinct_slots(self):
+        bucket = TokenBucket(rate=10.0, burst=1)
+        waits = [bucket.reserve() for _ in range(4)]
+        self.assertEqual(waits[0], 0.0)
+        for prev, cur in zip(waits, waits[1:]):
+            self.assertAlmostEqual(cur - prev, 0.1, delta=0.01)
+
+    def test_zero_rate_disables_pacing(self):
+        bucket = TokenBucket(rate=0)
+        self.assertEqual([bucket.reserve() for _ in range(3)], [0.0, 0.0, 0.0])
+
+
+class TestHostScheduler(unittest.IsolatedAsyncioTestCase):
+    async def test_round_robin_across_hosts(self):
+        scheduler = HostScheduler()
+        scheduler.clear()
+        for i in range(3):
+            await scheduler.put("big.example", f"big-{i}")
+        await scheduler.put("small.example", "small-0")
+
+        order = []
+        for _ in range(4):
+            host, item = await scheduler.get()
+            order.append(item)
+            scheduler.release(host)
+        self.assertEqual(order, ["big-0", "small-0", "big-1", "big-2"])
+
+    async def test_per_host_cap_and_stats(self):
+        scheduler = HostScheduler(max_per_host=1)
+        scheduler.clear()
+        await scheduler.put("a.example", 1)
+        await scheduler.put("a.example", 2)
+        await scheduler.put("b.example", 3)
+
+        host_1, _ = await scheduler.get()
+        host_2, _ = await scheduler.get()
+        self.assertEqual({host_1, host_2}, {"a.example", "b.example"})
+
+        stats = scheduler.stats()
+        self.assertEqual(stats["a.example"]["queued"], 1)
+        self.assertEqual(stats["a.example"]["active"], 1)
+
+        blocked = asyncio.create_task(scheduler.get())
+        await asyncio.sleep(0.01)
+        self.assertFalse(blocked.done())
+        scheduler.release("a.example")
+        host, item = await asyncio.wait_for(blocked, 1)
+        self.assertEqual((host, item), ("a.example", 2))
+
+    async def test_dispatch_token_pays_for_first_pace(self):
+        scheduler = HostScheduler(delay=0.2)
+        scheduler.clear()
+        await scheduler.put("a.example", 1)
+        host, _ = await scheduler.get()
+        self.assertEqual(await scheduler.pace(host), 0.0)
+        self.assertGreater(scheduler._hosts[host].bucket.delay(), 0.1)
+
+
+if __name__ == "__main__":
+    unittest.main()
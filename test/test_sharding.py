@@ -0,0 +1,124 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+import httpx
+
+from benchmarks.synthetic_site import SyntheticSite
+from webcreeper.agents.atlas.atlas import Atlas
+from webcreeper.agents.atlas.sharded import crawl_sharded, shard_path
+from webcreeper.creeper_core.sharding import ShardExchange, SqliteShardQueue, shard_of
+
+HOSTS = ["a.example", "b.example", "c.example", "d.example", "e.example"]
+
+
+def page(host: str, path: str) -> str:
+    # Every page links to the next page on its host and to the same path on the next host.
+    n = int(path.strip("/") or 0)
+    next_host = HOSTS[(HOSTS.index(host) + 1) % len(HOSTS)]
+    links = [f"https://{next_host}/{n}"]
+    if n < 3:
+        links.append(f"https://{host}/{n + 1}")
+    return "".join(f'<a href="{href}">{href}</a>' for href in links)
+
+
+class TestShardQueue(unittest.TestCase):
+    def test_shard_of_is_stable_and_in_range(self):
+        self.assertEqual({shard_of(h, 1) for h in HOSTS}, {0})
+        owners = [shard_of(h, 3) for h in HOSTS]
+        self.assertTrue(all(0 <= s < 3 for s in owners))
+        self.assertEqual(owners, [shard_of(h, 3) for h in HOSTS])
+
+    def test_termination_needs_all_shards_idle_and_no_messages(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            queue = SqliteShardQueue(os.path.join(tmp, "q.sqlite"))
+            queue.reset()
+            a, b = ShardExchange(queue, 0, 2, poll_interval=0), ShardExchange(queue, 1, 2, poll_interval=0)
+            a.start()
+            b.start()
+            host_b = next(h for h in HOSTS if shard_of(h, 2) == 1)
+            self.assertTrue(a.route(host_b, f"https://{host_b}/", 1))
+            self.assertFalse(b.route(host_b, f"https://{host_b}/", 1))
+            self.assertFalse(a.finished())  # message sent on flush, b still busy
+            self.assertFalse(b.finished())  # a message for b is waiting
+            self.assertEqual(b.poll(), [(f"https://{host_b}/", 1)])
+            self.assertFalse(a.finished())
+            self.assertTrue(b.finished())
+            queue.close()
+
+
+class TestShardedCrawl(unittest.TestCase):
+    def test_shards_split_hosts_and_match_a_single_crawl(self):
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/robots.txt":
+                return httpx.Response(404)
+            return httpx.Response(200, html=page(request.url.host, request.url.path))
+
+        def make_atlas(**settings):
+            atlas = Atlas(
+                settings={
+                    "save_results": False,
+                    "respect_robots": False,
+                    "crawl_entire_website": True,
+                    "allowed_domains": HOSTS,
+                    "shard_poll_interval": 0.01,
+                    **settings,
+                }
+            )
+            atlas._async_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            return atlas
+
+        async def run(atlases):
+            await asyncio.gather(*(atlas.crawl_async("https://a.example/") for atlas in atlases))
+
+        single = make_atlas()
+        asyncio.run(run([single]))
+        self.assertEqual(len(single.graph), len(HOSTS) * 4)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            queue = SqliteShardQueue(os.path.join(tmp, "q.sqlite"))
+            queue.reset()
+            shards = [make_atlas(shard_count=3, shard_index=i, shard_queue=queue) for i in range(3)]
+            asyncio.run(run(shards))
+
+        merged = {}
+        for i, atlas in enumerate(shards):
+            for url in atlas.graph:
+                self.assertEqual(shard_of(atlas._host_key(url), 3), i)  # each host crawled by its owner only
+            merged.update(atlas.graph)
+        self.assertEqual(merged, dict(single.graph))
+
+    def test_crawl_sharded_processes_merge_outputs(self):
+        site = SyntheticSite(pages=20, fanout=3, page_size=512)
+        with tempfile.TemporaryDirectory() as tmp, site.serve() as base_url:
+            settings = {
+                "storage_path": tmp,
+                "respect_robots": False,
+                "crawl_entire_website": True,
+                "shard_poll_interval": 0.05,
+            }
+            graph = crawl_sharded(f"{base_url}/page/0", settings, shards=2)
+            self.assertTrue(os.path.exists(os.path.join(tmp, "graph.json")))
+            self.assertTrue(os.path.exists(shard_path(os.path.join(tmp, "graph.json"), 1)))
+        self.assertEqual(len(graph), 20)
+        self.assertEqual(site.requests, 20)
+
+    def test_failed_shard_stops_the_crawl(self):
+        site = SyntheticSite(pages=20, fanout=3, page_size=512)
+        with tempfile.TemporaryDirectory() as tmp, site.serve() as base_url:
+            checkpoint = os.path.join(tmp, "checkpoint.sqlite")
+            os.mkdir(shard_path(checkpoint, 1))  # shard 1 cannot open its checkpoint
+            settings = {
+                "storage_path": tmp,
+                "respect_robots": False,
+                "crawl_entire_website": True,
+                "shard_poll_interval": 0.05,
+                "checkpoint_path": checkpoint,
+            }
+            with self.assertRaisesRegex(RuntimeError, "shard 1"):
+                crawl_sharded(f"{base_url}/page/0", settings, shards=2)
+
+
+if __name__ == "__main__":
+    unittest.main()
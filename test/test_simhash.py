@@ -0,0 +1,82 @@
+import asyncio
+import random
+import unittest
+
+from webcreeper.agents.atlas.atlas import Atlas
+from webcreeper.creeper_core.simhash import SimHashIndex, hamming, simhash64
+
+RNG = random.Random(1)
+VOCAB = [f"word{i}" for i in range(2000)]
+
+
+def article(words: int = 400) -> str:
+    return " ".join(RNG.choice(VOCAB) for _ in range(words))
+
+
+class TestSimHash(unittest.TestCase):
+    def test_small_edits_stay_close_and_unrelated_text_does_not(self):
+        body = article()
+        a = simhash64(body + " Last updated 2024-01-01 10:00, 123 views")
+        b = simhash64(body + " Last updated 2024-03-05 11:42, 9876 views")
+        self.assertEqual(simhash64(body), simhash64(body))
+        self.assertLessEqual(hamming(a, b), 6)
+        self.assertGreater(hamming(a, simhash64(article())), 16)
+        self.assertIsNone(simhash64(""))
+        self.assertIsNone(simhash64(" -- "))
+
+    def test_index_finds_every_fingerprint_within_distance(self):
+        rng = random.Random(3)
+        index = SimHashIndex(max_distance=3)
+        stored = [rng.getrandbits(64) for _ in range(2000)]
+        for fp in stored:
+            index.add(fp)
+        self.assertEqual(len(index), 2000)
+        for fp in stored[:200]:
+            near = fp
+            for bit in rng.sample(range(64), 3):
+                near ^= 1 << bit
+            self.assertEqual(index.find(near), fp)
+            far = fp
+            for bit in rng.sample(range(64), 20):
+                far ^= 1 << bit
+            self.assertIsNone(index.find(far))
+
+    def test_add_if_new(self):
+        index = SimHashIndex(max_distance=2)
+        self.assertIsNone(index.add_if_new(0b1010))
+        self.assertEqual(index.add_if_new(0b1001), 0b1010)
+        self.assertEqual(len(index), 1)
+        with self.assertRaises(ValueError):
+            SimHashIndex(max_distance=64)
+
+    def test_atlas_skips_near_duplicate_pages(self):
+        body = article()
+        pages = {
+            "https://example.com/": '<a href="/a">A</a><a href="/b">B</a><a href="/c">C</a>',
+            "https://example.com/a": f"<p>{body}</p><footer>Rendered at 10:00:01, visitor 17</footer>",
+            "https://example.com/b": f"<p>{body}</p><footer>Rendered at 10:04:59, visitor 1234</footer>",
+            "https://example.com/c": f"<p>{article()}</p>",
+        }
+
+        def crawl(settings):
+            atlas = Atlas(settings={"save_results": False, "max_depth": 1, **settings})
+
+            async def fake_fetch(url: str):
+                return (pages[url], "text/html")
+
+            atlas.fetch_async = fake_fetch
+            atlas.should_visit = lambda url: True
+            atlas.is_allowed_path = lambda url: True
+            asyncio.run(atlas.crawl_async("https://example.com"))
+            return atlas
+
+        exact = crawl({})
+        self.assertEqual(len(exact.graph), 4)
+        near = crawl({"near_duplicate_distance": 6, "max_concurrency": 1})
+        self.assertEqual(len(near.graph), 3)
+        self.assertIn("https://example.com/c", near.graph)
+        self.assertEqual(len({"https://example.com/a", "https://example.com/b"} & near.graph.keys()), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
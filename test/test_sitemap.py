@@ -0,0 +1,154 @@
+import asyncio
+import gzip
+import os
+import tempfile
+import unittest
+
+import httpx
+
+from webcreeper.agents.atlas.atlas import Atlas
+from webcreeper.creeper_core.sitemap import SitemapEntry, SitemapError, SitemapParser, parse_lastmod, parse_sitemap
+
+URLSET = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc>https://example.com/deep/old</loc><lastmod>2020-01-01</lastmod></url>
+  <url><loc> https://example.com/deep/new </loc><lastmod>2024-05-01T10:00:00Z</lastmod><priority>0.8</priority></url>
+  <url><loc>https://example.com/deep/undated</loc></url>
+  <url><loc>https://other.example.org/page</loc></url>
+</urlset>"""
+
+INDEX = b"""<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>https://example.com/sitemap-pages.xml.gz</loc><lastmod>2024-05-01</lastmod></sitemap>
+</sitemapindex>"""
+
+IMAGE_URLSET = b"""<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"
+        xmlns:image="http://www.google.com/schemas/sitemap-image/1.1">
+  <url>
+    <loc>https://example.com/p1</loc>
+    <image:image><image:loc>https://cdn.example.com/p1.jpg</image:loc></image:image>
+    <lastmod>2024-05-01</lastmod>
+  </url>
+  <url><image:image><image:loc>https://cdn.example.com/orphan.jpg</image:loc></image:image></url>
+</urlset>"""
+
+
+class TestSitemapParser(unittest.TestCase):
+    def test_urlset_and_index(self):
+        kind, entries = parse_sitemap(URLSET)
+        self.assertEqual(kind, "urlset")
+        self.assertEqual([e.loc for e in entries][:2], ["https://example.com/deep/old", "https://example.com/deep/new"])
+        self.assertEqual(entries[1].lastmod, parse_lastmod("2024-05-01T12:00:00+02:00"))
+        self.assertIsNone(entries[2].lastmod)
+        self.assertFalse(any(e.sitemap for e in entries))
+
+        kind, entries = parse_sitemap(INDEX)
+        self.assertEqual(kind, "sitemapindex")
+        self.assertEqual(entries[0].loc, "https://example.com/sitemap-pages.xml.gz")
+        self.assertTrue(entries[0].sitemap)
+
+    def test_extension_locs_are_ignored(self):
+        kind, entries = parse_sitemap(IMAGE_URLSET)
+        self.assertEqual(kind, "urlset")
+        self.assertEqual(entries, [SitemapEntry("https://example.com/p1", parse_lastmod("2024-05-01"))])
+
+    def test_gzip_fed_in_small_chunks(self):
+        data = gzip.compress(URLSET)
+        parser = SitemapParser()
+        entries = []
+        for i in range(0, len(data), 5):
+            entries += parser.feed(data[i : i + 5])
+        entries += parser.close()
+        self.assertEqual(entries, parse_sitemap(URLSET)[1])
+        self.assertEqual(parser.bytes_parsed, len(URLSET))
+
+    def test_leading_whitespace_chunk_and_stray_fields(self):
+        parser = SitemapParser()
+        entries = parser.feed(b"\xef\xbb\xbf\r\n  ")
+        self.assertIsNone(parser.kind)
+        entries += parser.feed(URLSET)
+        entries += parser.close()
+        self.assertEqual(parser.kind, "urlset")
+        self.assertEqual(entries, parse_sitemap(URLSET)[1])
+
+        stray = b"""<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+          <foo><loc>https://example.com/stray</loc></foo>
+          <url><lastmod>2024-05-01</lastmod></url>
+        </urlset>"""
+        self.assertEqual(parse_sitemap(stray), ("urlset", []))
+
+    def test_text_sitemap_and_errors(self):
+        kind, entries = parse_sitemap(b"https://example.com/a\r\n\nnot a url\nhttps://example.com/b")
+        self.assertEqual((kind, [e.loc for e in entries]), ("text", ["https://example.com/a", "https://example.com/b"]))
+        with self.assertRaises(SitemapError):
+            parse_sitemap(b"<urlset><url><loc>https://example.com/</loc>")
+        with self.assertRaises(SitemapError):
+            parse_sitemap(gzip.compress(b"<urlset>" + b" " * 10_000 + b"</urlset>"), max_bytes=1000)
+        self.assertIsNone(parse_lastmod("yesterday"))
+
+
+class TestAtlasSitemapSeeding(unittest.TestCase):
+    def crawl(self, settings: dict, robots: str = "") -> tuple[Atlas, list]:
+        fetched = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            path = request.url.path
+            if path == "/robots.txt":
+                return httpx.Response(200 if robots else 404, text=robots)
+            if path == "/sitemap-index.xml":
+                return httpx.Response(200, content=INDEX, headers={"Content-Type": "application/xml"})
+            if path == "/sitemap-pages.xml.gz":
+                return httpx.Response(200, content=gzip.compress(URLSET), headers={"Content-Type": "application/gzip"})
+            fetched.append(path)
+            if path == "/":
+                return httpx.Response(200, html="<p>no links</p>")
+            if path.startswith("/deep/"):
+                return httpx.Response(200, html=f"<p>{path}</p>")
+            return httpx.Response(404)
+
+        atlas = Atlas(
+            settings={
+                "save_results": False,
+                "respect_robots": False,
+                "max_retries": 0,
+                "max_depth": 0,
+                "max_concurrency": 1,
+                "use_sitemaps": True,
+                **settings,
+            }
+        )
+
+        async def run():
+            atlas._async_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            await atlas.crawl_async("https://example.com/")
+
+        asyncio.run(run())
+        return atlas, fetched
+
+    def test_sitemap_urls_from_robots_are_crawled_newest_first(self):
+        atlas, fetched = self.crawl(
+            {}, robots="User-agent: *\nDisallow:\nSitemap: https://example.com/sitemap-index.xml\n"
+        )
+        self.assertEqual(fetched, ["/", "/deep/new", "/deep/old", "/deep/undated"])
+        self.assertNotIn("https://other.example.org/page", atlas.graph)
+        self.assertEqual(atlas.get_metrics()["counters"]["sitemap_urls"], 3)
+
+    def test_configured_sitemap_and_limit(self):
+        _, fetched = self.crawl({"sitemap_urls": ["https://example.com/sitemap-pages.xml.gz"], "sitemap_max_urls": 1})
+        self.assertEqual(fetched, ["/", "/deep/new"])
+
+    def test_pages_unchanged_since_last_download_are_not_refetched(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            settings = {
+                "sitemap_urls": ["https://example.com/sitemap-index.xml"],
+                "http_cache_path": os.path.join(tmp, "http.sqlite"),
+            }
+            self.crawl(settings)
+            atlas, fetched = self.crawl(settings)
+        # Both dated pages were downloaded after their lastmod; the undated one must be checked.
+        self.assertEqual(fetched, ["/", "/deep/undated"])
+        self.assertIn("https://example.com/deep/old", atlas.graph)
+        self.assertEqual(atlas.get_metrics()["skip_reasons"]["not_modified"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import gzip
+import io
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from webcreeper.creeper_core.storage import JsonlWriter, output_path
+
+
+def read_lines(path: str) -> list[dict]:
+    if path.endswith(".gz"):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+    if path.endswith(".zst"):
+        import zstandard
+
+        with open(path, "rb") as f:
+            reader = zstandard.ZstdDecompressor().stream_reader(f, read_across_frames=True)
+            return [json.loads(line) for line in io.TextIOWrapper(reader, encoding="utf-8")]
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+class TestJsonlWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "out", "results.jsonl")
+
+    def test_buffers_and_flushes_in_background(self):
+        writer = JsonlWriter(self.path, flush_size=1000, flush_interval=0.05)
+        writer.write({"url": "https://example.com", "title": "é"})
+        self.assertEqual(writer.records_written, 0)
+        deadline = time.monotonic() + 2
+        while writer.records_written == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(read_lines(self.path), [{"url": "https://example.com", "title": "é"}])
+        writer.close()
+
+    def test_rotation_and_append_truncate(self):
+        records = [{"url": f"https://example.com/{i}", "body": "x" * 100} for i in range(50)]
+        with JsonlWriter(self.path, flush_size=10, rotate_bytes=1500) as writer:
+            for record in records:
+                writer.write(record)
+        parts = writer.parts()
+        self.assertGreater(len(parts), 1)
+        self.assertEqual(os.path.basename(parts[1]), "results.1.jsonl")
+        self.assertEqual([r for p in parts for r in read_lines(p)], records)
+
+        with JsonlWriter(self.path, rotate_bytes=1500) as writer:  # continue in the last part
+            writer.write({"url": "next"})
+        self.assertEqual(writer.parts(), parts)
+        self.assertEqual(read_lines(parts[-1])[-1], {"url": "next"})
+
+        with JsonlWriter(self.path, truncate=True) as writer:
+            writer.write({"url": "fresh"})
+        self.assertEqual(writer.parts(), [self.path])
+        self.assertEqual(read_lines(self.path), [{"url": "fresh"}])
+
+    def test_compression(self):
+        for compression in ("gzip", "zstd"):
+            with self.subTest(compression=compression):
+                if compression == "zstd":
+                    try:
+                        import zstandard  # noqa: F401
+                    except ImportError:
+                        self.skipTest("optional zstandard package not installed")
+                records = [{"url": f"https://example.com/{i}"} for i in range(100)]
+                with JsonlWriter(self.path, compression=compression, flush_size=7, truncate=True) as writer:
+                    for record in records:
+                        writer.write(record)
+                self.assertEqual(writer.path, output_path(self.path, compression))
+                self.assertEqual(read_lines(writer.path), records)
+
+        with self.assertRaises(ValueError):
+            output_path(self.path, "bz2")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,28 @@
+import unittest
+
+from benchmarks.bench_crawl import crawl
+from benchmarks.synthetic_site import SyntheticSite
+
+
+class TestSyntheticSite(unittest.TestCase):
+    def test_content_is_deterministic(self):
+        a = SyntheticSite(pages=50, fanout=4, duplicate_rate=0.2, alias_rate=0.5, seed=7)
+        b = SyntheticSite(pages=50, fanout=4, duplicate_rate=0.2, alias_rate=0.5, seed=7)
+        for i in range(50):
+            self.assertEqual(a.html(i), b.html(i))
+        self.assertTrue(any(a.original_of(i) != i for i in range(50)))
+        self.assertEqual(a.respond("/page/50")[0], 404)
+        self.assertEqual(SyntheticSite(throttle_rate=1.0).respond("/page/0")[:2], (429, {"Retry-After": "0"}))
+
+    def test_crawl_reaches_every_page(self):
+        site = SyntheticSite(pages=30, fanout=3, page_size=1024, alias_rate=0.5)
+        with site.serve() as base_url:
+            result = crawl(base_url, {"max_concurrency": 4})
+        self.assertEqual(result["pages"], 30)
+        self.assertEqual(site.requests, 30)  # aliased links are fetched once
+        self.assertGreater(result["pages_per_second"], 0)
+        self.assertGreaterEqual(result["p99_ms"], result["p50_ms"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import asyncio
+import unittest
+
+from webcreeper.agents.atlas.atlas import Atlas
+from webcreeper.creeper_core.urlset import DepthSets, FingerprintSet, ScalableBloomFilter, make_url_set
+
+
+def make_urls(n: int, offset: int = 0):
+    return [f"https://example.com/page/{i}?q={i % 13}" for i in range(offset, offset + n)]
+
+
+class TestUrlSets(unittest.TestCase):
+    def test_fingerprint_set_is_exact_across_resizes(self):
+        urls = make_urls(5000)
+        s = FingerprintSet(capacity=8)
+        s.update(urls)
+        s.update(urls[:100])  # re-adding is a no-op
+        self.assertEqual(len(s), 5000)
+        self.assertTrue(all(u in s for u in urls))
+        self.assertFalse(any(u in s for u in make_urls(5000, offset=5000)))
+        self.assertNotIn(None, s)
+
+    def test_scalable_bloom_has_no_false_negatives_and_bounded_false_positives(self):
+        urls = make_urls(20000)
+        s = ScalableBloomFilter(initial_capacity=1000, error_rate=0.01)
+        s.update(urls)
+        # Adds that hit a false positive are not counted, so len() can undershoot slightly.
+        self.assertGreaterEqual(len(s), len(urls) * 0.99)
+        self.assertGreater(len(s._filters), 1)  # grew past the initial capacity
+        self.assertTrue(all(u in s for u in urls))
+        false_hits = sum(u in s for u in make_urls(20000, offset=20000))
+        self.assertLess(false_hits / 20000, 0.01)
+
+    def test_make_url_set(self):
+        self.assertIsInstance(make_url_set("set"), set)
+        self.assertIsInstance(make_url_set("fingerprint"), FingerprintSet)
+        self.assertIsInstance(make_url_set("bloom"), ScalableBloomFilter)
+        with self.assertRaises(ValueError):
+            make_url_set("trie")
+
+    def test_depth_sets_keep_the_shallowest_depth(self):
+        depths = DepthSets(lambda: make_url_set("fingerprint", initial_capacity=16))
+        depths.add("https://example.com/a", 3)
+        depths.add("https://example.com/a", 1)
+        depths.add("https://example.com/b", 2)
+        self.assertEqual(depths.shallowest("https://example.com/a"), 1)
+        self.assertIsNone(depths.shallowest("https://example.com/a", below=1))
+        self.assertEqual(depths.shallowest("https://example.com/b", below=3), 2)
+        self.assertIsNone(depths.shallowest("https://example.com/c"))
+
+    def test_atlas_crawl_with_compact_url_sets(self):
+        pages = {
+            "https://example.com/": '<a href="/a">A</a><a href="/b">B</a>',
+            "https://example.com/a": '<a href="/b">B again</a><a href="/">Home</a>',
+            "https://example.com/b": '<a href="/a">A again</a>',
+        }
+        for kind in ("fingerprint", "bloom"):
+            atlas = Atlas(settings={"save_results": False, "url_set": kind, "max_concurrency": 2})
+            fetched = []
+
+            async def fake_fetch(url: str):
+                fetched.append(url)
+                return (pages.get(url, ""), "text/html")
+
+            atlas.fetch_async = fake_fetch
+            atlas.should_visit = lambda url: True
+            atlas.is_allowed_path = lambda url: True
+            asyncio.run(atlas.crawl_async("https://example.com"))
+
+            # "https://example.com" and the "/" link are the same page.
+            self.assertEqual(set(fetched), {"https://example.com/", "https://example.com/a", "https://example.com/b"})
+            self.assertEqual(len(fetched), len(set(fetched)))
+            self.assertEqual(len(atlas.visited), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
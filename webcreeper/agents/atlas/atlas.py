@@ -1,13 +1,37 @@
-import hashlib
 import inspect
 import os
 import re
+import time
 import asyncio
-from urllib.parse import urljoin, urlparse
+from collections import deque
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import aclosing
+from urllib.parse import urlparse
 
-from bs4 import BeautifulSoup
 from webcreeper.creeper_core.base_agent import BaseAgent
-from webcreeper.creeper_core.storage import save_json, save_jsonl_line
+from webcreeper.creeper_core.breaker import CLOSED
+from webcreeper.creeper_core.checkpoint import CrawlCheckpoint
+from webcreeper.creeper_core.document import PageDocument
+from webcreeper.creeper_core.frontier import Frontier
+from webcreeper.creeper_core.graph import CompactLinkGraph, make_graph
+from webcreeper.creeper_core.offload import analyze_html, make_executor
+from webcreeper.creeper_core.parsers import get_backend
+from webcreeper.creeper_core.sharding import ShardExchange, make_shard_queue
+from webcreeper.creeper_core.simhash import SimHashIndex, hamming
+from webcreeper.creeper_core.storage import JsonlWriter, output_path, save_json, save_jsonl_line, save_text
+from webcreeper.creeper_core.urlset import DepthSets
+
+
+STATE_PARAM_RE = re.compile(r"[?&](state|session|token|sid|phpsessid)=", re.I)
+
+# Checkpointed SimHash fingerprints share the content_hashes table with text hashes.
+SIMHASH_PREFIX = "simhash:"
+
+# Sitemap index levels followed below the configured / robots.txt sitemaps.
+MAX_SITEMAP_NESTING = 3
+# Sitemap URLs buffered (and sorted newest lastmod first) before they are queued; the
+# protocol allows at most this many per sitemap file.
+SITEMAP_BATCH = 50_000
 
 
 class Atlas(BaseAgent):
@@ -24,26 +48,88 @@ class Atlas(BaseAgent):
         "crawl_entire_website": False,
         "save_results": True,
         "results_filename": "results.jsonl",
+        "results_compression": None,  # None, "gzip" or "zstd" (adds .gz / .zst to results_filename)
+        "results_rotate_bytes": None,  # start results.1.jsonl, ... after this many bytes (None = one file)
+        "results_flush_interval": 1.0,  # seconds between background writes of buffered results
         "heuristic_skip_long_urls": True,
         "heuristic_skip_state_param": True,
+        "accept_content_types": ["text/html"],  # other responses are skipped without downloading the body
         "deduplicate_content": True,
+        "respect_canonical": False,  # a page's rel=canonical URL counts as crawled with it (no duplicate hook output)
+        "near_duplicate_distance": None,  # SimHash bits (of 64) for near-duplicates, e.g. 3 (None = exact text only)
         "allow_subdomains": False,  # exact host by default
         "seed_urls": [],  # crawl only these pages when not full-site
+        "use_sitemaps": False,  # also queue URLs from sitemap_urls, else robots.txt Sitemap: lines, else /sitemap.xml
+        "sitemap_urls": [],  # sitemaps or sitemap indexes to read (plain or gzipped)
+        "sitemap_max_urls": None,  # stop queueing sitemap URLs after this many (None = all)
+        "sitemap_skip_unchanged": True,  # with http_cache_path: reuse pages whose lastmod predates the last download
         "max_concurrency": 10,
         "batch_delay": 0.0,
+        "scheduler_capacity": None,  # URLs held by the per-host scheduler (None = 8 * max_concurrency)
+        "html_parser": "html.parser",  # "html.parser", "lxml" or "selectolax" (see creeper_core.parsers)
+        "parse_executor": None,  # None (parse on the event loop), "process" or "thread"
+        "parse_workers": None,  # pool size (None = CPU count)
+        "parse_offload_min_bytes": 0,  # smaller pages are parsed inline (pickling costs more)
+        "hook_executor": None,  # None (sync on_page hooks run on the event loop), "thread" or "process"
+        "hook_workers": None,  # hook pool size (None = CPU count)
+        # Seconds per on_page call (None = no deadline; CrawlHook.timeout overrides). Sync hooks then run
+        # in a thread pool even without hook_executor. A timeout stops waiting for the call, not the call.
+        "hook_timeout": None,
+        "hook_queue_size": None,  # pages waiting for on_page hooks; fetching pauses when full (None = run hooks inline)
+        "hook_queue_workers": 4,  # pages whose hooks run at the same time (with hook_queue_size)
+        "checkpoint_path": None,  # SQLite file for incremental crawl checkpoints (None = off)
+        "checkpoint_interval": 5.0,  # seconds between checkpoint commits
+        "resume": False,  # continue from checkpoint_path instead of starting over
+        "frontier_memory_limit": None,  # frontier URLs kept in memory before spilling to disk (None = no limit)
+        "frontier_spill_path": None,  # SQLite file for spilled frontier URLs (None = temp file)
+        "metrics_interval": 10.0,  # seconds between on_metrics events during a crawl (None = only at the end)
+        "metrics_prometheus_path": None,  # write Prometheus text metrics here with each on_metrics event
+        "graph_store": "dict",  # "dict" or "compact" (integer IDs + edge arrays, see creeper_core.graph)
+        "shard_count": 1,  # >1: crawl only the hosts shard_index owns (see creeper_core.sharding)
+        "shard_index": 0,
+        "shard_queue": None,  # ShardQueue, or SQLite file path shared by all shards
+        "shard_poll_interval": 0.5,  # seconds between checks for links sent by other shards
     }
 
     def __init__(self, settings: dict = {}):
         self.settings = {**self.DEFAULT_SETTINGS, **settings}
-        self.graph = {}
+        self.graph = make_graph(self.settings.get("graph_store", "dict"))
         self.max_depth = self.settings["max_depth"]
         self.crawl_entire_website = self.settings["crawl_entire_website"]
 
-        self.results_path = os.path.join(self.settings["storage_path"], self.settings["results_filename"])
+        self.results_path = output_path(
+            os.path.join(self.settings["storage_path"], self.settings["results_filename"]),
+            self.settings.get("results_compression"),
+        )
+        self._results_writer = None  # open only during crawl_async
         os.makedirs(self.settings["storage_path"], exist_ok=True)
 
-        # Track seen content hashes
+        # Track seen content hashes (and SimHash fingerprints when near_duplicate_distance is set)
         self.content_hashes = set()
+        self._simhash_index = None
+
+        # Worker pool for parsing, open only during crawl_async (see parse_executor)
+        self._parse_executor = None
+
+        # Pages waiting for on_page hooks, open only during crawl_async (see hook_queue_size);
+        # they are marked done in the checkpoint only once their hooks ran
+        self._page_hook_queue = None
+        self._pages_in_hooks = set()
+
+        # Errors that must stop the current crawl (results or checkpoint could not be saved)
+        self._fatal_errors = []
+
+        # Incremental crawl state store, open only during crawl_async (see checkpoint_path)
+        self._checkpoint = None
+
+        # Sitemap lastmod (epoch seconds) per queued URL key, for sitemap_skip_unchanged
+        self._sitemap_lastmod = {}
+
+        # Cross-shard link exchange, open only during crawl_async (see shard_count)
+        self._shard = None
+
+        # Last on_metrics event (see metrics_interval)
+        self._metrics_emitted_at = 0.0
 
         # Visited set / frontier de-dup (BaseAgent may have it; ensure present)
         if not hasattr(self, "visited"):
@@ -51,6 +137,12 @@ class Atlas(BaseAgent):
 
         super().__init__(self.settings)
 
+        try:
+            get_backend(self.settings["html_parser"])
+        except ImportError as e:
+            self.logger.warning(f"html_parser '{self.settings['html_parser']}' unavailable ({e}); using html.parser")
+            self.settings["html_parser"] = "html.parser"
+
     # --------------------------- helpers ---------------------------
 
     def _host_matches(self, host: str, allowed: str) -> bool:
@@ -69,7 +161,7 @@ class Atlas(BaseAgent):
         if self.settings.get("heuristic_skip_long_urls", True) and len(url) > 2000:
             return True
         if self.settings.get("heuristic_skip_state_param", True):
-            if re.search(r"[?&](state|session|token|sid|phpsessid)=", url, re.I):
+            if STATE_PARAM_RE.search(url):
                 return True
         return False
 
@@ -96,21 +188,71 @@ class Atlas(BaseAgent):
 
         return sorted(out)
 
-    def _is_duplicate_content(self, html: str, url: str) -> bool:
-        """Check if content is duplicate based on hash of extracted text."""
+    def _allowed_domains_for_policy(self) -> list:
+        base_url = self.settings.get("base_url")
+        if base_url:
+            return self._effective_allowed_domains(base_url)
+        # No crawl yet: each URL's own host counts as allowed unless a list is given.
+        return self.settings.get("allowed_domains") or []
+
+    def _make_document(self, url: str, html: str) -> PageDocument:
+        return PageDocument(url, html, self.settings.get("html_parser", "html.parser"))
+
+    async def _build_document_async(self, url: str, html: str) -> PageDocument:
+        """Page document for url; with a parse_executor, parsing and hashing happen off-loop."""
+        document = self._make_document(url, html)
+        if self._parse_executor is None or len(html) < int(self.settings.get("parse_offload_min_bytes") or 0):
+            document.tree  # parse now (links need the tree anyway), so the time counts as the parse phase
+            return document
+
+        dedup = bool(self.settings.get("deduplicate_content", True))
+        args = (html, url, document.parser, dedup, dedup and self._simhash_index is not None)
+        loop = asyncio.get_running_loop()
+        try:
+            digest, links, fingerprint, canonical = await loop.run_in_executor(
+                self._parse_executor, analyze_html, *args
+            )
+        except BrokenProcessPool as e:
+            self.logger.warning(f"Parse process pool failed ({e}); switching to a thread pool")
+            self._parse_executor.shutdown(wait=False)
+            self._parse_executor = make_executor("thread", self.settings.get("parse_workers"))
+            digest, links, fingerprint, canonical = await loop.run_in_executor(
+                self._parse_executor, analyze_html, *args
+            )
+        if args[-1]:
+            document.prime(simhash=fingerprint)
+        return document.prime(text_hash=digest, links=links, canonical_url=canonical)
+
+    def _is_duplicate_content(self, html: str, url: str, document: PageDocument | None = None) -> bool:
+        """
+        Check if content is a duplicate: same extracted text (hash), or, with
+        near_duplicate_distance set, text whose SimHash is within that many bits of a seen page.
+        """
         if not self.settings.get("deduplicate_content", True):
             return False
 
-        text = BeautifulSoup(html, "html.parser").get_text(" ", strip=True)
-        if not text:
+        document = document or self._make_document(url, html)
+        h = document.text_hash
+        if not h:
             return False
 
-        h = hashlib.md5(text.encode("utf-8")).hexdigest()
         if h in self.content_hashes:
             self.logger.info(f"Skipping {url} (duplicate content hash)")
             return True
 
+        if self._simhash_index is not None:
+            fp = document.simhash
+            if fp is not None:
+                match = self._simhash_index.add_if_new(fp)
+                if match is not None:
+                    self.logger.info(f"Skipping {url} (near-duplicate content, {hamming(fp, match)} bits apart)")
+                    return True
+                if self._checkpoint is not None:
+                    self._checkpoint.record_content_hash(f"{SIMHASH_PREFIX}{fp:016x}")
+
         self.content_hashes.add(h)
+        if self._checkpoint is not None:
+            self._checkpoint.record_content_hash(h)
         return False
 
     # ------------------------ policy checks ------------------------
@@ -131,24 +273,13 @@ class Atlas(BaseAgent):
         if self._should_skip_heuristics(url):
             return False
 
+        policy = self.url_policy
         host = urlparse(url).netloc
-        allowed_domains = self._effective_allowed_domains(self.settings.get("base_url") or url)
-        allow_sub = self.settings.get("allow_subdomains", False)
-        norm_host = self._norm_host(host)
-        norms = [self._norm_host(d) for d in allowed_domains]
-        ok = True
-
-        # If there is an allow-list, enforce it
-        if allowed_domains:
-            if allow_sub:
-                ok = any(norm_host == d or norm_host.endswith("." + d) for d in norms)
-            else:
-                ok = norm_host in norms
-
-        if not ok:
+        if not policy.host_allowed(host):
             self.logger.info(
                 f"Disallowed {url} -> Disallowed domain "
-                f"(host={norm_host}, allowed={norms}, allow_subdomains={allow_sub})"
+                f"(host={self._norm_host(host)}, allowed={sorted(policy.allowed_hosts.hosts)}, "
+                f"allow_subdomains={policy.allow_subdomains})"
             )
             return False
 
@@ -165,25 +296,11 @@ class Atlas(BaseAgent):
         return True
 
     def is_allowed_path(self, url: str) -> bool:
-        path = urlparse(url).path or "/"
-        allowed_paths = self.settings.get("allowed_paths", []) or []
-        blocked_paths = self.settings.get("blocked_paths", []) or []
-        allow_url_patterns = self.settings.get("allow_url_patterns", []) or []
-
-        # Path allow-list (prefix)
-        if allowed_paths and not any(path.startswith(p) for p in allowed_paths):
-            return False
-
-        # Regex allow-list (any must match)
-        if allow_url_patterns:
-            if not any(re.search(p, url) for p in allow_url_patterns):
-                return False
-
-        # Block-list (prefix)
-        if any(path.startswith(p) for p in blocked_paths):
+        """allowed_paths / blocked_paths prefixes and the allow_url_patterns allow-list."""
+        policy = self.url_policy
+        if not policy.path_allowed(urlparse(url).path or "/"):
             return False
-
-        return True
+        return not policy.allow_patterns or policy.allow_patterns.search(url)
 
     # ------------------------- main crawling -----------------------
 
@@ -194,26 +311,108 @@ class Atlas(BaseAgent):
         self.on_page_crawled = on_page_crawled
         self.on_all_done = on_all_done
         self.hooks = self._normalize_hooks(hooks)
+        self.revalidate = self.skip_unchanged_pages()
+        if self.validator_cache is not None and not self.revalidate:
+            self.logger.info("Conditional GET off: a page hook without changed_only needs every page")
         self.settings["base_url"] = start_url
+        self.reset_url_policy()
+        self.metrics.reset()
+        self._metrics_emitted_at = time.monotonic()
         await self._run_hook_event_async("on_start", self._hook_context(start_url=start_url))
 
-        if self.settings.get("save_results", True) and os.path.exists(self.results_path):
-            open(self.results_path, "w").close()
-
-        self.visited = set()
-        if hasattr(self, "content_hashes"):
-            self.content_hashes.clear()
+        # Everything below is released in the finally, even if a later setup step fails.
+        hook_tasks = []
+        try:
+            resume_state = self._open_checkpoint(start_url)
+
+            if self.settings.get("save_results", True):
+                self._results_writer = JsonlWriter(
+                    self.results_path,
+                    compression=self.settings.get("results_compression"),
+                    flush_interval=float(self.settings.get("results_flush_interval", 1.0)),
+                    rotate_bytes=self.settings.get("results_rotate_bytes"),
+                    truncate=resume_state is None,
+                )
+
+            self.visited = self.new_url_set()
+            self._sitemap_lastmod.clear()
+            self._fatal_errors.clear()
+            if hasattr(self, "content_hashes"):
+                self.content_hashes.clear()
+            distance = self.settings.get("near_duplicate_distance")
+            self._simhash_index = SimHashIndex(int(distance)) if distance is not None else None
+            if resume_state is not None:
+                self.visited.update(resume_state["done"])
+                self.graph.update(resume_state["graph"])
+                for h in resume_state["content_hashes"]:
+                    if not h.startswith(SIMHASH_PREFIX):
+                        self.content_hashes.add(h)
+                    elif self._simhash_index is not None:
+                        self._simhash_index.add(int(h[len(SIMHASH_PREFIX) :], 16))
+
+            raw_seeds = self.settings.get("seed_urls") or []
+            seeds = [u.strip() for u in raw_seeds if isinstance(u, str) and u.strip()]
+            if not seeds:
+                seeds = [start_url]
+
+            if self.crawl_entire_website or self.max_depth is None or self.max_depth < 0:
+                depth_limit = None
+            else:
+                depth_limit = self.max_depth
 
-        raw_seeds = self.settings.get("seed_urls") or []
-        seeds = [u.strip() for u in raw_seeds if isinstance(u, str) and u.strip()]
-        if not seeds:
-            seeds = [start_url]
+            self._shard = self._open_shard()
+            use_sitemaps = bool(self.settings.get("use_sitemaps", False))
+            if use_sitemaps and self._shard is not None:
+                use_sitemaps = self._shard.owns(self._host_key(start_url))  # one shard reads the sitemaps
 
-        if self.crawl_entire_website or self.max_depth is None or self.max_depth < 0:
-            depth_limit = None
-        else:
-            depth_limit = self.max_depth
-        await self._crawl_bfs_async(seeds, depth_limit=depth_limit)
+            await self.open_async_client()
+            self._parse_executor = make_executor(
+                self.settings.get("parse_executor"), self.settings.get("parse_workers"), self.logger
+            )
+            hook_mode = self.settings.get("hook_executor")
+            if not hook_mode and self._sync_page_handler_deadlines():
+                hook_mode = "thread"  # a sync hook's deadline can only be kept off the event loop
+            self._hook_executor = make_executor(hook_mode, self.settings.get("hook_workers"), self.logger, name="hook")
+            hook_tasks = self._start_page_hook_workers()
+            await self._crawl_bfs_async(
+                seeds,
+                depth_limit=depth_limit,
+                resume_state=resume_state,
+                use_sitemaps=use_sitemaps,
+            )
+            if self._page_hook_queue is not None:
+                await self._page_hook_queue.join()
+            if self._fatal_errors:
+                raise self._fatal_errors[0]
+            if self._checkpoint is not None:
+                self._checkpoint.set_meta("finished", True)
+        finally:
+            await self.close_async_client()
+            self.robots_cache.save()
+            if self.validator_cache is not None:
+                self.validator_cache.flush()
+            for task in hook_tasks:
+                task.cancel()
+            await asyncio.gather(*hook_tasks, return_exceptions=True)
+            self._page_hook_queue = None
+            self._pages_in_hooks.clear()
+            self.revalidate = True
+            if self._parse_executor is not None:
+                self._parse_executor.shutdown()
+                self._parse_executor = None
+            if self._hook_executor is not None:
+                # Timed-out hook calls may still be running; don't wait for them.
+                self._hook_executor.shutdown(wait=False, cancel_futures=True)
+                self._hook_executor = None
+            if self._results_writer is not None:
+                self._results_writer.close()
+                self._results_writer = None
+            if self._checkpoint is not None:
+                self._checkpoint.close()
+                self._checkpoint = None
+            if self._shard is not None:
+                self._shard.queue.close()
+                self._shard = None
 
         if self.on_all_done:
             try:
@@ -223,6 +422,7 @@ class Atlas(BaseAgent):
             except Exception as e:
                 self.logger.warning(f"on_all_done callback raised: {e}")
 
+        await self._emit_metrics()
         summary = {
             "crawled_pages": len(self.graph),
             "visited_urls": len(self.visited),
@@ -230,146 +430,478 @@ class Atlas(BaseAgent):
         }
         await self._run_hook_event_async("on_finish", summary, self._hook_context(start_url=start_url))
 
-    async def _crawl_bfs_async(self, seed_urls: list[str], depth_limit=None):
-        frontier = []
-        seen_frontier = set()
-        for u in seed_urls:
-            u = self._strip_fragment(u)
-            if not u or u in seen_frontier:
-                continue
-            seen_frontier.add(u)
-            frontier.append(u)
+    async def _maybe_emit_metrics(self):
+        interval = self.settings.get("metrics_interval")
+        if interval is not None and time.monotonic() - self._metrics_emitted_at >= float(interval):
+            await self._emit_metrics()
 
-        depth = 0
+    async def _emit_metrics(self):
+        """Fire on_metrics with a metrics snapshot, and refresh the Prometheus file if configured."""
+        self._metrics_emitted_at = time.monotonic()
+        path = self.settings.get("metrics_prometheus_path")
+        if path:
+            try:
+                save_text(path, self.get_metrics_prometheus())
+            except OSError as e:
+                self.logger.warning(f"Could not write metrics to {path}: {e}")
+        await self._run_hook_event_async("on_metrics", self.get_metrics(), self._hook_context())
+
+    def _open_shard(self) -> ShardExchange | None:
+        count = int(self.settings.get("shard_count") or 1)
+        if count <= 1:
+            return None
+        if self.settings.get("shard_queue") is None:
+            raise ValueError("shard_count > 1 needs a shard_queue shared by all shards")
+        shard = ShardExchange(
+            make_shard_queue(self.settings["shard_queue"]),
+            int(self.settings.get("shard_index", 0)),
+            count,
+            poll_interval=float(self.settings.get("shard_poll_interval", 0.5)),
+        )
+        shard.start()
+        return shard
+
+    def _open_checkpoint(self, start_url: str):
+        """Open the checkpoint store; returns its saved state when resuming, else None (store is reset)."""
+        path = self.settings.get("checkpoint_path")
+        if not path:
+            return None
+        self._checkpoint = CrawlCheckpoint(path, flush_interval=float(self.settings.get("checkpoint_interval", 5.0)))
+        if self.settings.get("resume") and self._checkpoint.has_state():
+            state = self._checkpoint.load()
+            self.logger.info(f"Resuming crawl from {path}: {len(state['done'])} done, {len(state['pending'])} pending")
+            return state
+        self._checkpoint.reset()
+        self._checkpoint.set_meta("start_url", start_url)
+        return None
+
+    async def _crawl_bfs_async(self, seed_urls: list[str], depth_limit=None, resume_state=None, use_sitemaps=False):
+        """
+        Streaming BFS: a feeder moves (url, depth) items from a depth-ordered frontier into the
+        bounded per-host scheduler, drained by `max_concurrency` long-lived workers. Links are
+        queued as soon as their page finishes, so one slow page no longer holds back the rest
+        of its level, and hosts are served round-robin so one big host cannot starve the rest.
+        With use_sitemaps, sitemap URLs stream into the frontier next to the crawl. When sharded,
+        URLs on other shards' hosts are sent to them, and the crawl ends once every shard is idle.
+        """
         max_concurrency = max(1, int(self.settings.get("max_concurrency", 10)))
-        sem = asyncio.Semaphore(max_concurrency)
         batch_delay = float(self.settings.get("batch_delay", 0.0))
-
-        while frontier:
-            if depth_limit is not None and depth > depth_limit:
-                break
-
-            tasks = [self._process_url_async(url, depth, sem) for url in frontier]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-
-            next_frontier = []
-            for item in results:
-                if isinstance(item, Exception):
-                    self.logger.warning(f"Async crawl task failed: {item}")
+        scheduler = self.host_scheduler
+        scheduler.capacity = self.settings.get("scheduler_capacity") or 8 * max_concurrency
+        scheduler.clear()
+
+        frontier = Frontier(
+            memory_limit=self.settings.get("frontier_memory_limit"),
+            spill_path=self.settings.get("frontier_spill_path"),
+        )
+        seen_frontier = self.new_url_set()
+        # With a depth limit, keep the shallowest depth per URL: a page reached first through
+        # a longer path must still get its full depth budget once a shorter path shows up.
+        # One url_set per depth, so url_set="fingerprint"/"bloom" bounds this memory as well.
+        best_depth = DepthSets(self.new_url_set)
+        wakeup = asyncio.Event()
+        in_flight = 0
+        checkpoint = self._checkpoint
+        shard = self._shard
+
+        def push(url: str, depth: int):
+            url = self.url_key(url)
+            if depth_limit is not None:
+                if depth > depth_limit:
+                    return
+                if best_depth.shallowest(url, below=depth + 1) is not None:
+                    return
+                best_depth.add(url, depth)
+                if shard is not None and shard.route(self._host_key(url), url, depth):
+                    return  # another shard's host (sent again only for a shallower depth)
+                if url in self.graph:
+                    # Already crawled deeper: re-expand its links instead of refetching.
+                    for link in self.graph[url]:
+                        push(link["target"], depth + 1)
+                    return
+            elif url in seen_frontier:
+                return
+            seen_frontier.add(url)
+            if shard is not None and depth_limit is None and shard.route(self._host_key(url), url, depth):
+                return  # another shard's host (sent once)
+            frontier.push(url, depth)
+            if checkpoint is not None:
+                checkpoint.record_discovered(url, depth)
+            wakeup.set()
+
+        fatal = self._fatal_errors  # raised by the main loop
+
+        async def worker():
+            nonlocal in_flight
+            while True:
+                host, (url, depth) = await scheduler.get()
+                if self._defer_for_circuit(host):
+                    scheduler.release(host)
+                    await scheduler.put(host, (url, depth))  # back in line until the host is probed
+                    continue
+                try:
+                    try:
+                        targets = await self._process_url_async(url, depth)
+                    except Exception as e:
+                        self.logger.warning(f"Async crawl task failed: {e}")
+                        targets = []
+                    finally:
+                        scheduler.release(host)
+                    if depth_limit is not None:
+                        shallowest = best_depth.shallowest(url, below=depth)
+                        depth = depth if shallowest is None else shallowest
+                    for target in targets:
+                        push(target, depth + 1)
+                    if url not in self._pages_in_hooks:  # else marked done once its hooks ran
+                        self._checkpoint_page(url)
+                    await self._maybe_emit_metrics()
+                except Exception as e:
+                    # Results or checkpoint could not be saved: carrying on would lose pages.
+                    self.logger.error(f"Crawl failed after {url}: {e}")
+                    fatal.append(e)
+                finally:
+                    in_flight -= 1
+                    wakeup.set()
+
+        if resume_state is not None:
+            # Everything discovered before counts as seen; unfinished URLs go back on the frontier.
+            if depth_limit is not None:
+                for url, depth in resume_state["discovered"].items():
+                    best_depth.add(url, depth)
+            else:
+                seen_frontier.update(resume_state["discovered"])
+            for url, depth in resume_state["pending"]:
+                frontier.push(url, depth)
+        else:
+            for u in seed_urls:
+                if u:
+                    push(u, 0)
+
+        sitemap_task = None
+        if use_sitemaps:
+            sitemap_task = asyncio.create_task(self._queue_sitemap_urls_async(seed_urls, push))
+            sitemap_task.add_done_callback(lambda _: wakeup.set())
+
+        workers = [asyncio.create_task(worker()) for _ in range(max_concurrency)]
+        current_depth = 0
+        try:
+            while True:
+                if fatal:
+                    raise fatal[0]
+                if frontier:
+                    url, depth = frontier.pop()
+                    if url in self.visited or (
+                        depth_limit is not None and best_depth.shallowest(url, below=depth) is not None
+                    ):
+                        continue  # already crawled, or superseded by a shallower entry
+                    if batch_delay > 0 and depth > current_depth:
+                        await asyncio.sleep(batch_delay)
+                    current_depth = max(current_depth, depth)
+                    in_flight += 1
+                    await scheduler.put(self._host_key(url), (url, depth))
+                    continue
+                if shard is not None:
+                    inbox = shard.poll()
+                    for url, depth in inbox:
+                        push(url, depth)
+                    if inbox:
+                        continue
+                if in_flight == 0 and (sitemap_task is None or sitemap_task.done()):
+                    if shard is None or shard.finished():
+                        break
+                    await asyncio.sleep(shard.poll_interval)
                     continue
-                for target in item:
-                    target = self._strip_fragment(target)
-                    if target not in seen_frontier:
-                        seen_frontier.add(target)
-                        next_frontier.append(target)
-
-            if batch_delay > 0 and next_frontier:
-                await asyncio.sleep(batch_delay)
-
-            frontier = next_frontier
-            depth += 1
-
-    async def _process_url_async(self, url: str, depth: int, sem: asyncio.Semaphore) -> list[str]:
-        async with sem:
-            if url in self.visited:
-                return []
-
-            url = self._strip_fragment(url)
-            page_ctx = self._hook_context(url=url, depth=depth)
-
-            if not self.should_visit(url):
-                await self._run_hook_event_async("on_page_skipped", url, "blocked_by_policy", page_ctx)
-                return []
-            if not self.is_allowed_path(url):
-                await self._run_hook_event_async("on_page_skipped", url, "blocked_by_path_policy", page_ctx)
-                return []
-
-            self.visited.add(url)
-            self.logger.info(f"Crawling page async: {url} (Depth: {depth})")
-
-            fetched = await self.fetch_async(url)
-            if not fetched:
-                self.logger.info(f"Skipping {url} - failed to fetch.")
-                await self._run_hook_event_async("on_page_error", url, "fetch_failed", page_ctx)
-                return []
-            content, content_type = fetched
-
-            if not content or "text/html" not in (content_type or ""):
-                self.logger.info(f"Skipping non-HTML content: {url} [{content_type}]")
-                await self._run_hook_event_async("on_page_skipped", url, f"non_html:{content_type}", page_ctx)
-                return []
-
-            if self._is_duplicate_content(content, url):
-                await self._run_hook_event_async("on_page_skipped", url, "duplicate_content", page_ctx)
-                return []
-
-            links = await self.extract_links_async(content, url)
-
-            for result in await self._collect_page_results_async(url, content, page_ctx):
-                self._save_result(result)
-
-            self.graph[url] = links
+                wakeup.clear()
+                if shard is None:
+                    await wakeup.wait()
+                else:
+                    try:  # wake up in time to poll the inbox
+                        await asyncio.wait_for(wakeup.wait(), shard.poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+        finally:
+            tasks = workers + ([sitemap_task] if sitemap_task is not None else [])
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if sitemap_task is not None and not sitemap_task.cancelled() and sitemap_task.exception():
+                self.logger.warning(f"Reading sitemaps failed: {sitemap_task.exception()}")
+            if frontier.spilled_total:
+                self.logger.info(f"Frontier spilled {frontier.spilled_total} URLs to disk")
+            frontier.close()
+
+    async def _process_url_async(self, url: str, depth: int) -> list[str]:
+        url = self.url_key(url)
+        if url in self.visited:
+            return []
+
+        page_ctx = self._hook_context(url=url, depth=depth)
+
+        if not await self.should_visit_async(url):
+            await self._page_skipped(url, "blocked_by_policy", page_ctx)
+            return []
+        if not self.is_allowed_path(url):
+            await self._page_skipped(url, "blocked_by_path_policy", page_ctx)
+            return []
+
+        self.visited.add(url)
+        self.logger.info(f"Crawling page async: {url} (Depth: {depth})")
+
+        if self._sitemap_lastmod and self._unchanged_per_sitemap(url):
+            return await self._reuse_unchanged_page(url, page_ctx)
+
+        host = self._host_key(url)
+        if self.circuit_blocked(host):
+            return await self._circuit_open_error(url, host, page_ctx)
+        fetched = await self.fetch_async(url)
+        if not fetched:
+            if self.circuit_breaker is not None and self.circuit_breaker.state(host) != CLOSED:
+                return await self._circuit_open_error(url, host, page_ctx)
+            self.logger.info(f"Skipping {url} - failed to fetch.")
+            self.metrics.record_error("fetch_failed")
+            await self._run_hook_event_async("on_page_error", url, "fetch_failed", page_ctx)
+            return []
+        if getattr(fetched, "not_modified", False):
+            return await self._reuse_unchanged_page(url, page_ctx)
+        content, content_type = fetched
+
+        # A redirect makes the final URL another name for this page: crawl it only once.
+        final_url = getattr(fetched, "url", None) or url
+        if self.url_key(final_url) != url and not self._claim_alias(url, final_url):
+            await self._page_skipped(url, "duplicate_url", page_ctx)
+            return []
+
+        if not content or "text/html" not in (content_type or ""):
+            self.logger.info(f"Skipping non-HTML content: {url} [{content_type}]")
+            await self._page_skipped(url, f"non_html:{content_type}", page_ctx)
+            return []
+
+        with self.metrics.timer("parse"):
+            document = await self._build_document_async(final_url, content)
+        page_ctx["document"] = document
+
+        # A page whose canonical URL was already crawled is a duplicate: its links are still
+        # followed (a site-wide canonical must not hide the site), but hooks don't see it again.
+        duplicate = False
+        canonical = document.canonical_url if self.settings.get("respect_canonical", False) else None
+        if canonical and self.url_key(canonical) not in (url, self.url_key(final_url)):
+            if self.url_policy.host_allowed(urlparse(canonical).netloc) and not self._claim_alias(url, canonical):
+                duplicate = True
+
+        if not duplicate and self._is_duplicate_content(content, url, document):
+            await self._page_skipped(url, "duplicate_content", page_ctx)
+            return []
+
+        with self.metrics.timer("link_extraction"):
+            links = await self.extract_links_async(content, url, document=document)
+
+        self.graph[url] = links
+        self.remember_validators(url, fetched, document.text_hash, links)
+        if duplicate:
+            await self._page_skipped(url, "duplicate_url", page_ctx)
             return [link["target"] for link in links]
+        self.metrics.incr("pages_crawled")
 
-    def extract_links(self, page_content: str, base_url: str, page_id=None) -> list:
-        soup = BeautifulSoup(page_content, "html.parser")
-        links = []
-        seen = set()
+        if self._page_hook_queue is not None:
+            self._pages_in_hooks.add(url)
+            await self._page_hook_queue.put((url, content, page_ctx))  # waits while the queue is full
+        else:
+            await self._run_page_hooks_async(url, content, page_ctx)
+        return [link["target"] for link in links]
 
-        i = 0
-        for anchor in soup.find_all("a", href=True):
-            full_url = urljoin(base_url, anchor["href"])
-            full_url = self._strip_fragment(full_url)
-            if not self._is_http(full_url):
-                continue
-            if full_url in seen:
-                continue
-            seen.add(full_url)
+    async def _queue_sitemap_urls_async(self, seed_urls: list[str], push):
+        """
+        Read sitemaps and push their URLs at depth 0, next to the seeds. Sitemap indexes are
+        followed up to MAX_SITEMAP_NESTING levels; URLs on other hosts are dropped. Within each
+        batch the newest lastmod goes first, so recently changed pages are crawled early.
+        """
+        sitemaps = [u for u in self.settings.get("sitemap_urls") or [] if isinstance(u, str) and u.strip()]
+        if not sitemaps:
+            for home in dict.fromkeys(self.get_home_url(u) for u in seed_urls):
+                sitemaps += await self.sitemaps_from_robots_async(home) or [f"{home}/sitemap.xml"]
+        limit = self.settings.get("sitemap_max_urls")
+        remember_lastmod = (
+            self.validator_cache is not None and self.revalidate and self.settings.get("sitemap_skip_unchanged", True)
+        )
+        queued = 0
+
+        def flush(batch: list) -> bool:
+            nonlocal queued
+            batch.sort(key=lambda e: (e.lastmod is None, -(e.lastmod or 0.0)))
+            try:
+                for entry in batch:
+                    if limit is not None and queued >= int(limit):
+                        return False
+                    url = self.url_key(entry.loc)
+                    if remember_lastmod and entry.lastmod is not None:
+                        self._sitemap_lastmod[url] = entry.lastmod
+                    push(url, 0)
+                    queued += 1
+                    self.metrics.incr("sitemap_urls")
+                return True
+            finally:
+                batch.clear()
 
-            anchor_text = anchor.get_text(strip=True)
-            if not self._allow_discovered_link(base_url, full_url, anchor_text):
+        pending = deque((url.strip(), 0) for url in sitemaps)
+        seen = set()
+        while pending:
+            sitemap_url, nesting = pending.popleft()
+            if self.url_key(sitemap_url) in seen:
                 continue
+            seen.add(self.url_key(sitemap_url))
+            batch = []
+            async with aclosing(self.iter_sitemap_async(sitemap_url)) as entries:
+                async for entry in entries:
+                    if entry.sitemap:
+                        if nesting < MAX_SITEMAP_NESTING:
+                            pending.append((entry.loc, nesting + 1))
+                        continue
+                    if not self.url_policy.host_allowed(urlparse(entry.loc).netloc):
+                        continue
+                    batch.append(entry)
+                    if len(batch) >= SITEMAP_BATCH and not flush(batch):
+                        return
+            if not flush(batch):
+                return
+        self.logger.info(f"Queued {queued} URLs from {len(seen)} sitemaps")
+
+    def _unchanged_per_sitemap(self, url: str) -> bool:
+        """True if the sitemap's lastmod for url is older than our last full download of it."""
+        lastmod = self._sitemap_lastmod.pop(url, None)
+        if lastmod is None or self.validator_cache is None:
+            return False
+        entry = self.validator_cache.get(self._validator_key(url))
+        return entry is not None and entry["links"] is not None and entry["fetched_at"] >= lastmod
+
+    async def _run_page_hooks_async(self, url: str, content: str, page_ctx: dict):
+        with self.metrics.timer("hooks"):
+            results = await self._collect_page_results_async(url, content, page_ctx)
+        for result in results:
+            self._save_result(result)
+
+    def _checkpoint_page(self, url: str):
+        """Mark a finished page done in the checkpoint; a due commit first flushes the results it covers."""
+        checkpoint = self._checkpoint
+        if checkpoint is not None:
+            if url in self.graph:
+                checkpoint.record_page(url, self.graph[url])
+            checkpoint.record_done(url)
+            checkpoint.maybe_flush(before=self._flush_results)
+
+    def _start_page_hook_workers(self) -> list:
+        """
+        With hook_queue_size, crawl workers hand pages to a bounded queue drained by
+        hook_queue_workers tasks, so slow extraction overlaps with fetching. A full queue
+        makes crawl workers wait: hooks apply backpressure instead of piling up pages.
+        """
+        size = self.settings.get("hook_queue_size")
+        if not size:
+            self._page_hook_queue = None
+            return []
+        queue = self._page_hook_queue = asyncio.Queue(maxsize=int(size))
+
+        async def consume():
+            while True:
+                url, content, page_ctx = await queue.get()
+                try:
+                    try:
+                        await self._run_page_hooks_async(url, content, page_ctx)
+                    except Exception as e:
+                        self.logger.warning(f"Page hooks failed for {url}: {e}")
+                    self._pages_in_hooks.discard(url)
+                    self._checkpoint_page(url)
+                except Exception as e:
+                    self.logger.error(f"Crawl failed after {url}: {e}")
+                    self._fatal_errors.append(e)
+                finally:
+                    queue.task_done()
+
+        workers = max(1, int(self.settings.get("hook_queue_workers", 4)))
+        return [asyncio.create_task(consume()) for _ in range(workers)]
+
+    def _defer_for_circuit(self, host: str) -> bool:
+        """
+        With circuit_open_action "defer": True (and the host paused until its next probe) if its
+        circuit refuses requests.
+        """
+        if self.settings.get("circuit_open_action", "fail") != "defer" or not self.circuit_blocked(host):
+            return False
+        self.host_scheduler.pause(host, self.circuit_breaker.retry_in(host))
+        return True
 
-            links.append(
-                {
-                    "target": full_url,
-                    "anchor_text": anchor_text,
-                    "source_chunk": f"{page_id}_chunk_{i}" if page_id is not None else f"chunk_{i}",
-                }
-            )
-            i += 1
-
-        return links
-
-    async def extract_links_async(self, page_content: str, base_url: str, page_id=None) -> list:
-        soup = BeautifulSoup(page_content, "html.parser")
-        links = []
-        seen = set()
+    async def _circuit_open_error(self, url: str, host: str, page_ctx: dict) -> list:
+        """Fail url fast because its host's circuit is open; hooks get the circuit state as context["circuit"]."""
+        self.logger.info(f"Skipping {url} - circuit open for {host}.")
+        self.metrics.record_error("circuit_open")
+        page_ctx.update(host=host, circuit=self.circuit_breaker.host_stats(host))
+        await self._run_hook_event_async("on_page_error", url, "circuit_open", page_ctx)
+        return []
 
-        i = 0
-        for anchor in soup.find_all("a", href=True):
-            full_url = urljoin(base_url, anchor["href"])
-            full_url = self._strip_fragment(full_url)
-            if not self._is_http(full_url):
-                continue
-            if full_url in seen:
-                continue
-            seen.add(full_url)
+    async def _page_skipped(self, url: str, reason: str, page_ctx: dict):
+        self.metrics.record_skip(reason)
+        await self._run_hook_event_async("on_page_skipped", url, reason, page_ctx)
 
-            anchor_text = anchor.get_text(strip=True)
-            if not await self._allow_discovered_link_async(base_url, full_url, anchor_text):
-                continue
+    def _claim_alias(self, url: str, alias: str) -> bool:
+        """
+        Mark alias (a redirect target or rel=canonical URL of url) as visited, so it is not
+        fetched again. False if it was already visited: url is a duplicate of a crawled page.
+        """
+        key = self.url_key(alias)
+        if key in self.visited:
+            self.logger.info(f"Skipping {url} (same page as already crawled {key})")
+            return False
+        self.visited.add(key)
+        if self._checkpoint is not None:
+            self._checkpoint.record_done(key)
+        return True
 
-            links.append(
-                {
-                    "target": full_url,
-                    "anchor_text": anchor_text,
-                    "source_chunk": f"{page_id}_chunk_{i}" if page_id is not None else f"chunk_{i}",
-                }
-            )
-            i += 1
+    async def _reuse_unchanged_page(self, url: str, page_ctx: dict) -> list[str]:
+        """A 304 answer: rebuild the page's graph row from the validator cache instead of re-parsing."""
+        entry = self.validator_cache.get(self._validator_key(url)) if self.validator_cache else None
+        links = (entry or {}).get("links") or []
+        digest = (entry or {}).get("content_hash")
+        if digest and self.settings.get("deduplicate_content", True) and digest not in self.content_hashes:
+            self.content_hashes.add(digest)
+            if self._checkpoint is not None:
+                self._checkpoint.record_content_hash(digest)
+        self.logger.info(f"Unchanged since last crawl: {url}")
+        await self._page_skipped(url, "not_modified", page_ctx)
+        self.graph[url] = links
+        return [link["target"] for link in links]
+
+    def _link_record(self, full_url: str, anchor_text: str, i: int, page_id=None) -> dict:
+        return {
+            "target": full_url,
+            "anchor_text": anchor_text,
+            "source_chunk": f"{page_id}_chunk_{i}" if page_id is not None else f"chunk_{i}",
+        }
 
-        return links
+    def _canonical_links(self, document: PageDocument):
+        """(url_key, anchor_text) for the page's links, first occurrence of each key."""
+        seen = set()
+        for full_url, anchor_text in document.links:
+            key = self.url_key(full_url)
+            if key not in seen:
+                seen.add(key)
+                yield key, anchor_text
+
+    def extract_links(
+        self, page_content: str, base_url: str, page_id=None, document: PageDocument | None = None
+    ) -> list:
+        document = document or self._make_document(base_url, page_content)
+        kept = self._filter_discovered_links(base_url, list(self._canonical_links(document)))
+        return [self._link_record(full_url, anchor_text, i, page_id) for i, (full_url, anchor_text) in enumerate(kept)]
+
+    async def extract_links_async(
+        self, page_content: str, base_url: str, page_id=None, document: PageDocument | None = None
+    ) -> list:
+        document = document or self._make_document(base_url, page_content)
+        kept = await self._filter_discovered_links_async(base_url, list(self._canonical_links(document)))
+        return [self._link_record(full_url, anchor_text, i, page_id) for i, (full_url, anchor_text) in enumerate(kept)]
+
+    def _flush_results(self):
+        if self._results_writer is not None:
+            self._results_writer.flush()
 
     def _save_result(self, result: dict):
         if not isinstance(result, dict):
@@ -377,12 +909,18 @@ class Atlas(BaseAgent):
         if "url" not in result:
             self.logger.debug(f"Skipping result due to missing fields: {result}")
             return
-        if self.settings["save_results"]:
+        if not self.settings["save_results"]:
+            return
+        if self._results_writer is not None:
+            self._results_writer.write(result)
+        else:
             save_jsonl_line(self.results_path, result)
 
     def process_data(self, data, file_path=None):
         if file_path is None:
             file_path = os.path.join(self.settings["storage_path"], "graph.json")
+        if isinstance(data, CompactLinkGraph):
+            data = data.to_dict()
         save_json(file_path, data)
 
     def get_graph(self):
@@ -0,0 +1,162 @@
+"""
+One crawl as N host-sharded Atlas processes, merged at the end:
+
+    from agents.atlas.sharded import crawl_sharded
+
+    graph = crawl_sharded("https://example.com", {"crawl_entire_website": True}, shards=4)
+
+Each shard process runs its own Atlas engine (event loop, connection pool, host scheduler)
+over the hosts it owns, writing per-shard files (results.shard0.jsonl, graph.shard0.json and
+shard-suffixed checkpoint / cache files). Links to other shards' hosts travel through the
+shard queue (a SQLite file in storage_path by default). When every shard is done, the graphs and
+results are merged into graph.json and results.jsonl.
+
+Across machines: give every machine the same ShardQueue backend and total shard count, reset
+the queue once, run crawl_sharded(..., shard_indexes=[...]) with each machine's share of the
+indexes, then call merge_shard_outputs() where all shards' storage_path files are visible.
+"""
+
+import asyncio
+import json
+import multiprocessing
+import os
+import shutil
+from multiprocessing.connection import wait
+
+from webcreeper.agents.atlas.atlas import Atlas
+from webcreeper.creeper_core.sharding import make_shard_queue
+from webcreeper.creeper_core.storage import existing_parts, insert_suffix, output_path, save_json
+
+# File settings that must not be shared between shard processes.
+SHARD_LOCAL_PATHS = (
+    "checkpoint_path",
+    "frontier_spill_path",
+    "http_cache_path",
+    "robots_cache_path",
+    "metrics_prometheus_path",
+)
+
+
+def shard_path(path: str, index: int) -> str:
+    """results.jsonl -> results.shard3.jsonl"""
+    return insert_suffix(path, f"shard{index}")
+
+
+def _storage_path(settings: dict) -> str:
+    return settings.get("storage_path") or Atlas.DEFAULT_SETTINGS["storage_path"]
+
+
+def _results_path(settings: dict) -> str:
+    filename = settings.get("results_filename") or Atlas.DEFAULT_SETTINGS["results_filename"]
+    return output_path(os.path.join(_storage_path(settings), filename), settings.get("results_compression"))
+
+
+def shard_settings(settings: dict, index: int, count: int, queue) -> dict:
+    """Settings for shard `index`: shard fields set, per-shard file names for everything written locally."""
+    out = dict(settings)
+    out.update(shard_index=index, shard_count=count, shard_queue=queue)
+    out["results_filename"] = shard_path(
+        settings.get("results_filename") or Atlas.DEFAULT_SETTINGS["results_filename"], index
+    )
+    for key in SHARD_LOCAL_PATHS:
+        if settings.get(key):
+            out[key] = shard_path(settings[key], index)
+    return out
+
+
+def run_shard(start_url: str, settings: dict, index: int, count: int, queue, hooks=None) -> dict:
+    """Crawl shard `index` of `count` in this process; its graph is saved as graph.shard{index}.json."""
+    atlas = Atlas(settings=shard_settings(settings, index, count, queue))
+    asyncio.run(atlas.crawl_async(start_url, hooks=hooks))
+    atlas.process_data(atlas.get_graph(), shard_path(os.path.join(_storage_path(settings), "graph.json"), index))
+    return {"shard": index, "pages": len(atlas.graph), "counters": atlas.get_metrics()["counters"]}
+
+
+def _shard_process(conn, *args):
+    try:
+        conn.send(("ok", run_shard(*args)))
+    except BaseException as e:  # reported by the parent
+        conn.send(("error", f"{type(e).__name__}: {e}"))
+    finally:
+        conn.close()
+
+
+def crawl_sharded(
+    start_url: str,
+    settings: dict | None = None,
+    shards: int = 4,
+    queue=None,
+    shard_indexes=None,
+    hooks=None,
+) -> dict:
+    """
+    Crawl start_url with `shards` host-sharded Atlas processes (all of them, or `shard_indexes`
+    when the rest run elsewhere). `queue` is a ShardQueue or SQLite path (default:
+    storage_path/shards.sqlite); `hooks` must be picklable. Returns the merged graph when all
+    shards ran here, else {} (merge with merge_shard_outputs once every machine is done).
+    """
+    settings = dict(settings or {})
+    queue = make_shard_queue(queue if queue is not None else os.path.join(_storage_path(settings), "shards.sqlite"))
+    indexes = list(range(shards)) if shard_indexes is None else list(shard_indexes)
+    if shard_indexes is None and not settings.get("resume"):
+        queue.reset()  # a resumed crawl keeps the links still in flight between shards
+    queue.close()
+
+    ctx = multiprocessing.get_context("spawn")
+    running = []
+    for index in indexes:
+        parent, child = ctx.Pipe(duplex=False)
+        proc = ctx.Process(target=_shard_process, args=(child, start_url, settings, index, shards, queue, hooks))
+        proc.start()
+        child.close()
+        running.append((index, proc, parent))
+
+    # Wait on every shard at once: a failed shard must be noticed whichever one it is, since
+    # the others would wait for it to go idle forever.
+    errors = []
+    pending = {index: (proc, conn) for index, proc, conn in running}
+    while pending and not errors:
+        ready = set(wait([conn for _, conn in pending.values()] + [proc.sentinel for proc, _ in pending.values()]))
+        for index, (proc, conn) in list(pending.items()):
+            if conn not in ready and proc.sentinel not in ready:
+                continue
+            try:
+                status, payload = conn.recv() if conn.poll() else ("error", None)
+            except EOFError:  # died without reporting
+                status, payload = "error", None
+            proc.join()
+            conn.close()
+            del pending[index]
+            if status == "ok" and proc.exitcode != 0:
+                status, payload = "error", None
+            if status == "error":
+                errors.append(f"shard {index}: {payload or f'exited with code {proc.exitcode}'}")
+    for proc, conn in pending.values():
+        proc.terminate()
+        proc.join()
+        conn.close()
+    if errors:
+        raise RuntimeError("Sharded crawl failed: " + "; ".join(errors))
+    return merge_shard_outputs(settings, shards) if shard_indexes is None else {}
+
+
+def merge_shard_outputs(settings: dict, shards: int) -> dict:
+    """Merge graph.shard{i}.json into graph.json and the shards' results into one results file."""
+    storage_path = _storage_path(settings)
+    graph = {}
+    for index in range(shards):
+        path = shard_path(os.path.join(storage_path, "graph.json"), index)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                graph.update(json.load(f))
+    save_json(os.path.join(storage_path, "graph.json"), graph)
+
+    if settings.get("save_results", True):
+        results_path = _results_path(settings)
+        # Plain, gzip and zstd files all stay valid when concatenated.
+        with open(results_path, "wb") as out:
+            for index in range(shards):
+                for part in existing_parts(shard_path(results_path, index)):
+                    with open(part, "rb") as f:
+                        shutil.copyfileobj(f, out)
+    return graph
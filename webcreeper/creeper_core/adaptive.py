@@ -0,0 +1,211 @@
+"""
+Adaptive per-host concurrency and pacing, AIMD style (as in TCP congestion control).
+
+For each host the controller keeps a concurrency limit and a pacing delay, and writes both into
+the HostScheduler:
+  - additive increase: after a window of `limit` healthy responses, the limit grows by one and
+    the delay shrinks towards the host's floor
+  - multiplicative decrease: pushback (429 / 503, Retry-After), transient errors (timeouts,
+    5xx) or latency above `latency_factor` x the host's baseline cut the limit by
+    `decrease_factor` and double the delay. Signals within one round trip of a cut are
+    ignored, so a burst of errors from requests already in flight counts once
+The delay never drops below the floor: `min_delay`, or the host's robots.txt Crawl-delay.
+"""
+
+import time
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+
+from webcreeper.creeper_core.metrics import format_gauge
+
+PUSHBACK_STATUSES = frozenset({429, 503})
+
+
+def parse_retry_after(value, now: float | None = None) -> float | None:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date); None if absent or invalid."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if when is None:
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, when.timestamp() - (time.time() if now is None else now))
+
+
+class _HostControl:
+    __slots__ = (
+        "limit",
+        "delay",
+        "floor",
+        "latency",
+        "baseline",
+        "error_rate",
+        "healthy",
+        "hold_until",
+        "increases",
+        "decreases",
+        "pushbacks",
+    )
+
+    def __init__(self, limit: float, delay: float, floor: float):
+        self.limit = limit
+        self.delay = delay
+        self.floor = floor
+        self.latency = None  # EWMA of response latency (seconds to headers)
+        self.baseline = None  # lowest recent latency: the host's uncongested round trip
+        self.error_rate = 0.0  # EWMA of transient errors per response
+        self.healthy = 0  # healthy responses since the last change
+        self.hold_until = 0.0  # no decrease before this (monotonic)
+        self.increases = 0
+        self.decreases = 0
+        self.pushbacks = 0
+
+
+class AdaptiveController:
+    """
+    AIMD controller over a HostScheduler's per-host limits and delays. Feed it every response
+    with on_response() and every failed request with on_error().
+    """
+
+    ALPHA = 0.3  # EWMA weight of a new latency / error sample
+    BASELINE_DRIFT = 0.02  # how fast the baseline follows latencies above it
+    LATENCY_FLOOR = 0.05  # seconds; faster responses never count as congestion
+    DELAY_STEP = 0.1  # seconds; first delay after a cut when the host was unpaced
+    DELAY_SHRINK = 0.8  # delay factor per additive increase
+
+    def __init__(
+        self,
+        scheduler,
+        min_limit: int = 1,
+        max_limit: int = 10,
+        initial_limit: int = 1,
+        min_delay: float = 0.0,
+        max_delay: float = 30.0,
+        latency_factor: float = 2.0,
+        decrease_factor: float = 0.5,
+    ):
+        self.scheduler = scheduler
+        self.min_limit = max(1, int(min_limit))
+        self.max_limit = max(self.min_limit, int(max_limit))
+        self.initial_limit = min(self.max_limit, max(self.min_limit, int(initial_limit)))
+        self.min_delay = max(0.0, float(min_delay))
+        self.max_delay = max(self.min_delay, float(max_delay))
+        self.latency_factor = float(latency_factor)
+        self.decrease_factor = min(1.0, max(0.0, float(decrease_factor)))
+        self._hosts = {}  # host -> _HostControl
+        # New hosts start at the initial limit before their first response.
+        scheduler.max_per_host = self.initial_limit
+
+    def _state(self, host: str) -> _HostControl:
+        state = self._hosts.get(host)
+        if state is None:
+            # Start from the configured pacing (rate_limit_delay, or a Crawl-delay already applied).
+            delay = min(self.max_delay, max(self.min_delay, self.scheduler.get_delay(host)))
+            state = _HostControl(float(self.initial_limit), delay, self.min_delay)
+            self._hosts[host] = state
+            self._apply(host, state)
+        return state
+
+    def _apply(self, host: str, state: _HostControl):
+        self.scheduler.set_limit(host, max(self.min_limit, int(state.limit)))
+        self.scheduler.set_delay(host, state.delay)
+
+    def set_floor(self, host: str, delay: float):
+        """Never pace `host` faster than one request per `delay` seconds (e.g. its Crawl-delay)."""
+        state = self._state(host)
+        state.floor = max(self.min_delay, float(delay))
+        if state.delay < state.floor:
+            state.delay = state.floor
+            self._apply(host, state)
+
+    # -------------------- signals --------------------
+
+    def on_response(self, host: str, status: int, latency: float, retry_after: float | None = None):
+        """A response arrived `latency` seconds (to headers) after the request was sent."""
+        state = self._state(host)
+        pushback = status in PUSHBACK_STATUSES or (retry_after is not None and status >= 400)
+        error = status >= 500
+        state.error_rate += self.ALPHA * ((1.0 if error else 0.0) - state.error_rate)
+        if pushback:
+            state.pushbacks += 1
+        if pushback or error:
+            self._decrease(host, state)
+            return
+
+        state.latency = latency if state.latency is None else state.latency + self.ALPHA * (latency - state.latency)
+        if state.baseline is None or latency < state.baseline:
+            state.baseline = latency
+        else:
+            state.baseline += self.BASELINE_DRIFT * (latency - state.baseline)
+        if state.latency > max(self.latency_factor * state.baseline, self.LATENCY_FLOOR):
+            self._decrease(host, state)
+            return
+
+        state.healthy += 1
+        if state.healthy >= int(state.limit):
+            self._increase(host, state)
+
+    def on_error(self, host: str):
+        """A request to host failed without a response (timeout, connection error)."""
+        state = self._state(host)
+        state.error_rate += self.ALPHA * (1.0 - state.error_rate)
+        self._decrease(host, state)
+
+    def _increase(self, host: str, state: _HostControl):
+        state.healthy = 0
+        limit = min(float(self.max_limit), state.limit + 1)
+        delay = max(state.floor, state.delay * self.DELAY_SHRINK)
+        if delay < state.floor + self.DELAY_STEP / 10:
+            delay = state.floor
+        if limit != state.limit or delay != state.delay:
+            state.limit, state.delay = limit, delay
+            state.increases += 1
+            self._apply(host, state)
+
+    def _decrease(self, host: str, state: _HostControl):
+        state.healthy = 0
+        now = time.monotonic()
+        if now < state.hold_until:
+            return  # sent before the last cut took effect
+        state.limit = max(float(self.min_limit), state.limit * self.decrease_factor)
+        state.delay = min(self.max_delay, max(state.delay * 2, state.floor + self.DELAY_STEP))
+        state.decreases += 1
+        state.hold_until = now + (state.latency or 0.0) + state.delay
+        self._apply(host, state)
+
+    # -------------------- diagnostics --------------------
+
+    def stats(self) -> dict:
+        """Per-host limit, delay, floor, latency EWMA / baseline, error rate and change counts."""
+        return {
+            host: {
+                "limit": max(self.min_limit, int(state.limit)),
+                "delay": state.delay,
+                "floor": state.floor,
+                "latency": state.latency or 0.0,
+                "baseline_latency": state.baseline or 0.0,
+                "error_rate": state.error_rate,
+                "increases": state.increases,
+                "decreases": state.decreases,
+                "pushbacks": state.pushbacks,
+            }
+            for host, state in self._hosts.items()
+        }
+
+    def to_prometheus(self, prefix: str = "webcreeper") -> str:
+        """Per-host limit and delay as Prometheus gauges."""
+        stats = sorted(self.stats().items())
+        limits = [({"host": host}, st["limit"]) for host, st in stats]
+        delays = [({"host": host}, st["delay"]) for host, st in stats]
+        return format_gauge(
+            prefix, "host_concurrency_limit", "Adaptive in-flight request limit per host.", limits
+        ) + format_gauge(prefix, "host_delay_seconds", "Adaptive pacing delay per host.", delays)
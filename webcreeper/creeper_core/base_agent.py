@@ -1,29 +1,54 @@
 import re
 import time
-import urllib.robotparser as robotparser
 import asyncio
 import inspect
 from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
 from typing import Any
-from urllib.parse import parse_qs, parse_qsl, urlencode, urlparse, urlunparse
+from urllib.parse import parse_qs, urlparse
 
 import httpx
 import requests
 
-from webcreeper.creeper_core.utils import configure_logging
+from webcreeper.creeper_core.adaptive import AdaptiveController, parse_retry_after
+from webcreeper.creeper_core.breaker import CircuitBreaker
+from webcreeper.creeper_core.canonical import UrlCanonicalizer
+from webcreeper.creeper_core.hooks import (
+    call_page_hook,
+    filter_links,
+    handles_pages,
+    is_async_page_hook,
+    overrides,
+    wants_every_page,
+)
+from webcreeper.creeper_core.metrics import CrawlMetrics
+from webcreeper.creeper_core.policy import UrlPolicy, norm_host
+from webcreeper.creeper_core.robots import MISSING, RobotsCache, RobotsPending
+from webcreeper.creeper_core.scheduler import HostScheduler
+from webcreeper.creeper_core.sitemap import MAX_SITEMAP_BYTES, SitemapError, SitemapParser
+from webcreeper.creeper_core.urlset import make_url_set
+from webcreeper.creeper_core.validators import FetchResult, ValidatorCache
+from webcreeper.creeper_core.utils import configure_logging, strip_fragment
 
 
 class BaseAgent(ABC):
     """
     A polite, resilient crawling base:
       - Session pooling, optional proxies, custom headers
-      - Robots.txt (toggle via respect_robots)
+      - Robots.txt (toggle via respect_robots): TTL cache, non-blocking async fetch, Crawl-delay
       - Domain allow/deny with optional subdomain support
       - Heuristics (max URL length, tracking params)
       - Regex allow/block lists
-      - Per-host rate limiting
-      - Retries with backoff on transient errors
-      - URL normalization (strip fragments, drop tracking params, sort query)
+      - Per-host rate limiting (token buckets, per-host concurrency caps, fair host rotation)
+      - Retries with backoff on transient errors; Retry-After pauses the host
+      - Optional adaptive per-host concurrency and pacing (AIMD on latency, errors and pushback)
+      - Optional per-host circuit breaker: failing hosts are cut off, then probed
+      - Pooled async HTTP client (keep-alive, optional HTTP/2)
+      - Conditional GET (ETag / Last-Modified) against a local validator cache
+      - Canonical URL keys, LRU-cached (strip fragments, drop tracking params, sort query)
+      - Memory-bounded visited/seen URL sets (exact set, 64-bit fingerprints or Bloom filter)
+      - Crawl metrics: counters and per-phase latency histograms (get_metrics, Prometheus text)
+      - Streaming sitemap / sitemap index reader (gzip aware), Sitemap: lines from robots.txt
     """
 
     # Safe fallback defaults (subclasses like Atlas can override with their own DEFAULT_SETTINGS)
@@ -36,7 +61,30 @@ class BaseAgent(ABC):
         "backoff_factor": 0.5,  # seconds * (2**attempt)
         "status_forcelist": [429, 500, 502, 503, 504],
         "rate_limit_delay": 0.2,  # seconds between requests per host
+        "rate_limit_burst": 1,  # requests a host may receive back-to-back before pacing applies
+        "max_concurrency_per_host": None,  # in-flight requests per host (None = no per-host cap)
+        "respect_retry_after": True,  # pause a host for the Retry-After of its 429 / 503 responses
+        "max_retry_after": 120.0,  # seconds; cap on a Retry-After pause (None = no cap)
+        "adaptive_concurrency": False,  # adjust each host's concurrency and delay from latency, errors and pushback
+        "adaptive_initial_per_host": 1,  # in-flight requests per host before its first response
+        "adaptive_max_per_host": None,  # upper bound (None = max_concurrency_per_host, else max_concurrency)
+        "adaptive_min_delay": 0.0,  # seconds; pacing floor (a host's robots.txt Crawl-delay raises it)
+        "adaptive_max_delay": 30.0,  # seconds; pacing ceiling under sustained pushback
+        "adaptive_latency_factor": 2.0,  # latency above this x the host's baseline counts as congestion
+        "circuit_breaker": False,  # stop sending requests to hosts that keep failing (see creeper_core.breaker)
+        "circuit_failure_threshold": 5,  # failures (timeouts, connection errors, 5xx) that can open a host's circuit
+        "circuit_failure_rate": 0.5,  # ... when they are at least this share of the host's recent requests
+        "circuit_window": 20,  # recent requests per host the failure rate is measured over
+        "circuit_open_seconds": 30.0,  # wait before probing an open host; doubles per failed probe
+        "circuit_max_open_seconds": 600.0,
+        "circuit_probes": 1,  # requests let through to a half-open host at a time
+        "circuit_open_action": "fail",  # URLs of an open host: "fail" (fast, reported) or "defer" (wait for it)
         "respect_robots": True,  # honor robots.txt
+        "robots_cache_ttl": 86400,  # seconds a fetched robots.txt stays valid
+        "robots_cache_path": None,  # JSON file to persist robots.txt between runs
+        "respect_crawl_delay": True,  # slow a host down to its robots.txt Crawl-delay / Request-rate
+        "max_crawl_delay": 60.0,  # seconds; cap on what robots.txt may ask for (None = no cap)
+        "sitemap_max_bytes": MAX_SITEMAP_BYTES,  # per sitemap file, after gunzip (None = no limit)
         "allowed_domains": [],  # exact hosts (or apex if allow_subdomains=True)
         "blocked_domains": [],  # explicit deny
         "allow_subdomains": False,  # exact host by default
@@ -50,31 +98,101 @@ class BaseAgent(ABC):
         "strip_tracking_params": True,  # drop common tracking params
         "tracking_param_prefixes": ["utm_"],
         "tracking_params": ["gclid", "fbclid", "msclkid", "igshid"],
+        "url_key_cache_size": 65536,  # LRU size for canonical URL keys
         "headers": {},  # extra headers to merge
         "proxies": None,  # requests proxies dict
         "follow_redirects": True,  # requests allow_redirects
-        "max_content_length": None,  # bytes; skip if response declares larger
+        "max_content_length": None,  # bytes; skip if declared larger, abort download once exceeded
+        "accept_content_types": None,  # media types to download (e.g. ["text/html"]); others skip the body
+        "verify_ssl": True,  # verify TLS certificates (async client)
+        "http2": False,  # async client; requires the optional 'h2' package
+        "max_connections": 100,  # async client pool size
+        "max_keepalive_connections": 20,  # idle connections kept open for reuse
+        "keepalive_expiry": 30.0,  # seconds an idle pooled connection is kept
+        "url_set": "set",  # visited/seen URL store: "set" (exact), "fingerprint" (64-bit hashes), "bloom"
+        "url_set_error_rate": 0.001,  # "bloom" only: target false-positive rate
+        "url_set_capacity": 100_000,  # initial sizing hint for "fingerprint" / "bloom"
+        "http_cache_path": None,  # SQLite file of ETag/Last-Modified validators; enables conditional GET
+        "collect_metrics": True,  # counters and per-phase latency histograms (see get_metrics)
     }
 
     def __init__(self, settings: dict = {}):
         self.settings = {**self.DEFAULT_SETTINGS, **getattr(self, "DEFAULT_SETTINGS", {}), **settings}
         self.logger = configure_logging(self.__class__.__name__)
-        self.robots_cache = {}  # host -> RobotFileParser (or None if unavailable)
-        self.blacklist = set()
-        self.visited = set()
+        self.robots_cache = RobotsCache(
+            ttl=self.settings.get("robots_cache_ttl", 86400),
+            path=self.settings.get("robots_cache_path"),
+        )
+        self._robots_paced = set()  # hosts whose Crawl-delay was already applied
+        cache_path = self.settings.get("http_cache_path")
+        self.validator_cache = ValidatorCache(cache_path) if cache_path else None
+        self.revalidate = True  # send conditional GETs; off while a page handler needs every page
+        self.blacklist = self.new_url_set()
+        self.visited = self.new_url_set()
         self.hooks = []
+        self._hook_executor = None  # pool for synchronous on_page hooks (see Atlas hook_executor)
         self.disallowed_reasons = {}  # url -> [reasons]
+        self.canonicalizer = UrlCanonicalizer.from_settings(self.settings)
 
         # Compile patterns
         self.skip_url_patterns = [re.compile(p) for p in self.settings.get("skip_url_patterns", [])]
         self.allow_url_patterns = [re.compile(p) for p in self.settings.get("allow_url_patterns", [])]
         self.block_url_patterns = [re.compile(p) for p in self.settings.get("block_url_patterns", [])]
+        self._url_policy = None  # compiled on first use (see url_policy)
 
         # HTTP session (connection pooling)
         self.session = requests.Session()
 
+        # Async HTTP client, shared for the lifetime of a crawl (see open_async_client)
+        self._async_client = None
+        self._ssl_context = None
+
+        # Counters and latency histograms (see get_metrics)
+        self.metrics = CrawlMetrics(enabled=bool(self.settings.get("collect_metrics", True)))
+
         # Per-host rate limiting
-        self._last_fetch = {}  # host -> timestamp
+        self._last_fetch = {}  # host -> timestamp (sync fetch)
+        self.host_scheduler = HostScheduler(
+            delay=float(self.settings.get("rate_limit_delay", 0.0) or 0.0),
+            burst=float(self.settings.get("rate_limit_burst", 1) or 1),
+            max_per_host=self.settings.get("max_concurrency_per_host"),
+            metrics=self.metrics,
+        )
+        self.adaptive_control = self._make_adaptive_control()
+        self.circuit_breaker = self._make_circuit_breaker()
+
+    def _make_adaptive_control(self) -> AdaptiveController | None:
+        if not self.settings.get("adaptive_concurrency", False):
+            return None
+        max_limit = (
+            self.settings.get("adaptive_max_per_host")
+            or self.settings.get("max_concurrency_per_host")
+            or self.settings.get("max_concurrency")
+            or 10
+        )
+        return AdaptiveController(
+            self.host_scheduler,
+            max_limit=int(max_limit),
+            initial_limit=int(self.settings.get("adaptive_initial_per_host", 1) or 1),
+            min_delay=float(self.settings.get("adaptive_min_delay", 0.0) or 0.0),
+            max_delay=float(self.settings.get("adaptive_max_delay", 30.0)),
+            latency_factor=float(self.settings.get("adaptive_latency_factor", 2.0)),
+        )
+
+    def _make_circuit_breaker(self) -> CircuitBreaker | None:
+        if not self.settings.get("circuit_breaker", False):
+            return None
+        action = self.settings.get("circuit_open_action", "fail")
+        if action not in ("fail", "defer"):
+            raise ValueError(f"circuit_open_action must be 'fail' or 'defer', not {action!r}")
+        return CircuitBreaker(
+            failure_threshold=self.settings.get("circuit_failure_threshold", 5),
+            failure_rate=self.settings.get("circuit_failure_rate", 0.5),
+            window=self.settings.get("circuit_window", 20),
+            open_seconds=self.settings.get("circuit_open_seconds", 30.0),
+            max_open_seconds=self.settings.get("circuit_max_open_seconds", 600.0),
+            probes=self.settings.get("circuit_probes", 1),
+        )
 
     # -------------------- abstract API --------------------
 
@@ -88,40 +206,35 @@ class BaseAgent(ABC):
 
     # -------------------- URL & domain utils --------------------
 
+    def new_url_set(self):
+        """Empty URL membership set of the configured `url_set` kind (supports add / in / len / update)."""
+        return make_url_set(
+            self.settings.get("url_set", "set"),
+            error_rate=float(self.settings.get("url_set_error_rate", 0.001)),
+            initial_capacity=int(self.settings.get("url_set_capacity", 100_000)),
+        )
+
     def _strip_fragment(self, url: str) -> str:
-        parts = list(urlparse(url))
-        parts[5] = ""  # fragment
-        return urlunparse(parts)
+        return strip_fragment(url)
 
     def _norm_host(self, host: str) -> str:
-        if not host:
-            return ""
-        host = host.strip().lower().split(":", 1)[0]
-        return host[4:] if host.startswith("www.") else host
+        return norm_host(host)
+
+    def url_key(self, url: str) -> str:
+        """Canonical identity of a URL (see creeper_core.canonical); cached."""
+        return self.canonicalizer.key(url)
+
+    def url_fingerprint(self, url: str) -> int:
+        """64-bit fingerprint of url_key(url)."""
+        return self.canonicalizer.fingerprint(url)
 
     def _normalize_url(self, url: str) -> str:
         """Normalize a URL: lower scheme/host, strip fragment, drop tracking, optionally sort query."""
-        if not url:
-            return url
-        p = urlparse(url)
-        scheme = p.scheme.lower()
-        netloc = self._norm_host(p.netloc)
-        path = p.path or "/"
-        query_pairs = parse_qsl(p.query, keep_blank_values=True)
-
-        if self.settings.get("strip_tracking_params", True):
-            prefixes = tuple((self.settings.get("tracking_param_prefixes") or []))
-            drop = set(self.settings.get("tracking_params") or [])
-            query_pairs = [
-                (k, v) for (k, v) in query_pairs if (not k.lower().startswith(prefixes)) and (k.lower() not in drop)
-            ]
-
-        if self.settings.get("normalize_query", True) and query_pairs:
-            query_pairs.sort(key=lambda kv: kv[0].lower())
-
-        query = urlencode(query_pairs, doseq=True)
-        parts = (scheme, netloc, path, p.params, query, "")  # empty fragment
-        return urlunparse(parts)
+        return self.canonicalizer.key(url)
+
+    def _host_key(self, url: str) -> str:
+        """Politeness key for a URL: the host fetch_async paces on (normalized, non-default port kept)."""
+        return urlparse(self._normalize_url(url)).netloc
 
     def get_home_url(self, url: str) -> str:
         parsed_url = urlparse(url)
@@ -129,7 +242,7 @@ class BaseAgent(ABC):
 
     # -------------------- robots.txt --------------------
 
-    def fetch_robots_txt(self, url: str):
+    def _download_robots_txt(self, url: str) -> tuple[int, str | None]:
         home_url = self.get_home_url(url)
         robots_url = f"{home_url}/robots.txt"
 
@@ -144,28 +257,91 @@ class BaseAgent(ABC):
                 proxies=self.settings.get("proxies"),
             )
             if resp.status_code == 200 and resp.text:
-                rp = robotparser.RobotFileParser()
-                rp.parse(resp.text.splitlines())
                 self.logger.info("Successfully fetched robots.txt")
-                return rp
             else:
                 self.logger.warning(f"No robots.txt or not 200 at {robots_url} (status {resp.status_code})")
-                return None
+            return resp.status_code, resp.text
         except requests.exceptions.RequestException as e:
             self.logger.error(f"Error accessing robots.txt: {e}")
-            return None
+            return 0, None
+
+    async def _download_robots_txt_async(self, url: str) -> tuple[int, str | None]:
+        home_url = self.get_home_url(url)
+        robots_url = f"{home_url}/robots.txt"
+
+        try:
+            self.logger.info(f"Fetching robots.txt async from: {home_url}")
+            if self._async_client is not None:
+                resp = await self._async_client.get(robots_url)
+            else:
+                async with self._build_async_client() as client:
+                    resp = await client.get(robots_url)
+            if resp.status_code == 200 and resp.text:
+                self.logger.info("Successfully fetched robots.txt")
+            else:
+                self.logger.warning(f"No robots.txt or not 200 at {robots_url} (status {resp.status_code})")
+            return resp.status_code, resp.text
+        except httpx.HTTPError as e:
+            self.logger.error(f"Error accessing robots.txt: {e}")
+            return 0, None
+
+    def fetch_robots_txt(self, url: str):
+        return RobotsCache.parse(*self._download_robots_txt(url))
+
+    @staticmethod
+    def _on_event_loop() -> bool:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        return True
+
+    def _apply_crawl_delay(self, domain_key: str, url: str, rp):
+        """Feed robots.txt Crawl-delay / Request-rate into the host's pacing (once per host)."""
+        if rp is None or domain_key in self._robots_paced:
+            return
+        self._robots_paced.add(domain_key)
+        if not self.settings.get("respect_crawl_delay", True):
+            return
+
+        user_agent = self.settings.get("user_agent", "DefaultCrawler")
+        try:
+            delay = float(rp.crawl_delay(user_agent) or 0.0)
+            rate = rp.request_rate(user_agent)
+        except Exception:
+            return
+        if rate and rate.requests:
+            delay = max(delay, rate.seconds / rate.requests)
+        cap = self.settings.get("max_crawl_delay")
+        if cap is not None:
+            delay = min(delay, float(cap))
+
+        host = self._host_key(url)
+        if delay > self.host_scheduler.get_delay(host):
+            self.logger.info(f"Using robots.txt crawl delay of {delay:.2f}s for {host}")
+            self.host_scheduler.set_delay(host, delay)
+        if self.adaptive_control is not None:
+            self.adaptive_control.set_floor(host, delay)
 
     def is_allowed_by_robots(self, url: str) -> bool:
+        """
+        Check robots.txt for url. On a running event loop a cache miss never blocks: the fetch
+        starts in the background and RobotsPending is raised (see should_visit_async).
+        """
         if not self.settings.get("respect_robots", True):
             return True
 
         domain = self.get_home_url(url)
         domain_key = urlparse(domain).netloc
 
-        if domain_key not in self.robots_cache:
-            self.robots_cache[domain_key] = self.fetch_robots_txt(url)
+        rp = self.robots_cache.get(domain_key)
+        if rp is MISSING:
+            if self._on_event_loop():
+                task = self.robots_cache.fetch_in_background(domain_key, lambda: self._download_robots_txt_async(url))
+                raise RobotsPending(domain_key, task)
+            rp = self.robots_cache.set(domain_key, *self._download_robots_txt(url))
 
-        rp = self.robots_cache[domain_key]
+        self._apply_crawl_delay(domain_key, url, rp)
         if rp is None:
             return True  # no robots.txt = allowed
         try:
@@ -173,50 +349,52 @@ class BaseAgent(ABC):
         except Exception:
             return True
 
+    # -------------------- compiled URL policy --------------------
+
+    def _allowed_domains_for_policy(self) -> list:
+        return self.settings.get("allowed_domains", []) or []
+
+    def compile_url_policy(self) -> UrlPolicy:
+        """Build the UrlPolicy for the current settings (domains, URL patterns, path prefixes)."""
+        return UrlPolicy(
+            allowed_domains=self._allowed_domains_for_policy(),
+            blocked_domains=self.settings.get("blocked_domains", []) or [],
+            allow_subdomains=bool(self.settings.get("allow_subdomains", False)),
+            allow_patterns=self.allow_url_patterns,
+            block_patterns=self.block_url_patterns,
+            skip_patterns=self.skip_url_patterns,
+            allowed_paths=self.settings.get("allowed_paths", []) or [],
+            blocked_paths=self.settings.get("blocked_paths", []) or [],
+        )
+
+    @property
+    def url_policy(self) -> UrlPolicy:
+        if self._url_policy is None:
+            self._url_policy = self.compile_url_policy()
+        return self._url_policy
+
+    def reset_url_policy(self):
+        """Recompile the URL policy on next use; call after changing policy settings."""
+        self._url_policy = None
+
     # -------------------- domain policy --------------------
 
     def is_allowed_domain(self, url: str) -> bool:
-        allowed = self.settings.get("allowed_domains", []) or []
-        blocked = self.settings.get("blocked_domains", []) or []
-        allow_sub = self.settings.get("allow_subdomains", False)
-
-        host = urlparse(url).netloc
-        norm_host = self._norm_host(host)
-        allowed_norm = [self._norm_host(h) for h in allowed]
-        blocked_norm = [self._norm_host(h) for h in blocked]
-
-        # Blocked wins
-        for bd in blocked_norm:
-            if norm_host == bd or (allow_sub and norm_host.endswith("." + bd)):
-                return False
-
-        if not allowed_norm:
-            return True
-
-        if allow_sub:
-            return any(norm_host == h or norm_host.endswith("." + h) for h in allowed_norm)
-        else:
-            return norm_host in allowed_norm
+        return self.url_policy.host_allowed(urlparse(url).netloc)
 
     # -------------------- pattern policy --------------------
 
     def is_allowed_by_patterns(self, url: str) -> bool:
-        # Block patterns first
-        for pattern in self.block_url_patterns:
-            if pattern.search(url):
-                self.logger.info(f"URL blocked by block pattern: {pattern.pattern}")
-                return False
-
-        # Allow patterns (if provided, must match)
-        if self.allow_url_patterns:
-            for pattern in self.allow_url_patterns:
-                if pattern.search(url):
-                    return True
+        policy = self.url_policy
+        if policy.patterns_allow(url):
+            return True
+        # Rejected: find out why, for the log (rare compared to the checks above)
+        pattern = policy.block_patterns.first_match(url)
+        if pattern is not None:
+            self.logger.info(f"URL blocked by block pattern: {pattern.pattern}")
+        else:
             self.logger.info(f"URL blocked by allow patterns (no match): {url}")
-            return False
-
-        # No allow list => allowed
-        return True
+        return False
 
     # -------------------- heuristics --------------------
 
@@ -235,10 +413,11 @@ class BaseAgent(ABC):
             if "state" in {k.lower() for k in query.keys()}:
                 return True
 
-        for pattern in self.skip_url_patterns:
-            if pattern.search(norm_url) or pattern.search(path):
-                self.logger.info(f"URL skipped by pattern: {pattern.pattern}")
-                return True
+        skip_patterns = self.url_policy.skip_patterns
+        if skip_patterns and (skip_patterns.search(norm_url) or skip_patterns.search(path)):
+            pattern = skip_patterns.first_match(norm_url) or skip_patterns.first_match(path)
+            self.logger.info(f"URL skipped by pattern: {pattern.pattern}")
+            return True
 
         return False
 
@@ -252,6 +431,46 @@ class BaseAgent(ABC):
             return (t, t)
         return (float(ct or self.settings.get("timeout", 10)), float(rt or self.settings.get("timeout", 10)))
 
+    def _retry_after(self, status: int, headers) -> float | None:
+        """Seconds a 4xx / 5xx response's Retry-After asks us to wait (capped), or None."""
+        if status < 400 or not self.settings.get("respect_retry_after", True):
+            return None
+        seconds = parse_retry_after(headers.get("Retry-After"))
+        cap = self.settings.get("max_retry_after", 120.0)
+        if seconds is not None and cap is not None:
+            seconds = min(seconds, float(cap))
+        return seconds
+
+    def _observe_response(self, host: str, status: int, latency: float, headers):
+        """Feed a response into politeness: Retry-After pauses the host; the adaptive controller adjusts it."""
+        retry_after = self._retry_after(status, headers)
+        if retry_after:
+            self.logger.warning(f"{host} asked to retry after {retry_after:.1f}s (status {status}); pausing it")
+            self.host_scheduler.pause(host, retry_after)
+            self.metrics.incr("retry_after_pauses")
+        if self.adaptive_control is not None:
+            self.adaptive_control.on_response(host, status, latency, retry_after)
+        if self.circuit_breaker is not None:
+            if status >= 500:
+                self._record_host_failure(host)
+            else:
+                self.circuit_breaker.record_success(host)
+
+    def _record_host_failure(self, host: str):
+        """Count a failed request against host's circuit; log (and with "defer", pause the host) if it opens."""
+        breaker = self.circuit_breaker
+        if breaker is None or not breaker.record_failure(host):
+            return
+        wait = breaker.retry_in(host)
+        self.metrics.incr("circuit_trips")
+        self.logger.warning(f"Circuit opened for {host}: no requests for {wait:.0f}s")
+        if self.settings.get("circuit_open_action", "fail") == "defer":
+            self.host_scheduler.pause(host, wait)
+
+    def circuit_blocked(self, host: str) -> bool:
+        """True if host's circuit is open (or half-open with its probes in flight)."""
+        return self.circuit_breaker is not None and self.circuit_breaker.blocked(host)
+
     def _rate_limit_sleep(self, host: str):
         delay = float(self.settings.get("rate_limit_delay", 0.0))
         if delay <= 0:
@@ -264,6 +483,68 @@ class BaseAgent(ABC):
                 time.sleep(delay - elapsed)
         self._last_fetch[host] = time.time()
 
+    BODY_CHUNK_SIZE = 64 * 1024
+
+    def _accepts_content_type(self, content_type: str) -> bool:
+        accepted = self.settings.get("accept_content_types")
+        if not accepted or not content_type:
+            return True  # no filter, or undeclared: let the caller decide from the body
+        media_type = content_type.split(";", 1)[0].strip().lower()
+        return any(media_type == t.lower() for t in accepted)
+
+    def _check_declared_length(self, url: str, headers) -> bool:
+        """False (and url marked) when the declared Content-Length is over max_content_length."""
+        mcl = self.settings.get("max_content_length")
+        if mcl is not None:
+            try:
+                clen = int(headers.get("Content-Length", "0"))
+                if clen and clen > int(mcl):
+                    self._mark_disallowed(url, f"Content-Length {clen} > max {mcl}")
+                    return False
+            except ValueError:
+                pass
+        return True
+
+    def _body_gate(self, url: str, resp) -> tuple[bool, FetchResult | None]:
+        """
+        Decide from a 200 response's headers whether to download its body: (True, None) to read
+        it, else (False, result) with an empty FetchResult (unwanted content type) or None (too large).
+        """
+        content_type = resp.headers.get("Content-Type", "") or ""
+        if not self._accepts_content_type(content_type):
+            self.logger.info(f"Not downloading {url}: content type {content_type}")
+            return False, FetchResult(
+                "", content_type, status=resp.status_code, url=str(resp.url), headers=resp.headers
+            )
+        if not self._check_declared_length(url, resp.headers):
+            return False, None
+        return True, None
+
+    def _add_chunk(self, url: str, body: bytearray, chunk: bytes) -> bool:
+        """Append a body chunk; False (and url marked) once max_content_length is exceeded."""
+        body.extend(chunk)
+        mcl = self.settings.get("max_content_length")
+        if mcl is not None and len(body) > int(mcl):
+            self._mark_disallowed(url, f"Body exceeded max {mcl} bytes")
+            return False
+        return True
+
+    def _finish_body(self, resp, body: bytearray) -> FetchResult:
+        content_type = resp.headers.get("Content-Type", "") or ""
+        text = bytes(body).decode(resp.encoding or "utf-8", errors="replace")
+        return FetchResult(text, content_type, status=resp.status_code, url=str(resp.url), headers=resp.headers)
+
+    def _read_body(self, url: str, resp, chunks):
+        """Read a sync (requests) response body in chunks, aborting at max_content_length."""
+        download, result = self._body_gate(url, resp)
+        if not download:
+            return result
+        body = bytearray()
+        for chunk in chunks:
+            if not self._add_chunk(url, body, chunk):
+                return None
+        return self._finish_body(resp, body)
+
     def fetch(self, url: str):
         # Gate by policy first
         if not self.should_visit(url):
@@ -286,37 +567,27 @@ class BaseAgent(ABC):
             try:
                 self._rate_limit_sleep(host)
                 self.logger.info(f"Fetching: {url} (attempt {attempt+1}/{max_retries+1})")
-                resp = self.session.get(
+                with self.session.get(
                     url,
                     headers=headers,
                     timeout=self._timeouts(),
                     allow_redirects=allow_redirects,
                     proxies=proxies,
-                )
-
-                # Optional size guard (if server declares)
-                mcl = self.settings.get("max_content_length")
-                if mcl is not None:
-                    try:
-                        clen = int(resp.headers.get("Content-Length", "0"))
-                        if clen and clen > int(mcl):
-                            self._mark_disallowed(url, f"Content-Length {clen} > max {mcl}")
-                            return None
-                    except ValueError:
-                        pass
-
-                if resp.status_code == 200:
-                    content_type = resp.headers.get("Content-Type", "") or ""
-                    return resp.text, content_type
+                    stream=True,
+                ) as resp:
+                    if resp.status_code == 200:
+                        return self._read_body(url, resp, resp.iter_content(chunk_size=self.BODY_CHUNK_SIZE))
+                    status_code = resp.status_code
+                    retry_after = self._retry_after(status_code, resp.headers)
 
                 # Retry on transient codes
-                if resp.status_code in status_forcelist and attempt < max_retries:
-                    sleep_s = backoff * (2**attempt)
-                    self.logger.warning(f"Retryable status {resp.status_code} for {url}; sleeping {sleep_s:.2f}s")
+                if status_code in status_forcelist and attempt < max_retries:
+                    sleep_s = max(backoff * (2**attempt), retry_after or 0.0)
+                    self.logger.warning(f"Retryable status {status_code} for {url}; sleeping {sleep_s:.2f}s")
                     time.sleep(sleep_s)
                     continue
 
-                self.logger.warning(f"Failed to fetch {url}: Status code {resp.status_code}")
+                self.logger.warning(f"Failed to fetch {url}: Status code {status_code}")
                 return None
 
             except requests.exceptions.RequestException as e:
@@ -329,74 +600,204 @@ class BaseAgent(ABC):
                 self.blacklist.add(url)
                 return None
 
+    # -------------------- async client lifecycle --------------------
+
+    def _get_ssl_context(self):
+        # Built once per agent: loading the CA bundle is expensive, and a shared
+        # context lets every pooled connection reuse the same TLS configuration.
+        if self._ssl_context is None:
+            self._ssl_context = httpx.create_ssl_context(verify=self.settings.get("verify_ssl", True))
+        return self._ssl_context
+
+    def _build_async_client(self) -> httpx.AsyncClient:
+        headers = {"User-Agent": self.settings.get("user_agent", "DefaultCrawler")}
+        headers.update(self.settings.get("headers", {}) or {})
+
+        ct, rt = self._timeouts()
+        timeout = httpx.Timeout(connect=ct, read=rt, write=rt, pool=ct)
+        limits = httpx.Limits(
+            max_connections=self.settings.get("max_connections"),
+            max_keepalive_connections=self.settings.get("max_keepalive_connections"),
+            keepalive_expiry=self.settings.get("keepalive_expiry"),
+        )
+
+        http2 = bool(self.settings.get("http2", False))
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                self.logger.warning("http2 requested but the 'h2' package is not installed; using HTTP/1.1")
+                http2 = False
+
+        return httpx.AsyncClient(
+            headers=headers,
+            follow_redirects=self.settings.get("follow_redirects", True),
+            timeout=timeout,
+            limits=limits,
+            http2=http2,
+            verify=self._get_ssl_context(),
+        )
+
+    async def open_async_client(self) -> httpx.AsyncClient:
+        """Open the shared pooled client used by fetch_async (idempotent)."""
+        if self._async_client is None:
+            self._async_client = self._build_async_client()
+        return self._async_client
+
+    async def close_async_client(self):
+        """Close the shared pooled client, releasing all kept-alive connections."""
+        client, self._async_client = self._async_client, None
+        if client is not None:
+            await client.aclose()
+
     async def _rate_limit_sleep_async(self, host: str):
-        delay = float(self.settings.get("rate_limit_delay", 0.0))
-        if delay <= 0:
+        # Token reservation happens without awaiting, so concurrent fetches to one host
+        # get distinct, increasing slots instead of all reading the same timestamp.
+        await self.host_scheduler.pace(host)
+
+    def get_host_stats(self) -> dict:
+        """Per-host queue depth, in-flight requests, pacing delay and wait times (plus adaptive / circuit state)."""
+        stats = self.host_scheduler.stats()
+        if self.adaptive_control is not None:
+            for host, control in self.adaptive_control.stats().items():
+                stats.setdefault(host, {})["adaptive"] = control
+        if self.circuit_breaker is not None:
+            for host, circuit in self.circuit_breaker.stats().items():
+                stats.setdefault(host, {})["circuit"] = circuit
+        return stats
+
+    def get_metrics(self) -> dict:
+        """Snapshot of crawl counters, status codes, skip reasons, phase latencies and per-host stats."""
+        snapshot = self.metrics.snapshot()
+        if self.adaptive_control is not None:
+            snapshot["adaptive"] = self.adaptive_control.stats()
+        if self.circuit_breaker is not None:
+            snapshot["circuits"] = self.circuit_breaker.stats()
+        return snapshot
+
+    def get_metrics_prometheus(self, prefix: str = "webcreeper") -> str:
+        """get_metrics() in the Prometheus text exposition format."""
+        text = self.metrics.to_prometheus(prefix)
+        if self.adaptive_control is not None:
+            text += self.adaptive_control.to_prometheus(prefix)
+        return text
+
+    def _validator_key(self, url: str) -> str:
+        return self._normalize_url(url)
+
+    def remember_validators(self, url: str, fetched, content_hash: str | None = None, links=None):
+        """
+        Store a fetched page's ETag / Last-Modified (plus hash and links) for the next conditional
+        GET. Pages without validators are stored too: their download time lets a sitemap lastmod
+        tell whether they changed since.
+        """
+        if self.validator_cache is None or not isinstance(fetched, FetchResult):
             return
-        now = time.time()
-        last = self._last_fetch.get(host)
-        if last is not None:
-            elapsed = now - last
-            if elapsed < delay:
-                await asyncio.sleep(delay - elapsed)
-        self._last_fetch[host] = time.time()
+        self.validator_cache.set(self._validator_key(url), fetched.etag, fetched.last_modified, content_hash, links)
+
+    def _connect_trace(self, timings: dict):
+        """httpcore trace callback recording when a new connection started and finished connecting."""
+
+        async def trace(event_name: str, info: dict):
+            if event_name == "connection.connect_tcp.started":
+                timings["connect_start"] = time.perf_counter()
+            elif event_name in ("connection.connect_tcp.complete", "connection.start_tls.complete"):
+                timings["connect_end"] = time.perf_counter()
+
+        return trace
+
+    async def _fetch_streamed_async(self, client: httpx.AsyncClient, url: str, headers: dict):
+        """One GET, streamed: returns (status_code, FetchResult or None)."""
+        metrics = self.metrics
+        host = urlparse(url).netloc
+        timings = {}
+        extensions = {"trace": self._connect_trace(timings)} if metrics.enabled else None
+        start = time.perf_counter()
+        async with client.stream("GET", url, headers=headers, extensions=extensions) as resp:
+            headers_at = time.perf_counter()
+            metrics.observe("ttfb", headers_at - start)
+            self._observe_response(host, resp.status_code, headers_at - start, resp.headers)
+            if "connect_start" in timings:
+                metrics.observe("connect", timings.get("connect_end", headers_at) - timings["connect_start"])
+            if resp.status_code == 304 and headers:
+                metrics.record_response(host, 304, 0, headers_at - start)
+                return 304, FetchResult(
+                    None, "", status=304, url=str(resp.url), headers=resp.headers, not_modified=True
+                )
+            if resp.status_code != 200:
+                metrics.record_response(host, resp.status_code, 0, headers_at - start)
+                return resp.status_code, None
+            download, result = self._body_gate(url, resp)
+            if not download:
+                metrics.record_response(host, 200, 0, headers_at - start)
+                return 200, result
+            body = bytearray()
+            complete = True
+            async for chunk in resp.aiter_bytes():
+                if not self._add_chunk(url, body, chunk):
+                    complete = False
+                    break
+            done = time.perf_counter()
+            metrics.observe("download", done - headers_at)
+            metrics.record_response(host, 200, len(body), done - start)
+            if not complete:
+                return 200, None
+            metrics.incr("pages_fetched")
+            return 200, self._finish_body(resp, body)
 
     async def fetch_async(self, url: str):
+        """
+        Fetch a page; returns a FetchResult that unpacks as (text, content_type), or None.
+        With a validator cache, known pages are revalidated: a 304 gives `not_modified=True`.
+        """
         # Gate by policy first
-        if not self.should_visit(url):
+        if not await self.should_visit_async(url):
             return None
 
         # Normalize for request
         url = self._normalize_url(url)
         self.visited.add(url)
 
-        headers = {"User-Agent": self.settings.get("user_agent", "DefaultCrawler")}
-        headers.update(self.settings.get("headers", {}) or {})
-        allow_redirects = self.settings.get("follow_redirects", True)
         max_retries = int(self.settings.get("max_retries", 2))
         backoff = float(self.settings.get("backoff_factor", 0.5))
         status_forcelist = set(int(s) for s in (self.settings.get("status_forcelist") or []))
         host = urlparse(url).netloc
+        revalidate = self.validator_cache is not None and self.revalidate
+        conditional = self.validator_cache.conditional_headers(self._validator_key(url)) if revalidate else {}
 
-        ct, rt = self._timeouts()
-        timeout = httpx.Timeout(connect=ct, read=rt, write=rt, pool=ct)
         for attempt in range(max_retries + 1):
+            if self.circuit_breaker is not None and not self.circuit_breaker.allow(host):
+                self._mark_disallowed(url, f"Circuit open for {host}")
+                return None
             try:
                 await self._rate_limit_sleep_async(host)
                 self.logger.info(f"Fetching async: {url} (attempt {attempt+1}/{max_retries+1})")
 
-                async with httpx.AsyncClient(
-                    headers=headers,
-                    follow_redirects=allow_redirects,
-                    timeout=timeout,
-                ) as client:
-                    resp = await client.get(url)
-
-                mcl = self.settings.get("max_content_length")
-                if mcl is not None:
-                    try:
-                        clen = int(resp.headers.get("Content-Length", "0"))
-                        if clen and clen > int(mcl):
-                            self._mark_disallowed(url, f"Content-Length {clen} > max {mcl}")
-                            return None
-                    except ValueError:
-                        pass
-
-                if resp.status_code == 200:
-                    content_type = resp.headers.get("Content-Type", "") or ""
-                    return resp.text, content_type
-
-                if resp.status_code in status_forcelist and attempt < max_retries:
-                    sleep_s = backoff * (2**attempt)
-                    self.logger.warning(f"Retryable status {resp.status_code} for {url}; sleeping {sleep_s:.2f}s")
+                if self._async_client is not None:
+                    status_code, result = await self._fetch_streamed_async(self._async_client, url, conditional)
+                else:
+                    # No crawl-scoped client open: fall back to a one-off client.
+                    async with self._build_async_client() as client:
+                        status_code, result = await self._fetch_streamed_async(client, url, conditional)
+                if status_code == 200 or result is not None:
+                    return result
+
+                if status_code in status_forcelist and attempt < max_retries and not self.circuit_blocked(host):
+                    # A Retry-After pause on the host outlasts the usual backoff.
+                    sleep_s = max(backoff * (2**attempt), self.host_scheduler.paused_for(host))
+                    self.logger.warning(f"Retryable status {status_code} for {url}; sleeping {sleep_s:.2f}s")
                     await asyncio.sleep(sleep_s)
                     continue
 
-                self.logger.warning(f"Failed to fetch {url}: Status code {resp.status_code}")
+                self.logger.warning(f"Failed to fetch {url}: Status code {status_code}")
                 return None
 
             except httpx.RequestError as e:
-                if attempt < max_retries:
+                self.metrics.record_fetch_error(host, type(e).__name__)
+                if self.adaptive_control is not None:
+                    self.adaptive_control.on_error(host)
+                self._record_host_failure(host)
+                if attempt < max_retries and not self.circuit_blocked(host):
                     sleep_s = backoff * (2**attempt)
                     self.logger.warning(f"Error fetching {url}: {e}; retrying in {sleep_s:.2f}s")
                     await asyncio.sleep(sleep_s)
@@ -405,6 +806,46 @@ class BaseAgent(ABC):
                 self.blacklist.add(url)
                 return None
 
+    # -------------------- sitemaps --------------------
+
+    async def sitemaps_from_robots_async(self, url: str) -> list[str]:
+        """Sitemap URLs listed in the robots.txt of url's host (shares the robots.txt cache)."""
+        domain_key = urlparse(self.get_home_url(url)).netloc
+        rp = await self.robots_cache.get_async(domain_key, lambda: self._download_robots_txt_async(url))
+        if rp is None:
+            return []
+        return list(rp.site_maps() or [])
+
+    async def iter_sitemap_async(self, url: str):
+        """
+        Stream a sitemap or sitemap index (plain or gzipped), yielding SitemapEntry items as the
+        body arrives. A failed download yields nothing; malformed content ends the stream at the
+        first error. Requests are paced like page fetches.
+        """
+        host = urlparse(url).netloc
+        parser = SitemapParser(self.settings.get("sitemap_max_bytes", MAX_SITEMAP_BYTES))
+        owned = self._build_async_client() if self._async_client is None else None
+        client = owned or self._async_client
+        try:
+            await self._rate_limit_sleep_async(host)
+            self.logger.info(f"Fetching sitemap: {url}")
+            async with client.stream("GET", url) as resp:
+                if resp.status_code != 200:
+                    self.logger.warning(f"Failed to fetch sitemap {url}: Status code {resp.status_code}")
+                    return
+                async for chunk in resp.aiter_bytes():
+                    for entry in parser.feed(chunk):
+                        yield entry
+                for entry in parser.close():
+                    yield entry
+        except httpx.HTTPError as e:
+            self.logger.warning(f"Error fetching sitemap {url}: {e}")
+        except SitemapError as e:
+            self.logger.warning(f"Stopped reading sitemap {url}: {e}")
+        finally:
+            if owned is not None:
+                await owned.aclose()
+
     # -------------------- visit policy --------------------
 
     def should_visit(self, url: str) -> bool:
@@ -438,6 +879,14 @@ class BaseAgent(ABC):
 
         return True
 
+    async def should_visit_async(self, url: str) -> bool:
+        """should_visit for the event loop: waits for a host's robots.txt without blocking other work."""
+        while True:
+            try:
+                return self.should_visit(url)
+            except RobotsPending as pending:
+                await pending.wait()
+
     # -------------------- diagnostics --------------------
 
     def _mark_disallowed(self, url: str, reason: str):
@@ -461,6 +910,24 @@ class BaseAgent(ABC):
         context.update(extra)
         return context
 
+    def _page_handlers(self) -> list:
+        callback = getattr(self, "on_page_crawled", None)
+        return self.hooks + ([callback] if callable(callback) else [])
+
+    def skip_unchanged_pages(self) -> bool:
+        """True if every on_page handler (hooks and on_page_crawled) opted into changed_only."""
+        return not any(wants_every_page(handler) for handler in self._page_handlers())
+
+    def _sync_page_handler_deadlines(self) -> bool:
+        """True if a synchronous on_page handler has a timeout (its own, or hook_timeout)."""
+        default = self.settings.get("hook_timeout")
+        return any(
+            (getattr(handler, "timeout", None) or default)
+            and handles_pages(handler)
+            and not is_async_page_hook(handler)
+            for handler in self._page_handlers()
+        )
+
     def _normalize_hooks(self, hooks) -> list:
         if hooks is None:
             return []
@@ -529,16 +996,7 @@ class BaseAgent(ABC):
             return None
 
     def _call_hook_for_page(self, hook, url: str, html: str, context: dict):
-        if callable(hook) and not callable(getattr(hook, "on_page", None)):
-            try:
-                return hook(url, html)
-            except TypeError:
-                return hook({"url": url, "html": html})
-
-        on_page = getattr(hook, "on_page", None)
-        if callable(on_page):
-            return on_page(url, html, context)
-        return None
+        return call_page_hook(hook, url, html, context)
 
     def _collect_page_results(self, url: str, html: str, context: dict) -> list[dict]:
         results = []
@@ -559,28 +1017,95 @@ class BaseAgent(ABC):
         return results
 
     async def _collect_page_results_async(self, url: str, html: str, context: dict) -> list[dict]:
-        results = []
-
-        callback_result = await self._call_legacy_on_page_callback_async(url, html)
-        if isinstance(callback_result, dict):
-            results.append(callback_result)
-
-        for hook in self.hooks:
-            try:
-                hook_result = self._call_hook_for_page(hook, url, html, context)
-                if inspect.isawaitable(hook_result):
-                    hook_result = await hook_result
-            except Exception as e:
-                self.logger.warning(f"on_page hook failed for {url}: {e}")
-                continue
-            if isinstance(hook_result, dict):
-                results.append(hook_result)
-
-        return results
+        """
+        Run the on_page_crawled callback and all on_page hooks concurrently. Each call is
+        isolated: a failure or timeout is logged and the others still count. Results keep
+        hook order.
+        """
+        calls = []
+        callback = getattr(self, "on_page_crawled", None)
+        if callable(callback):
+            calls.append(("on_page_crawled", callback))
+        calls += [(f"on_page hook {type(hook).__name__}", hook) for hook in self.hooks]
+        if not calls:
+            return []
+        outs = await asyncio.gather(
+            *(self._run_page_hook_async(name, hook, url, html, context) for name, hook in calls)
+        )
+        return [out for out in outs if isinstance(out, dict)]
+
+    async def _run_page_hook_async(self, name: str, hook, url: str, html: str, context: dict):
+        """
+        One page hook call, under the hook's `timeout` (else hook_timeout). Coroutine hooks run
+        on the event loop; synchronous ones run in the hook executor when there is one.
+        A timed-out synchronous call cannot be interrupted; its result is just ignored.
+        """
+        timeout = getattr(hook, "timeout", None) or self.settings.get("hook_timeout")
+        try:
+            if self._hook_executor is None or is_async_page_hook(hook):
+                out = call_page_hook(hook, url, html, context)
+            else:
+                if isinstance(self._hook_executor, ProcessPoolExecutor):
+                    context = {k: v for k, v in context.items() if k != "document"}  # the parse tree stays here
+                loop = asyncio.get_running_loop()
+                out = loop.run_in_executor(self._hook_executor, call_page_hook, hook, url, html, context)
+            if inspect.isawaitable(out):
+                out = await (asyncio.wait_for(out, float(timeout)) if timeout else out)
+            return out
+        except asyncio.TimeoutError:
+            self.logger.warning(f"{name} timed out after {timeout}s for {url}")
+            self.metrics.record_error("hook_timeout")
+        except Exception as e:
+            self.logger.warning(f"{name} failed for {url}: {e}")
+            self.metrics.record_error("hook_failed")
+        return None
 
-    def _allow_discovered_link(self, source_url: str, target_url: str, anchor_text: str) -> bool:
+    def _link_hooks(self) -> tuple[list, list]:
+        """
+        (batch, per-link) link filters: hooks overriding on_links_discovered, and the others
+        overriding on_link_discovered.
+        """
+        batch = [h for h in self.hooks if overrides(h, "on_links_discovered")]
+        single = [h for h in self.hooks if h not in batch and overrides(h, "on_link_discovered")]
+        return batch, single
+
+    def _filter_discovered_links(self, source_url: str, links: list) -> list:
+        """Keep the (target_url, anchor_text) pairs every link hook allows."""
+        batch, single = self._link_hooks()
+        if batch:
+            context = self._hook_context(source_url=source_url)
+            for hook in batch:
+                try:
+                    links = filter_links(links, hook.on_links_discovered(source_url, links, context))
+                except Exception as e:
+                    self.logger.warning(f"on_links_discovered hook failed: {e}")
+        if single:
+            links = [(u, a) for u, a in links if self._allow_discovered_link(source_url, u, a, single)]
+        return links
+
+    async def _filter_discovered_links_async(self, source_url: str, links: list) -> list:
+        batch, single = self._link_hooks()
+        if batch:
+            context = self._hook_context(source_url=source_url)
+            for hook in batch:
+                try:
+                    decision = hook.on_links_discovered(source_url, links, context)
+                    if inspect.isawaitable(decision):
+                        decision = await decision
+                    links = filter_links(links, decision)
+                except Exception as e:
+                    self.logger.warning(f"on_links_discovered hook failed: {e}")
+        if single:
+            kept = []
+            for u, a in links:
+                if await self._allow_discovered_link_async(source_url, u, a, single):
+                    kept.append((u, a))
+            links = kept
+        return links
+
+    def _allow_discovered_link(self, source_url: str, target_url: str, anchor_text: str, hooks=None) -> bool:
         context = self._hook_context(source_url=source_url, target_url=target_url, anchor_text=anchor_text)
-        for hook in self.hooks:
+        for hook in self.hooks if hooks is None else hooks:
             on_link = getattr(hook, "on_link_discovered", None)
             if not callable(on_link):
                 continue
@@ -593,9 +1118,11 @@ class BaseAgent(ABC):
                 return False
         return True
 
-    async def _allow_discovered_link_async(self, source_url: str, target_url: str, anchor_text: str) -> bool:
+    async def _allow_discovered_link_async(
+        self, source_url: str, target_url: str, anchor_text: str, hooks=None
+    ) -> bool:
         context = self._hook_context(source_url=source_url, target_url=target_url, anchor_text=anchor_text)
-        for hook in self.hooks:
+        for hook in self.hooks if hooks is None else hooks:
             on_link = getattr(hook, "on_link_discovered", None)
             if not callable(on_link):
                 continue
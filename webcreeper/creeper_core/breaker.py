@@ -0,0 +1,143 @@
+"""
+Per-host circuit breaker. A host whose recent requests mostly fail (timeouts, connection errors,
+5xx) is cut off, instead of every queued URL for it holding a worker through full timeouts and
+retries:
+  - closed:    requests go through; the last `window` outcomes per host are kept
+  - open:      entered once `failure_threshold` failures make up at least `failure_rate` of the
+               window; requests are refused until `open_seconds` have passed
+  - half-open: up to `probes` requests go through. A success closes the circuit, a failure
+               opens it again for twice as long (at most `max_open_seconds`)
+"""
+
+import time
+from collections import deque
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class _Circuit:
+    __slots__ = ("state", "outcomes", "opened_until", "open_for", "probing", "trips", "refused")
+
+    def __init__(self, window: int, open_for: float):
+        self.state = CLOSED
+        self.outcomes = deque(maxlen=window)  # True = failure
+        self.opened_until = 0.0  # monotonic
+        self.open_for = open_for
+        self.probing = 0  # probe requests in flight (half-open)
+        self.trips = 0
+        self.refused = 0
+
+
+class CircuitBreaker:
+    PROBE_RETRY = 1.0  # seconds before a request refused during a probe is tried again
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        failure_rate: float = 0.5,
+        window: int = 20,
+        open_seconds: float = 30.0,
+        max_open_seconds: float = 600.0,
+        probes: int = 1,
+    ):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.failure_rate = float(failure_rate)
+        self.window = max(self.failure_threshold, int(window))
+        self.open_seconds = float(open_seconds)
+        self.max_open_seconds = max(self.open_seconds, float(max_open_seconds))
+        self.probes = max(1, int(probes))
+        self._hosts = {}  # host -> _Circuit
+
+    def _circuit(self, host: str) -> _Circuit:
+        circuit = self._hosts.get(host)
+        if circuit is None:
+            circuit = _Circuit(self.window, self.open_seconds)
+            self._hosts[host] = circuit
+        return circuit
+
+    def state(self, host: str) -> str:
+        circuit = self._hosts.get(host)
+        if circuit is None:
+            return CLOSED
+        if circuit.state != CLOSED and time.monotonic() >= circuit.opened_until:
+            # Open long enough, or a probe got no answer in time: let (another) probe through.
+            circuit.state = HALF_OPEN
+            circuit.probing = 0
+        return circuit.state
+
+    def blocked(self, host: str) -> bool:
+        """True if a request to host would be refused now (does not take a probe slot)."""
+        state = self.state(host)
+        return state == OPEN or (state == HALF_OPEN and self._hosts[host].probing >= self.probes)
+
+    def allow(self, host: str) -> bool:
+        """May a request go to host now? In half-open state this takes one of the probe slots."""
+        state = self.state(host)
+        if state == CLOSED:
+            return True
+        circuit = self._hosts[host]
+        if state == HALF_OPEN and circuit.probing < self.probes:
+            circuit.probing += 1
+            circuit.opened_until = time.monotonic() + circuit.open_for  # probe deadline
+            return True
+        circuit.refused += 1
+        return False
+
+    def retry_in(self, host: str) -> float:
+        """Seconds until host may take a request again (0.0 if it may now)."""
+        state = self.state(host)
+        if state == OPEN:
+            return max(0.0, self._hosts[host].opened_until - time.monotonic())
+        return self.PROBE_RETRY if self.blocked(host) else 0.0
+
+    def record_success(self, host: str):
+        circuit = self._circuit(host)
+        if self.state(host) == HALF_OPEN:
+            circuit.state = CLOSED
+            circuit.outcomes.clear()
+            circuit.open_for = self.open_seconds
+            circuit.probing = 0
+        elif circuit.state == CLOSED:
+            circuit.outcomes.append(False)
+
+    def record_failure(self, host: str) -> bool:
+        """Count a failed request; True if it opened the circuit."""
+        circuit = self._circuit(host)
+        state = self.state(host)
+        if state == OPEN:
+            return False  # sent before the circuit opened
+        if state == HALF_OPEN:
+            circuit.open_for = min(self.max_open_seconds, circuit.open_for * 2)
+            self._open(circuit)
+            return True
+        circuit.outcomes.append(True)
+        failures = sum(circuit.outcomes)
+        if failures >= self.failure_threshold and failures >= self.failure_rate * len(circuit.outcomes):
+            self._open(circuit)
+            return True
+        return False
+
+    @staticmethod
+    def _open(circuit: _Circuit):
+        circuit.state = OPEN
+        circuit.opened_until = time.monotonic() + circuit.open_for
+        circuit.outcomes.clear()
+        circuit.probing = 0
+        circuit.trips += 1
+
+    def host_stats(self, host: str) -> dict:
+        """Circuit state, recent failures, trips, refused requests and seconds until the next probe."""
+        circuit = self._circuit(host)
+        return {
+            "state": self.state(host),
+            "recent_failures": sum(circuit.outcomes),
+            "recent_requests": len(circuit.outcomes),
+            "trips": circuit.trips,
+            "refused": circuit.refused,
+            "retry_in": self.retry_in(host),
+        }
+
+    def stats(self) -> dict:
+        return {host: self.host_stats(host) for host in self._hosts}
@@ -0,0 +1,77 @@
+"""
+One canonical identity per URL, used for the frontier, visited sets, graph rows, validator
+cache keys and politeness keys:
+  - key:         lowercase scheme/host, no "www.", no default port, "/" for an empty path,
+                 no fragment, tracking params dropped, query sorted by name (all configurable)
+  - fingerprint: 64-bit hash of the key (what url_set="fingerprint" stores)
+Keys are memoized in an LRU cache, since the same URL is keyed many times per crawl
+(discovery on every page that links to it, policy checks, fetch, graph lookups).
+"""
+
+from functools import lru_cache
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+from webcreeper.creeper_core.policy import norm_host
+from webcreeper.creeper_core.urlset import fingerprint64
+
+
+class UrlCanonicalizer:
+    TRACKING_PARAM_PREFIXES = ("utm_",)
+    TRACKING_PARAMS = ("gclid", "fbclid", "msclkid", "igshid")
+
+    def __init__(
+        self,
+        strip_tracking_params: bool = True,
+        tracking_param_prefixes=TRACKING_PARAM_PREFIXES,
+        tracking_params=TRACKING_PARAMS,
+        normalize_query: bool = True,
+        cache_size: int = 65536,
+    ):
+        self.strip_tracking_params = strip_tracking_params
+        self.tracking_param_prefixes = tuple(p.lower() for p in tracking_param_prefixes or ())
+        self.tracking_params = frozenset(p.lower() for p in tracking_params or ())
+        self.normalize_query = normalize_query
+        self.key = lru_cache(maxsize=cache_size)(self._canonicalize)
+
+    @classmethod
+    def from_settings(cls, settings: dict) -> "UrlCanonicalizer":
+        return cls(
+            strip_tracking_params=settings.get("strip_tracking_params", True),
+            tracking_param_prefixes=settings.get("tracking_param_prefixes", cls.TRACKING_PARAM_PREFIXES),
+            tracking_params=settings.get("tracking_params", cls.TRACKING_PARAMS),
+            normalize_query=settings.get("normalize_query", True),
+            cache_size=int(settings.get("url_key_cache_size", 65536)),
+        )
+
+    def _canonicalize(self, url: str) -> str:
+        if not url:
+            return url
+        p = urlparse(url)
+        scheme = p.scheme.lower()
+        netloc = norm_host(p.netloc)
+        try:
+            port = p.port
+        except ValueError:
+            port = None  # malformed port: keep the host only
+        if port and (scheme, port) not in (("http", 80), ("https", 443)):
+            netloc = f"{netloc}:{port}"
+        path = p.path or "/"
+        query = p.query
+        if query and (self.strip_tracking_params or self.normalize_query):
+            query_pairs = parse_qsl(query, keep_blank_values=True)
+            if self.strip_tracking_params:
+                prefixes, drop = self.tracking_param_prefixes, self.tracking_params
+                query_pairs = [
+                    (k, v) for (k, v) in query_pairs if not k.lower().startswith(prefixes) and k.lower() not in drop
+                ]
+            if self.normalize_query:
+                query_pairs.sort(key=lambda kv: kv[0].lower())
+            query = urlencode(query_pairs, doseq=True)
+        return urlunparse((scheme, netloc, path, p.params, query, ""))
+
+    def fingerprint(self, url: str) -> int:
+        """64-bit fingerprint of the URL's canonical key."""
+        return fingerprint64(self.key(url))
+
+    def cache_info(self):
+        return self.key.cache_info()
@@ -0,0 +1,126 @@
+import json
+import os
+import sqlite3
+import time
+
+
+class CrawlCheckpoint:
+    """
+    Incremental crawl state in SQLite, written as small per-event rows:
+      - frontier:       every discovered URL with its shallowest depth
+      - done:           URLs whose processing finished (crawled, skipped or failed)
+      - pages:          graph rows (url -> JSON link list)
+      - content_hashes: hashes used for duplicate-content detection
+    Events are buffered and committed in batches (every `flush_interval` seconds or
+    `flush_size` events), so checkpoint cost grows with new work, not with crawl size.
+    Pages finished after the last commit are redone on resume (at-least-once).
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS frontier (url TEXT PRIMARY KEY, depth INTEGER NOT NULL);
+        CREATE TABLE IF NOT EXISTS done (url TEXT PRIMARY KEY);
+        CREATE TABLE IF NOT EXISTS pages (url TEXT PRIMARY KEY, links TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS content_hashes (hash TEXT PRIMARY KEY);
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+    """
+
+    def __init__(self, path: str, flush_interval: float = 5.0, flush_size: int = 500):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+        self._pending = {"frontier": [], "done": [], "pages": [], "content_hashes": []}
+        self._pending_count = 0
+        self._last_flush = time.monotonic()
+
+    # -------------------- recording --------------------
+
+    def _add(self, table: str, row: tuple):
+        self._pending[table].append(row)
+        self._pending_count += 1
+
+    def record_discovered(self, url: str, depth: int):
+        self._add("frontier", (url, depth))
+
+    def record_done(self, url: str):
+        self._add("done", (url,))
+
+    def record_page(self, url: str, links: list):
+        self._add("pages", (url, json.dumps(links, ensure_ascii=False)))
+
+    def record_content_hash(self, digest: str):
+        self._add("content_hashes", (digest,))
+
+    def maybe_flush(self, before=None):
+        """Commit if a batch is due; `before` (if given) runs first, e.g. to persist results the batch marks done."""
+        if self._pending_count >= self.flush_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            if before is not None:
+                before()
+            self.flush()
+
+    def flush(self):
+        self._last_flush = time.monotonic()
+        if not self._pending_count:
+            return
+        pending = self._pending
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO frontier (url, depth) VALUES (?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET depth = MIN(depth, excluded.depth)",
+                pending["frontier"],
+            )
+            self.conn.executemany("INSERT OR IGNORE INTO done (url) VALUES (?)", pending["done"])
+            self.conn.executemany("INSERT OR REPLACE INTO pages (url, links) VALUES (?, ?)", pending["pages"])
+            self.conn.executemany("INSERT OR IGNORE INTO content_hashes (hash) VALUES (?)", pending["content_hashes"])
+        for rows in pending.values():
+            rows.clear()
+        self._pending_count = 0
+
+    # -------------------- lifecycle --------------------
+
+    def has_state(self) -> bool:
+        return self.conn.execute("SELECT 1 FROM frontier LIMIT 1").fetchone() is not None
+
+    def reset(self):
+        """Start a fresh crawl: drop every stored row."""
+        for rows in self._pending.values():
+            rows.clear()
+        self._pending_count = 0
+        with self.conn:
+            for table in ("frontier", "done", "pages", "content_hashes", "meta"):
+                self.conn.execute(f"DELETE FROM {table}")
+
+    def set_meta(self, key: str, value):
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    def get_meta(self, key: str, default=None):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def load(self) -> dict:
+        """
+        Stored state: {"discovered": {url: depth}, "pending": [(url, depth)] not yet done,
+        "done": set, "graph": {url: links}, "content_hashes": set}.
+        """
+        self.flush()
+        discovered = dict(self.conn.execute("SELECT url, depth FROM frontier"))
+        done = {row[0] for row in self.conn.execute("SELECT url FROM done")}
+        pending = sorted(((u, d) for u, d in discovered.items() if u not in done), key=lambda item: item[1])
+        return {
+            "discovered": discovered,
+            "pending": pending,
+            "done": done,
+            "graph": {url: json.loads(links) for url, links in self.conn.execute("SELECT url, links FROM pages")},
+            "content_hashes": {row[0] for row in self.conn.execute("SELECT hash FROM content_hashes")},
+        }
+
+    def close(self):
+        self.flush()
+        self.conn.close()
@@ -0,0 +1,99 @@
+import hashlib
+from functools import cached_property
+from urllib.parse import urljoin, urlparse
+
+from bs4 import BeautifulSoup
+
+from webcreeper.creeper_core.parsers import get_backend
+from webcreeper.creeper_core.simhash import simhash64
+from webcreeper.creeper_core.utils import strip_fragment
+
+
+def resolve_links(anchors, base_url: str) -> list[tuple[str, str]]:
+    """(absolute_url, anchor_text) for each distinct http(s) link, fragment stripped, in page order."""
+    links = []
+    seen = set()
+    for href, anchor_text in anchors:
+        full_url = strip_fragment(urljoin(base_url, href))
+        if urlparse(full_url).scheme.lower() not in ("http", "https"):
+            continue
+        if full_url in seen:
+            continue
+        seen.add(full_url)
+        links.append((full_url, anchor_text))
+    return links
+
+
+def resolve_canonical(href: str | None, base_url: str) -> str | None:
+    """Absolute http(s) URL of a rel=canonical href (fragment stripped), or None."""
+    if not href or not href.strip():
+        return None
+    full_url = strip_fragment(urljoin(base_url, href.strip()))
+    return full_url if urlparse(full_url).scheme.lower() in ("http", "https") else None
+
+
+def text_hash(text: str) -> str | None:
+    """Content hash used for exact-duplicate detection (None for pages without text)."""
+    return hashlib.md5(text.encode("utf-8")).hexdigest() if text else None
+
+
+class PageDocument:
+    """
+    A fetched page parsed at most once and shared by content dedup, link extraction and hooks.
+    Every view is built lazily on first access. Hooks receive it as `context["document"]`
+    and should treat it as read-only.
+
+    `parser` selects the backend used for `tree`, `text` and `anchors`
+    (see creeper_core.parsers): "html.parser" (default), "lxml" or "selectolax".
+    """
+
+    def __init__(self, url: str, html: str, parser: str = "html.parser"):
+        self.url = url
+        self.html = html
+        self.parser = parser
+        self.backend = get_backend(parser)
+
+    def prime(self, **views):
+        """Seed lazily-built views (e.g. text_hash, links computed in a worker process)."""
+        self.__dict__.update(views)
+        return self
+
+    @cached_property
+    def tree(self):
+        """Native tree of the selected backend (BeautifulSoup, lxml root or selectolax parser)."""
+        return self.backend.parse(self.html)
+
+    @cached_property
+    def soup(self) -> BeautifulSoup:
+        if self.parser == "html.parser":
+            return self.tree
+        return BeautifulSoup(self.html, "lxml" if self.parser == "lxml" else "html.parser")
+
+    @cached_property
+    def text(self) -> str:
+        """Visible text joined with single spaces (same as soup.get_text(" ", strip=True))."""
+        return self.backend.text(self.tree)
+
+    @cached_property
+    def text_hash(self) -> str | None:
+        return text_hash(self.text)
+
+    @cached_property
+    def simhash(self) -> int | None:
+        """64-bit SimHash of the text, for near-duplicate detection (None for pages without words)."""
+        return simhash64(self.text)
+
+    @cached_property
+    def anchors(self) -> list[tuple[str, str]]:
+        """(href, anchor_text) for every <a href> in document order; hrefs are not resolved."""
+        return self.backend.anchors(self.tree)
+
+    @cached_property
+    def links(self) -> list[tuple[str, str]]:
+        """Anchors resolved against the page URL: distinct http(s) targets, fragments stripped."""
+        return resolve_links(self.anchors, self.url)
+
+    @cached_property
+    def canonical_url(self) -> str | None:
+        """The page's <link rel="canonical"> target as an absolute URL, or None."""
+        return resolve_canonical(self.backend.canonical(self.tree), self.url)
@@ -0,0 +1,122 @@
+import os
+import sqlite3
+import tempfile
+from collections import deque
+
+
+class Frontier:
+    """
+    Depth-ordered URL frontier: shallowest depth first, FIFO within a depth.
+      - Up to `memory_limit` entries are kept in memory (None = unbounded, never spills)
+      - Beyond that, new entries spill to a SQLite queue at `spill_path` (a temp file by default)
+      - Once a depth has spilled entries, later pushes for that depth also go to disk until it
+        drains, so FIFO order within a depth holds across memory and disk
+      - Spilled entries are written and read back in batches of `batch_size`
+    """
+
+    def __init__(self, memory_limit: int | None = None, spill_path: str | None = None, batch_size: int = 1000):
+        self.memory_limit = memory_limit
+        self.spill_path = spill_path
+        self.batch_size = max(1, int(batch_size))
+        self._memory = {}  # depth -> deque of urls (older than any spilled entry of that depth)
+        self._in_memory = 0
+        self._on_disk = {}  # depth -> spilled count (written or buffered)
+        self._buffer = []  # spilled rows not yet written: (seq, depth, url)
+        self._seq = 0
+        self._conn = None
+        self._owns_file = False
+        self.spilled_total = 0
+
+    def __len__(self) -> int:
+        return self._in_memory + sum(self._on_disk.values())
+
+    def __bool__(self) -> bool:
+        return self._in_memory > 0 or bool(self._on_disk)
+
+    def push(self, url: str, depth: int):
+        if depth in self._on_disk or (self.memory_limit is not None and self._in_memory >= self.memory_limit):
+            self._spill(url, depth)
+            return
+        self._memory.setdefault(depth, deque()).append(url)
+        self._in_memory += 1
+
+    def pop(self) -> tuple[str, int]:
+        """Remove and return the oldest (url, depth) at the shallowest depth; IndexError if empty."""
+        if not self:
+            raise IndexError("pop from an empty frontier")
+        depth = min(self._memory.keys() | self._on_disk.keys())
+        queue = self._memory.get(depth)
+        if not queue:
+            queue = self._load(depth)
+        url = queue.popleft()
+        self._in_memory -= 1
+        if not queue and depth not in self._on_disk:
+            del self._memory[depth]
+        return url, depth
+
+    # -------------------- disk segment --------------------
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.spill_path:
+                directory = os.path.dirname(self.spill_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                if os.path.exists(self.spill_path):
+                    os.remove(self.spill_path)  # stale spill from an earlier run
+            else:
+                fd, self.spill_path = tempfile.mkstemp(prefix="webcreeper-frontier-", suffix=".sqlite")
+                os.close(fd)
+                self._owns_file = True
+            self._conn = sqlite3.connect(self.spill_path)
+            self._conn.execute("PRAGMA journal_mode=OFF")
+            self._conn.execute("PRAGMA synchronous=OFF")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS queue (seq INTEGER PRIMARY KEY, depth INTEGER NOT NULL, url TEXT NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS queue_depth ON queue (depth, seq)")
+        return self._conn
+
+    def _spill(self, url: str, depth: int):
+        self._seq += 1
+        self._buffer.append((self._seq, depth, url))
+        self._on_disk[depth] = self._on_disk.get(depth, 0) + 1
+        self.spilled_total += 1
+        if len(self._buffer) >= self.batch_size:
+            self._write()
+
+    def _write(self):
+        if self._buffer:
+            with self._db() as conn:
+                conn.executemany("INSERT INTO queue (seq, depth, url) VALUES (?, ?, ?)", self._buffer)
+            self._buffer.clear()
+
+    def _load(self, depth: int) -> deque:
+        """Move the oldest batch of spilled entries for `depth` into memory."""
+        self._write()
+        conn = self._db()
+        rows = conn.execute(
+            "SELECT seq, url FROM queue WHERE depth = ? ORDER BY seq LIMIT ?", (depth, self.batch_size)
+        ).fetchall()
+        with conn:
+            conn.execute("DELETE FROM queue WHERE depth = ? AND seq <= ?", (depth, rows[-1][0]))
+        queue = self._memory.setdefault(depth, deque())
+        queue.extend(url for _, url in rows)
+        self._in_memory += len(rows)
+        remaining = self._on_disk[depth] - len(rows)
+        if remaining:
+            self._on_disk[depth] = remaining
+        else:
+            del self._on_disk[depth]
+        return queue
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+        self._buffer.clear()
+        if self._owns_file:
+            if os.path.exists(self.spill_path):
+                os.remove(self.spill_path)
+            self.spill_path = None
+            self._owns_file = False
@@ -0,0 +1,263 @@
+"""
+Link graph stores (selected with the `graph_store` setting):
+  - "dict":    {url: [{"target", "anchor_text", "source_chunk"}, ...]} (plain Python objects)
+  - "compact": CompactLinkGraph, same mapping interface; URLs and anchor texts are interned
+               to integer IDs and edges live in flat arrays (~8 bytes per edge)
+"""
+
+import os
+from array import array
+from collections.abc import MutableMapping
+
+GRAPH_STORES = ("dict", "compact")
+
+
+class CompactLinkGraph(MutableMapping):
+    """
+    Page -> outgoing links, stored compactly:
+      - every URL (page or link target) gets an integer node ID
+      - anchor texts are deduplicated to integer IDs (0 is "")
+      - a page's links are one contiguous run in the `targets` / `anchors` edge arrays
+    Reading graph[url] rebuilds the usual list of link dicts for that page only, so the
+    store can be used wherever the dict graph is. `source_chunk` is kept only when it is
+    not the default f"chunk_{i}"; other link keys are not stored.
+    Rewriting a page appends a new run; to_csr() / save_npz() export a packed copy.
+    """
+
+    def __init__(self, rows=None):
+        self._node_ids = {}
+        self._urls = []
+        self._anchor_ids = {"": 0}
+        self._anchors = [""]
+        self._targets = array("I")
+        self._edge_anchors = array("I")
+        self._row_start = array("q")  # per node: first edge index, -1 if the page has no row
+        self._row_len = array("I")
+        self._chunks = {}  # edge index -> non-default source_chunk
+        self._len = 0
+        if rows:
+            self.update(rows)
+
+    # -------------------- interning --------------------
+
+    def node_id(self, url: str, create: bool = False):
+        """Node ID of url (None if unknown, unless create=True)."""
+        nid = self._node_ids.get(url)
+        if nid is None and create:
+            nid = len(self._urls)
+            self._node_ids[url] = nid
+            self._urls.append(url)
+            self._row_start.append(-1)
+            self._row_len.append(0)
+        return nid
+
+    def node_url(self, nid: int) -> str:
+        return self._urls[nid]
+
+    def _anchor_id(self, text: str) -> int:
+        aid = self._anchor_ids.get(text)
+        if aid is None:
+            aid = len(self._anchors)
+            self._anchor_ids[text] = aid
+            self._anchors.append(text)
+        return aid
+
+    # -------------------- mapping interface --------------------
+
+    def __setitem__(self, url: str, links):
+        nid = self.node_id(url, create=True)
+        if self._row_start[nid] >= 0:
+            self._drop_chunks(nid)
+        else:
+            self._len += 1
+        start = len(self._targets)
+        for i, link in enumerate(links):
+            self._targets.append(self.node_id(link["target"], create=True))
+            self._edge_anchors.append(self._anchor_id(link.get("anchor_text") or ""))
+            chunk = link.get("source_chunk")
+            if chunk is not None and chunk != f"chunk_{i}":
+                self._chunks[start + i] = chunk
+        self._row_start[nid] = start
+        self._row_len[nid] = len(self._targets) - start
+
+    def __getitem__(self, url: str) -> list:
+        nid = self._node_ids.get(url)
+        if nid is None or self._row_start[nid] < 0:
+            raise KeyError(url)
+        start = self._row_start[nid]
+        urls, anchors, chunks = self._urls, self._anchors, self._chunks
+        return [
+            {
+                "target": urls[self._targets[e]],
+                "anchor_text": anchors[self._edge_anchors[e]],
+                "source_chunk": chunks.get(e, f"chunk_{i}"),
+            }
+            for i, e in enumerate(range(start, start + self._row_len[nid]))
+        ]
+
+    def __delitem__(self, url: str):
+        nid = self._node_ids.get(url)
+        if nid is None or self._row_start[nid] < 0:
+            raise KeyError(url)
+        self._drop_chunks(nid)
+        self._row_start[nid] = -1
+        self._row_len[nid] = 0
+        self._len -= 1
+
+    def __contains__(self, url) -> bool:
+        nid = self._node_ids.get(url)
+        return nid is not None and self._row_start[nid] >= 0
+
+    def __iter__(self):
+        for nid, start in enumerate(self._row_start):
+            if start >= 0:
+                yield self._urls[nid]
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __repr__(self) -> str:
+        return f"CompactLinkGraph(pages={self._len}, nodes={self.num_nodes}, edges={self.num_edges})"
+
+    def _drop_chunks(self, nid: int):
+        if self._chunks:
+            start = self._row_start[nid]
+            for e in range(start, start + self._row_len[nid]):
+                self._chunks.pop(e, None)
+
+    # -------------------- ID-level access --------------------
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self._urls)
+
+    @property
+    def num_edges(self) -> int:
+        return sum(self._row_len)
+
+    def targets(self, url: str) -> list[str]:
+        """Link target URLs of a page, without building the link dicts."""
+        nid = self._node_ids.get(url)
+        if nid is None or self._row_start[nid] < 0:
+            raise KeyError(url)
+        start = self._row_start[nid]
+        return [self._urls[t] for t in self._targets[start : start + self._row_len[nid]]]
+
+    def to_dict(self) -> dict:
+        return {url: self[url] for url in self}
+
+    def to_csr(self) -> tuple[array, array, array]:
+        """
+        Packed CSR adjacency over node IDs: (indptr, indices, anchor_ids), where node i's links
+        are indices[indptr[i]:indptr[i + 1]]. Nodes that were never crawled have no links.
+        """
+        indptr = array("q", [0])
+        indices = array("I")
+        anchor_ids = array("I")
+        for start, length in zip(self._row_start, self._row_len):
+            if start >= 0:
+                indices.extend(self._targets[start : start + length])
+                anchor_ids.extend(self._edge_anchors[start : start + length])
+            indptr.append(len(indices))
+        return indptr, indices, anchor_ids
+
+    def iter_edges(self):
+        """(source_id, target_id, anchor_id) for every link, grouped by source."""
+        for nid, (start, length) in enumerate(zip(self._row_start, self._row_len)):
+            if start < 0:
+                continue
+            for e in range(start, start + length):
+                yield nid, self._targets[e], self._edge_anchors[e]
+
+    # -------------------- export --------------------
+
+    def save_edge_list(self, path: str, urls: bool = False):
+        """Tab-separated edges, one per line: "source_id target_id" (or the two URLs with urls=True)."""
+        _makedirs_for(path)
+        with open(path, "w", encoding="utf-8") as f:
+            for src, dst, _ in self.iter_edges():
+                if urls:
+                    f.write(f"{self._urls[src]}\t{self._urls[dst]}\n")
+                else:
+                    f.write(f"{src}\t{dst}\n")
+
+    def save_nodes(self, path: str):
+        """Tab-separated "node_id url" lines, the ID -> URL table for save_edge_list()."""
+        _makedirs_for(path)
+        with open(path, "w", encoding="utf-8") as f:
+            for nid, url in enumerate(self._urls):
+                f.write(f"{nid}\t{url}\n")
+
+    def save_npz(self, path: str):
+        """
+        Save CSR arrays plus the URL and anchor tables to a NumPy .npz file (needs numpy).
+        Strings are stored as one UTF-8 blob plus offsets, so loading needs no pickle.
+        """
+        import numpy as np
+
+        indptr, indices, anchor_ids = self.to_csr()
+        url_blob, url_offsets = _pack_strings(self._urls)
+        anchor_blob, anchor_offsets = _pack_strings(self._anchors)
+        crawled = np.asarray(self._row_start, dtype=np.int64) >= 0
+        _makedirs_for(path)
+        np.savez(
+            path,
+            indptr=np.asarray(indptr, dtype=np.int64),
+            indices=np.asarray(indices, dtype=np.uint32),
+            anchor_ids=np.asarray(anchor_ids, dtype=np.uint32),
+            crawled=crawled,
+            url_blob=np.frombuffer(url_blob, dtype=np.uint8),
+            url_offsets=np.asarray(url_offsets, dtype=np.int64),
+            anchor_blob=np.frombuffer(anchor_blob, dtype=np.uint8),
+            anchor_offsets=np.asarray(anchor_offsets, dtype=np.int64),
+        )
+
+    @classmethod
+    def load_npz(cls, path: str) -> "CompactLinkGraph":
+        """Rebuild a graph saved with save_npz() (needs numpy); non-default source_chunk values are not saved."""
+        import numpy as np
+
+        with np.load(path) as data:
+            graph = cls()
+            graph._urls = _unpack_strings(data["url_blob"].tobytes(), data["url_offsets"].tolist())
+            graph._node_ids = {url: nid for nid, url in enumerate(graph._urls)}
+            graph._anchors = _unpack_strings(data["anchor_blob"].tobytes(), data["anchor_offsets"].tolist())
+            graph._anchor_ids = {text: aid for aid, text in enumerate(graph._anchors)}
+            graph._targets = array("I", data["indices"].astype(np.uint32).tobytes())
+            graph._edge_anchors = array("I", data["anchor_ids"].astype(np.uint32).tobytes())
+            indptr = data["indptr"].tolist()
+            crawled = data["crawled"].tolist()
+        graph._row_start = array("q", (indptr[i] if crawled[i] else -1 for i in range(len(crawled))))
+        graph._row_len = array("I", (indptr[i + 1] - indptr[i] for i in range(len(crawled))))
+        graph._len = sum(crawled)
+        return graph
+
+
+def _makedirs_for(path: str):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+
+def _pack_strings(strings: list[str]) -> tuple[bytes, array]:
+    offsets = array("q", [0])
+    parts = []
+    size = 0
+    for s in strings:
+        b = s.encode("utf-8", "surrogatepass")
+        parts.append(b)
+        size += len(b)
+        offsets.append(size)
+    return b"".join(parts), offsets
+
+
+def _unpack_strings(blob: bytes, offsets: list[int]) -> list[str]:
+    return [blob[offsets[i] : offsets[i + 1]].decode("utf-8", "surrogatepass") for i in range(len(offsets) - 1)]
+
+
+def make_graph(kind: str = "dict"):
+    if kind in (None, "dict"):
+        return {}
+    if kind == "compact":
+        return CompactLinkGraph()
+    raise ValueError(f"Unknown graph_store '{kind}'; expected one of {', '.join(GRAPH_STORES)}")
@@ -1,9 +1,18 @@
+import inspect
+
+
 class CrawlHook:
     """
     Base hook contract for crawler agents.
     Subclasses can override any event they need.
+    `timeout` (seconds) bounds each on_page call of this hook; None falls back to hook_timeout.
+    `changed_only = True` means on_page only needs pages changed since the last crawl. Unless
+    every page handler opts in, a crawl with a validator cache refetches unchanged pages in full.
     """
 
+    timeout = None
+    changed_only = False
+
     def on_start(self, context: dict):
         pass
 
@@ -13,11 +22,80 @@ class CrawlHook:
     def on_link_discovered(self, source_url: str, target_url: str, anchor_text: str, context: dict):
         return None
 
+    def on_links_discovered(self, source_url: str, links: list, context: dict):
+        """
+        Batch variant of on_link_discovered, called once per page with all its links as
+        (target_url, anchor_text) pairs. Return None (keep all), a keep-mask (one truthy value
+        per link) or the filtered list of pairs. A hook overriding this one is not called per link.
+        """
+        return None
+
     def on_page_error(self, url: str, error, context: dict):
         pass
 
     def on_page_skipped(self, url: str, reason: str, context: dict):
         pass
 
+    def on_metrics(self, metrics: dict, context: dict):
+        pass
+
     def on_finish(self, summary: dict, context: dict):
         pass
+
+
+def call_page_hook(hook, url: str, html: str, context: dict):
+    """
+    Call a page hook: an object with on_page(url, html, context), or a plain callable taking
+    (url, html) or ({"url": ..., "html": ...}). Module-level so it can run in a process pool.
+    """
+    on_page = getattr(hook, "on_page", None)
+    if callable(on_page):
+        return on_page(url, html, context)
+    if callable(hook):
+        try:
+            return hook(url, html)
+        except TypeError:
+            return hook({"url": url, "html": html})
+    return None
+
+
+def is_async_page_hook(hook) -> bool:
+    """True if the hook's on_page (or the callable itself) is a coroutine function."""
+    fn = getattr(hook, "on_page", None)
+    if not callable(fn):
+        fn = hook if inspect.isfunction(hook) or inspect.ismethod(hook) else getattr(hook, "__call__", None)
+    return inspect.iscoroutinefunction(fn)
+
+
+def overrides(hook, name: str) -> bool:
+    """True if `hook` has an event method `name` other than CrawlHook's no-op default."""
+    if not callable(getattr(hook, name, None)):
+        return False
+    return getattr(type(hook), name, None) is not getattr(CrawlHook, name)
+
+
+def handles_pages(hook) -> bool:
+    """True if `hook` has an on_page handler (or is a plain page callable)."""
+    if isinstance(hook, CrawlHook):
+        return overrides(hook, "on_page")
+    return callable(getattr(hook, "on_page", None)) or callable(hook)
+
+
+def wants_every_page(hook) -> bool:
+    """True if `hook` handles pages and did not opt into `changed_only`."""
+    return not getattr(hook, "changed_only", False) and handles_pages(hook)
+
+
+def filter_links(links: list, decision) -> list:
+    """Apply an on_links_discovered return value (None, keep-mask or filtered list) to links."""
+    if decision is None:
+        return links
+    decision = list(decision)
+    if not decision:
+        return []
+    if isinstance(decision[0], (tuple, list, str)):
+        keep = {link if isinstance(link, str) else tuple(link)[0] for link in decision}
+        return [link for link in links if link[0] in keep]
+    if len(decision) != len(links):
+        raise ValueError(f"keep-mask has {len(decision)} entries for {len(links)} links")
+    return [link for link, keep in zip(links, decision) if keep]
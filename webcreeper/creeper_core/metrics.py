@@ -0,0 +1,232 @@
+"""
+Crawl metrics: counters and per-phase latency histograms.
+
+Phases (seconds):
+  - queue_wait:      URL queued in the host scheduler until a worker picks it
+  - rate_limit_wait: politeness pacing before a request
+  - connect:         TCP + TLS setup (only for requests that opened a new connection)
+  - ttfb:            request sent until response headers (includes connect)
+  - download:        response headers until the whole body is read
+  - parse:           building the page document (off-loop with parse_executor)
+  - link_extraction: link resolution, filtering and on_link_discovered hooks
+  - hooks:           on_page callback and hooks
+Histograms use fixed buckets (Prometheus style), so recording is O(buckets) with no
+per-sample storage; percentiles are interpolated within a bucket.
+"""
+
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+PHASES = ("queue_wait", "rate_limit_wait", "connect", "ttfb", "download", "parse", "link_extraction", "hooks")
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "sum", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = BUCKETS[i - 1] if i else 0.0
+                upper = BUCKETS[i] if i < len(BUCKETS) else self.max
+                return min(self.max, lower + (upper - lower) * (rank - seen) / n)
+            seen += n
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "avg": self.sum / self.count if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+            "max": self.max,
+        }
+
+
+class _HostMetrics:
+    __slots__ = ("requests", "errors", "bytes", "fetch_time")
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.bytes = 0
+        self.fetch_time = Histogram()
+
+
+class CrawlMetrics:
+    """
+    Counters (pages, bytes, HTTP status codes, skip / error reasons), per-phase latency
+    histograms and per-host request stats. Single event loop, so no locking.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.reset()
+
+    def reset(self):
+        self.started = time.monotonic()
+        self.counters = Counter()
+        self.status_codes = Counter()
+        self.skip_reasons = Counter()
+        self.error_reasons = Counter()
+        self.phases = {phase: Histogram() for phase in PHASES}
+        self.hosts = defaultdict(_HostMetrics)
+
+    # -------------------- recording --------------------
+
+    def incr(self, name: str, n: int = 1):
+        if self.enabled:
+            self.counters[name] += n
+
+    def observe(self, phase: str, seconds: float):
+        if self.enabled:
+            self.phases[phase].observe(seconds)
+
+    def record_response(self, host: str, status: int, nbytes: int, fetch_time: float):
+        """One HTTP response: status, body bytes read and headers-to-body-end fetch time."""
+        if not self.enabled:
+            return
+        self.status_codes[status] += 1
+        self.counters["bytes_downloaded"] += nbytes
+        stats = self.hosts[host]
+        stats.requests += 1
+        stats.bytes += nbytes
+        stats.fetch_time.observe(fetch_time)
+
+    def record_fetch_error(self, host: str, reason: str):
+        if self.enabled:
+            self.counters["fetch_errors"] += 1
+            self.error_reasons[reason] += 1
+            self.hosts[host].errors += 1
+
+    def record_skip(self, reason: str):
+        if self.enabled:
+            # "non_html:application/pdf" -> "non_html"
+            self.skip_reasons[reason.split(":", 1)[0]] += 1
+
+    def record_error(self, reason: str):
+        if self.enabled:
+            self.error_reasons[reason] += 1
+
+    def timer(self, phase: str):
+        return _Timer(self, phase)
+
+    # -------------------- export --------------------
+
+    def snapshot(self) -> dict:
+        elapsed = time.monotonic() - self.started
+        pages = self.counters.get("pages_crawled", 0)
+        return {
+            "elapsed": elapsed,
+            "pages_per_second": pages / elapsed if elapsed > 0 else 0.0,
+            "counters": dict(self.counters),
+            "status_codes": dict(self.status_codes),
+            "skip_reasons": dict(self.skip_reasons),
+            "error_reasons": dict(self.error_reasons),
+            "phases": {phase: h.summary() for phase, h in self.phases.items()},
+            "hosts": {
+                host: {
+                    "requests": s.requests,
+                    "errors": s.errors,
+                    "bytes": s.bytes,
+                    "avg_fetch_time": s.fetch_time.sum / s.fetch_time.count if s.fetch_time.count else 0.0,
+                    "p99_fetch_time": s.fetch_time.quantile(0.99),
+                    "max_fetch_time": s.fetch_time.max,
+                }
+                for host, s in self.hosts.items()
+            },
+        }
+
+    def to_prometheus(self, prefix: str = "webcreeper") -> str:
+        """Prometheus text exposition format (e.g. for node_exporter's textfile collector)."""
+        lines = []
+
+        def counter(name: str, help_text: str, samples):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for labels, value in samples:
+                lines.append(f"{prefix}_{name}{_labels(labels)} {value}")
+
+        hosts = sorted(self.hosts.items())
+        counter("events_total", "Crawl events by kind.", [({"event": k}, v) for k, v in sorted(self.counters.items())])
+        counter(
+            "responses_total",
+            "HTTP responses by status code.",
+            [({"code": str(k)}, v) for k, v in sorted(self.status_codes.items())],
+        )
+        counter(
+            "skipped_pages_total",
+            "Pages skipped, by reason.",
+            [({"reason": k}, v) for k, v in sorted(self.skip_reasons.items())],
+        )
+        counter(
+            "errors_total", "Errors, by reason.", [({"reason": k}, v) for k, v in sorted(self.error_reasons.items())]
+        )
+        counter("host_requests_total", "HTTP responses per host.", [({"host": h}, s.requests) for h, s in hosts])
+        counter("host_errors_total", "Failed requests per host.", [({"host": h}, s.errors) for h, s in hosts])
+
+        name = f"{prefix}_phase_seconds"
+        lines.append(f"# HELP {name} Latency of each crawl phase.")
+        lines.append(f"# TYPE {name} histogram")
+        for phase, h in self.phases.items():
+            cumulative = 0
+            for bound, n in zip((*BUCKETS, "+Inf"), h.counts):
+                cumulative += n
+                lines.append(f"{name}_bucket{_labels({'phase': phase, 'le': str(bound)})} {cumulative}")
+            lines.append(f"{name}_sum{_labels({'phase': phase})} {h.sum}")
+            lines.append(f"{name}_count{_labels({'phase': phase})} {h.count}")
+        return "\n".join(lines) + "\n"
+
+
+class _Timer:
+    __slots__ = ("metrics", "phase", "start")
+
+    def __init__(self, metrics: CrawlMetrics, phase: str):
+        self.metrics = metrics
+        self.phase = phase
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.phase, time.perf_counter() - self.start)
+        return False
+
+
+def format_gauge(prefix: str, name: str, help_text: str, samples) -> str:
+    """A Prometheus gauge from (labels, value) samples, for state kept outside CrawlMetrics."""
+    lines = [f"# HELP {prefix}_{name} {help_text}", f"# TYPE {prefix}_{name} gauge"]
+    lines += [f"{prefix}_{name}{_labels(labels)} {value}" for labels, value in samples]
+    return "\n".join(lines) + "\n"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
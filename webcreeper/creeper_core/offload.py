@@ -0,0 +1,44 @@
+"""
+Off-loop page analysis: parsing, text hashing and link extraction in a worker pool,
+so CPU-heavy pages neither stall the event loop nor keep the crawl on one core.
+"""
+
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from webcreeper.creeper_core.document import resolve_canonical, resolve_links, text_hash
+from webcreeper.creeper_core.parsers import get_backend
+from webcreeper.creeper_core.simhash import simhash64
+
+
+def analyze_html(html: str, url: str, parser: str = "html.parser", hash_text: bool = True, simhash: bool = False):
+    """
+    Parse `html` once and return a compact, picklable result:
+    (text_hash or None, [(absolute_url, anchor_text), ...], simhash or None, canonical_url or None).
+    """
+    backend = get_backend(parser)
+    tree = backend.parse(html)
+    text = backend.text(tree) if hash_text or simhash else ""
+    digest = text_hash(text) if hash_text else None
+    fingerprint = simhash64(text) if simhash else None
+    canonical = resolve_canonical(backend.canonical(tree), url)
+    return digest, resolve_links(backend.anchors(tree), url), fingerprint, canonical
+
+
+def make_executor(mode: str | None, workers: int | None = None, logger=None, name: str = "parse") -> Executor | None:
+    """
+    Build a worker pool (the analysis pool by default): "process" (falls back to threads where
+    processes are unavailable), "thread", or None for running inline on the event loop.
+    """
+    if not mode:
+        return None
+    if mode not in ("process", "thread"):
+        raise ValueError(f"Unknown {name}_executor '{mode}'; expected 'process', 'thread' or None")
+    workers = workers or os.cpu_count() or 1
+    if mode == "process":
+        try:
+            return ProcessPoolExecutor(max_workers=workers)
+        except (ImportError, NotImplementedError, OSError) as e:
+            if logger is not None:
+                logger.warning(f"Process pool unavailable ({e}); using a thread pool for {name} work instead")
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"webcreeper-{name}")
@@ -0,0 +1,218 @@
+"""
+HTML parser backends for text and link extraction.
+
+Every backend yields the same output as the BeautifulSoup path:
+  - text:      soup.get_text(" ", strip=True)
+  - anchors:   [(a["href"], a.get_text(strip=True)) for a in soup.find_all("a", href=True)]
+  - canonical: href of the first <link rel="canonical">, or None
+
+Available backends:
+  - "html.parser": BeautifulSoup with the stdlib parser (default, no extra dependency)
+  - "lxml":        lxml.html directly (pip install lxml)
+  - "selectolax":  selectolax's lexbor engine (pip install selectolax)
+
+Parity holds for well-formed and typical real-world pages (see test/fixtures/html). The fast
+backends repair broken markup the HTML5 way (e.g. an unclosed <a> is closed by the next one),
+and selectolax does not expose <template> contents, so those cases can differ.
+"""
+
+import threading
+
+from bs4 import BeautifulSoup
+
+# BeautifulSoup keeps strings under these tags out of get_text() (Script, Stylesheet,
+# TemplateString, RubyTextString, RubyParenthesisString); the fast backends match it.
+SKIPPED_TEXT_TAGS = frozenset({"script", "style", "template", "rt", "rp"})
+
+
+def _join_text(strings) -> str:
+    return " ".join(s for s in (s.strip() for s in strings) if s)
+
+
+def _join_anchor_text(strings) -> str:
+    return "".join(s.strip() for s in strings)
+
+
+def _is_canonical_rel(rel) -> bool:
+    if isinstance(rel, str):
+        rel = rel.split()
+    return any(r.lower() == "canonical" for r in rel or ())
+
+
+class SoupBackend:
+    name = "html.parser"
+
+    def parse(self, html: str):
+        return BeautifulSoup(html, "html.parser")
+
+    def text(self, tree) -> str:
+        return tree.get_text(" ", strip=True)
+
+    def anchors(self, tree) -> list[tuple[str, str]]:
+        return [(a["href"], a.get_text(strip=True)) for a in tree.find_all("a", href=True)]
+
+    def canonical(self, tree) -> str | None:
+        for link in tree.find_all("link", href=True):
+            if _is_canonical_rel(link.get("rel")):
+                return link["href"]
+        return None
+
+
+class LxmlBackend:
+    name = "lxml"
+
+    def __init__(self):
+        import lxml.etree
+        import lxml.html
+
+        self._etree = lxml.etree
+        self._html = lxml.html
+        self._local = threading.local()  # lxml parser objects must not be shared across threads
+
+    def parse(self, html: str):
+        if not html or not html.strip():
+            return None
+        parser = getattr(self._local, "parser", None)
+        if parser is None:
+            parser = self._local.parser = self._html.HTMLParser(encoding="utf-8")
+        # Parse bytes: lxml refuses str input that carries an XML encoding declaration.
+        try:
+            return self._html.document_fromstring(html.encode("utf-8", "surrogatepass"), parser=parser)
+        except self._etree.ParserError:
+            return None
+
+    def _strings(self, root):
+        """Text nodes under root in document order, skipping SKIPPED_TEXT_TAGS subtrees."""
+        skip_depth = 0
+        for event, el in self._etree.iterwalk(root, events=("start", "end")):
+            is_element = isinstance(el.tag, str)
+            if event == "start":
+                if skip_depth or (is_element and el.tag in SKIPPED_TEXT_TAGS):
+                    skip_depth += 1
+                elif is_element and el.text:
+                    yield el.text
+            else:
+                if skip_depth:
+                    skip_depth -= 1
+                if not skip_depth and el is not root and el.tail:
+                    yield el.tail
+
+    def text(self, tree) -> str:
+        if tree is None:
+            return ""
+        return _join_text(self._strings(tree))
+
+    def anchors(self, tree) -> list[tuple[str, str]]:
+        if tree is None:
+            return []
+        out = []
+        for a in tree.iter("a"):
+            href = a.get("href")
+            if href is None:
+                continue
+            if any(p.tag in SKIPPED_TEXT_TAGS for p in a.iterancestors()):
+                out.append((href, ""))
+            else:
+                out.append((href, _join_anchor_text(self._strings(a))))
+        return out
+
+    def canonical(self, tree) -> str | None:
+        if tree is None:
+            return None
+        for link in tree.iter("link"):
+            href = link.get("href")
+            if href is not None and _is_canonical_rel(link.get("rel")):
+                return href
+        return None
+
+
+class SelectolaxBackend:
+    name = "selectolax"
+
+    def __init__(self):
+        from selectolax.lexbor import LexborHTMLParser
+
+        self._parser_cls = LexborHTMLParser
+
+    def parse(self, html: str):
+        return self._parser_cls(html)
+
+    def _strings(self, root):
+        """Text nodes under root in document order, skipping SKIPPED_TEXT_TAGS subtrees."""
+        if root is None:
+            return
+        root_id = root.mem_id
+        node = root.child
+        while node is not None:
+            if node.is_text_node:
+                yield node.text_content
+            elif node.is_element_node and node.tag not in SKIPPED_TEXT_TAGS and node.child is not None:
+                node = node.child
+                continue
+            # Next sibling, or climb until an ancestor below root has one.
+            while node is not None and node.next is None:
+                node = node.parent
+                if node is None or node.mem_id == root_id:
+                    node = None
+            if node is not None:
+                node = node.next
+
+    def text(self, tree) -> str:
+        return _join_text(self._strings(tree.root))
+
+    def anchors(self, tree) -> list[tuple[str, str]]:
+        out = []
+        for a in tree.css("a[href]"):
+            href = a.attributes.get("href") or ""
+            if self._in_skipped(a):
+                out.append((href, ""))
+            else:
+                out.append((href, _join_anchor_text(self._strings(a))))
+        return out
+
+    def canonical(self, tree) -> str | None:
+        for link in tree.css("link[href][rel]"):
+            if _is_canonical_rel(link.attributes.get("rel")):
+                return link.attributes.get("href")
+        return None
+
+    @staticmethod
+    def _in_skipped(node) -> bool:
+        parent = node.parent
+        while parent is not None:
+            if parent.tag in SKIPPED_TEXT_TAGS:
+                return True
+            parent = parent.parent
+        return False
+
+
+_BACKENDS = {
+    "html.parser": SoupBackend,
+    "lxml": LxmlBackend,
+    "selectolax": SelectolaxBackend,
+}
+_instances = {}
+
+PARSER_BACKENDS = tuple(_BACKENDS)
+
+
+def get_backend(name: str = "html.parser"):
+    """Return the (shared) backend for `name`; raises ValueError/ImportError if unusable."""
+    backend = _instances.get(name)
+    if backend is None:
+        if name not in _BACKENDS:
+            raise ValueError(f"Unknown html_parser '{name}'; expected one of {', '.join(PARSER_BACKENDS)}")
+        backend = _BACKENDS[name]()
+        _instances[name] = backend
+    return backend
+
+
+def available_backends() -> list[str]:
+    out = []
+    for name in PARSER_BACKENDS:
+        try:
+            get_backend(name)
+        except ImportError:
+            continue
+        out.append(name)
+    return out
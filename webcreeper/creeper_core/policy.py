@@ -0,0 +1,135 @@
+"""
+URL policies compiled once per crawl instead of per URL:
+  - HostMatcher: normalized host set; subdomain matching is one set lookup per label
+  - PatternSet:  regex list merged into a single alternation (one scan per URL)
+  - UrlPolicy:   domain allow/block lists with a per-host decision cache, URL patterns
+                 and allowed/blocked path prefixes
+"""
+
+import re
+
+# Patterns that cannot be merged safely: backreferences and conditionals like "(?(1)...)"
+# would point at the wrong group, and inline global flags like "(?i)" are only valid at
+# the start of the whole regex.
+_UNMERGEABLE = re.compile(r"\\[1-9]|\(\?P=|\(\?\(|\(\?[aiLmsux]+\)")
+
+
+def norm_host(host: str) -> str:
+    """Lowercase host without port and leading 'www.'."""
+    if not host:
+        return ""
+    host = host.strip().lower().split(":", 1)[0]
+    return host[4:] if host.startswith("www.") else host
+
+
+class HostMatcher:
+    """Exact host match, or (subdomains=True) any subdomain of a listed host: foo.bar.com matches bar.com."""
+
+    def __init__(self, hosts, subdomains: bool = False):
+        self.hosts = frozenset(h for h in (norm_host(h) for h in hosts or []) if h)
+        self.subdomains = subdomains
+
+    def __bool__(self) -> bool:
+        return bool(self.hosts)
+
+    def matches(self, host: str) -> bool:
+        """host must already be normalized (see norm_host)."""
+        hosts = self.hosts
+        if host in hosts:
+            return True
+        if self.subdomains:
+            i = host.find(".")
+            while i != -1:
+                if host[i + 1 :] in hosts:
+                    return True
+                i = host.find(".", i + 1)
+        return False
+
+
+class PatternSet:
+    """
+    Regexes searched as one combined alternation. Patterns that cannot be combined
+    (compiled with flags, backreferences, conditionals, inline global flags) are searched one by one.
+    """
+
+    def __init__(self, patterns=()):
+        self.patterns = [p if isinstance(p, re.Pattern) else re.compile(p) for p in patterns or []]
+        mergeable = [p for p in self.patterns if not p.flags & ~re.UNICODE and not _UNMERGEABLE.search(p.pattern)]
+        self._combined = None
+        if len(mergeable) > 1:
+            try:
+                self._combined = re.compile("|".join(f"(?:{p.pattern})" for p in mergeable))
+            except re.error:
+                pass
+        merged = {id(p) for p in mergeable} if self._combined is not None else set()
+        self._separate = [p for p in self.patterns if id(p) not in merged]
+
+    def __bool__(self) -> bool:
+        return bool(self.patterns)
+
+    def search(self, text: str) -> bool:
+        if self._combined is not None and self._combined.search(text):
+            return True
+        return any(p.search(text) for p in self._separate)
+
+    def first_match(self, text: str):
+        """The first pattern (in the given order) that matches text, or None. For diagnostics."""
+        return next((p for p in self.patterns if p.search(text)), None)
+
+
+class UrlPolicy:
+    """
+    Everything should_visit checks that depends only on settings, compiled once.
+    An empty allowed_domains / allowed_paths / allow_patterns list means "allow all".
+    """
+
+    HOST_CACHE_SIZE = 10_000
+
+    def __init__(
+        self,
+        allowed_domains=(),
+        blocked_domains=(),
+        allow_subdomains: bool = False,
+        allow_patterns=(),
+        block_patterns=(),
+        skip_patterns=(),
+        allowed_paths=(),
+        blocked_paths=(),
+    ):
+        self.allowed_hosts = HostMatcher(allowed_domains, allow_subdomains)
+        self.blocked_hosts = HostMatcher(blocked_domains, allow_subdomains)
+        self.allow_subdomains = allow_subdomains
+        self.allow_patterns = PatternSet(allow_patterns)
+        self.block_patterns = PatternSet(block_patterns)
+        self.skip_patterns = PatternSet(skip_patterns)
+        self.allowed_paths = tuple(allowed_paths or ())
+        self.blocked_paths = tuple(blocked_paths or ())
+        self._host_cache = {}  # raw netloc -> decision
+
+    def host_allowed(self, netloc: str) -> bool:
+        """Domain decision for a URL's netloc (blocked wins over allowed), cached per netloc."""
+        decision = self._host_cache.get(netloc)
+        if decision is None:
+            host = norm_host(netloc)
+            if self.blocked_hosts.matches(host):
+                decision = False
+            elif self.allowed_hosts:
+                decision = self.allowed_hosts.matches(host)
+            else:
+                decision = True
+            if len(self._host_cache) >= self.HOST_CACHE_SIZE:
+                self._host_cache.clear()
+            self._host_cache[netloc] = decision
+        return decision
+
+    def path_allowed(self, path: str) -> bool:
+        """Prefix checks: path must start with an allowed prefix (if any) and with no blocked one."""
+        if self.allowed_paths and not path.startswith(self.allowed_paths):
+            return False
+        return not (self.blocked_paths and path.startswith(self.blocked_paths))
+
+    def patterns_allow(self, url: str) -> bool:
+        """Block patterns win; with allow patterns, at least one must match."""
+        if self.block_patterns and self.block_patterns.search(url):
+            return False
+        return not self.allow_patterns or self.allow_patterns.search(url)
@@ -0,0 +1,129 @@
+import asyncio
+import json
+import os
+import time
+import urllib.robotparser as robotparser
+
+MISSING = object()
+
+
+class RobotsPending(Exception):
+    """
+    Raised by BaseAgent.is_allowed_by_robots when called on a running event loop for a host
+    whose robots.txt is not cached yet: the fetch has been started in the background and the
+    caller should `await pending.wait()` and retry (BaseAgent.should_visit_async does this).
+    """
+
+    def __init__(self, host: str, task: asyncio.Future):
+        super().__init__(f"robots.txt for {host} is being fetched")
+        self.host = host
+        self.task = task
+
+    async def wait(self):
+        await asyncio.shield(self.task)
+
+
+class RobotsCache:
+    """
+    robots.txt cache keyed by host:
+      - Entries expire after `ttl` seconds
+      - Async lookups are single-flight: concurrent URLs for a new host share one fetch
+      - Raw bodies can be persisted to a JSON file and reloaded by the next run
+    """
+
+    def __init__(self, ttl: float | None = 86400, path: str | None = None):
+        self.ttl = ttl if ttl and ttl > 0 else None  # None: never expires
+        self.path = path
+        self._entries = {}  # host -> {"fetched_at", "status", "text"}
+        self._parsers = {}  # host -> RobotFileParser | None
+        self._inflight = {}  # host -> asyncio.Task
+        if path:
+            self.load()
+
+    def __contains__(self, host: str) -> bool:
+        return self.get(host) is not MISSING
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def parse(status: int, text: str | None):
+        """Build a parser from a fetch outcome; None means no usable robots.txt (allow all)."""
+        if status != 200 or not text:
+            return None
+        rp = robotparser.RobotFileParser()
+        rp.parse(text.splitlines())
+        return rp
+
+    def get(self, host: str):
+        """Cached parser (or None) for `host`, or MISSING if absent or expired."""
+        entry = self._entries.get(host)
+        if entry is None:
+            return MISSING
+        if self.ttl is not None and time.time() - entry["fetched_at"] > self.ttl:
+            self._entries.pop(host, None)
+            self._parsers.pop(host, None)
+            return MISSING
+        if host not in self._parsers:
+            self._parsers[host] = self.parse(entry["status"], entry["text"])
+        return self._parsers[host]
+
+    def set(self, host: str, status: int, text: str | None):
+        self._entries[host] = {"fetched_at": time.time(), "status": status, "text": text}
+        self._parsers[host] = self.parse(status, text)
+        return self._parsers[host]
+
+    def fetch_in_background(self, host: str, fetch) -> asyncio.Task:
+        """
+        Start (or join) the single in-flight fetch for `host`.
+        `fetch` is a zero-arg coroutine function returning (status, text).
+        """
+        task = self._inflight.get(host)
+        if task is None:
+
+            async def fill():
+                status, text = await fetch()
+                return self.set(host, status, text)
+
+            task = asyncio.ensure_future(fill())
+            self._inflight[host] = task
+            task.add_done_callback(lambda _: self._inflight.pop(host, None))
+        return task
+
+    async def get_async(self, host: str, fetch):
+        cached = self.get(host)
+        if cached is not MISSING:
+            return cached
+        return await asyncio.shield(self.fetch_in_background(host, fetch))
+
+    # -------------------- persistence --------------------
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        for host, entry in (data.get("entries") or {}).items():
+            if isinstance(entry, dict) and {"fetched_at", "status", "text"} <= entry.keys():
+                self._entries[host] = entry
+
+    def save(self):
+        """Write fresh entries to `path`; network failures (status 0) are not persisted."""
+        if not self.path:
+            return
+        now = time.time()
+        entries = {
+            host: entry
+            for host, entry in self._entries.items()
+            if entry["status"] and (self.ttl is None or now - entry["fetched_at"] <= self.ttl)
+        }
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "entries": entries}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,260 @@
+import asyncio
+import contextvars
+import time
+from collections import deque
+
+
+class TokenBucket:
+    """
+    Token-bucket pacing: `rate` tokens per second, at most `burst` tokens banked.
+    A rate <= 0 disables pacing.
+    """
+
+    def __init__(self, rate: float, burst: float = 1.0):
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst))
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        if self.rate > 0:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def set_rate(self, rate: float):
+        self._refill(time.monotonic())
+        self.rate = float(rate)
+
+    def delay(self) -> float:
+        """Seconds until a token is available, without taking it."""
+        if self.rate <= 0:
+            return 0.0
+        self._refill(time.monotonic())
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def reserve(self) -> float:
+        """
+        Take a token now and return how long to wait before using it.
+        Tokens may go into debt, so concurrent callers get increasing, non-overlapping slots.
+        """
+        if self.rate <= 0:
+            return 0.0
+        self._refill(time.monotonic())
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class _HostState:
+    __slots__ = (
+        "queue",
+        "active",
+        "limit",
+        "delay",
+        "bucket",
+        "paused_until",
+        "dispatched",
+        "queue_wait",
+        "max_queue_wait",
+        "pace_wait",
+    )
+
+    def __init__(self, delay: float, burst: float, limit):
+        self.queue = deque()  # (enqueued_at, item)
+        self.active = 0
+        self.limit = limit
+        self.delay = delay
+        self.bucket = TokenBucket(1.0 / delay if delay > 0 else 0.0, burst)
+        self.paused_until = 0.0  # monotonic time before which the host gets no request (Retry-After)
+        self.dispatched = 0
+        self.queue_wait = 0.0
+        self.max_queue_wait = 0.0
+        self.pace_wait = 0.0
+
+
+class HostScheduler:
+    """
+    Per-host politeness scheduler:
+      - Items are queued per host and dispatched round-robin across hosts that are ready
+      - A host is ready when it is under its concurrency cap and has a pacing token
+      - Token-bucket pacing per host (rate = 1 / delay), shared by every request to it;
+        the token taken at dispatch pays for the worker's next pace() call on that host
+      - A host can be paused (e.g. for a Retry-After header): nothing is sent to it until then
+      - Bounded: put() waits while `capacity` items are queued in total
+    With `metrics` (a CrawlMetrics), queue and pacing waits are recorded as the
+    queue_wait / rate_limit_wait phases.
+    """
+
+    def __init__(self, delay: float = 0.0, burst: float = 1.0, max_per_host=None, capacity=None, metrics=None):
+        self.delay = float(delay or 0.0)
+        self.burst = float(burst or 1.0)
+        self.max_per_host = max_per_host
+        self.capacity = capacity
+        self.metrics = metrics
+        self._hosts = {}  # host -> _HostState
+        self._ring = deque()  # hosts with queued items, in round-robin order
+        self._pending = 0
+        self._changed = None
+        # Host whose token was already taken at dispatch, per worker task
+        self._prepaid = contextvars.ContextVar(f"host_scheduler_prepaid_{id(self)}", default=None)
+
+    # -------------------- per-host configuration --------------------
+
+    def _state(self, host: str) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = _HostState(self.delay, self.burst, self.max_per_host)
+            self._hosts[host] = state
+        return state
+
+    def set_delay(self, host: str, delay: float):
+        """Override the pacing delay (seconds between requests) for one host."""
+        state = self._state(host)
+        state.delay = max(0.0, float(delay))
+        state.bucket.set_rate(1.0 / state.delay if state.delay > 0 else 0.0)
+        self._notify()
+
+    def get_delay(self, host: str) -> float:
+        return self._state(host).delay
+
+    def set_limit(self, host: str, limit):
+        """Override the concurrency cap for one host (None = uncapped)."""
+        self._state(host).limit = limit
+        self._notify()
+
+    def get_limit(self, host: str):
+        return self._state(host).limit
+
+    def pause(self, host: str, seconds: float):
+        """Send nothing to `host` for `seconds` (extends, never shortens, a running pause)."""
+        state = self._state(host)
+        state.paused_until = max(state.paused_until, time.monotonic() + max(0.0, float(seconds)))
+        self._notify()
+
+    def paused_for(self, host: str) -> float:
+        """Seconds left in host's pause (0.0 if not paused)."""
+        state = self._hosts.get(host)
+        return max(0.0, state.paused_until - time.monotonic()) if state is not None else 0.0
+
+    # -------------------- queueing --------------------
+
+    def clear(self):
+        """Drop queued items and in-flight counts; per-host settings and stats are kept."""
+        for state in self._hosts.values():
+            state.queue.clear()
+            state.active = 0
+        self._ring.clear()
+        self._pending = 0
+        self._changed = asyncio.Event()
+
+    def _event(self) -> asyncio.Event:
+        if self._changed is None:
+            self._changed = asyncio.Event()
+        return self._changed
+
+    def _notify(self):
+        if self._changed is not None:
+            self._changed.set()
+
+    async def _wait_changed(self, timeout=None):
+        try:
+            await asyncio.wait_for(self._event().wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def pending(self) -> int:
+        return self._pending
+
+    async def put(self, host: str, item):
+        while self.capacity is not None and self._pending >= self.capacity:
+            self._event().clear()
+            await self._wait_changed()
+        state = self._state(host)
+        if not state.queue:
+            self._ring.append(host)
+        state.queue.append((time.monotonic(), item))
+        self._pending += 1
+        self._notify()
+
+    def _pick(self):
+        """Return (host, item), or (None, seconds until a paced host becomes ready)."""
+        retry_in = None
+        for _ in range(len(self._ring)):
+            host = self._ring.popleft()
+            state = self._hosts[host]
+            if state.limit is not None and state.active >= state.limit:
+                self._ring.append(host)
+                continue
+            wait = max(state.bucket.delay(), state.paused_until - time.monotonic())
+            if wait > 0:
+                retry_in = wait if retry_in is None else min(retry_in, wait)
+                self._ring.append(host)
+                continue
+
+            state.bucket.reserve()
+            enqueued_at, item = state.queue.popleft()
+            if state.queue:
+                self._ring.append(host)
+            waited = time.monotonic() - enqueued_at
+            state.active += 1
+            state.dispatched += 1
+            state.queue_wait += waited
+            state.max_queue_wait = max(state.max_queue_wait, waited)
+            if self.metrics is not None:
+                self.metrics.observe("queue_wait", waited)
+            self._pending -= 1
+            self._notify()
+            return host, item
+        return None, retry_in
+
+    async def get(self):
+        """Wait for the next item from a ready host; returns (host, item). Call release(host) when done."""
+        while True:
+            self._event().clear()
+            host, out = self._pick()
+            if host is not None:
+                self._prepaid.set(host)
+                return host, out
+            await self._wait_changed(out)
+
+    def release(self, host: str):
+        if self._prepaid.get() == host:
+            self._prepaid.set(None)
+        state = self._state(host)
+        state.active = max(0, state.active - 1)
+        self._notify()
+
+    async def pace(self, host: str) -> float:
+        """Take a pacing token for `host`, sleeping until its slot; returns the time waited."""
+        state = self._state(host)
+        if self._prepaid.get() == host:
+            self._prepaid.set(None)
+            wait = state.paused_until - time.monotonic()  # paused since dispatch
+            if wait <= 0:
+                return 0.0
+        else:
+            wait = max(state.bucket.reserve(), state.paused_until - time.monotonic())
+        if self.metrics is not None:
+            self.metrics.observe("rate_limit_wait", wait)
+        if wait > 0:
+            state.pace_wait += wait
+            await asyncio.sleep(wait)
+        return wait
+
+    # -------------------- diagnostics --------------------
+
+    def stats(self) -> dict:
+        """Per-host queue depth, in-flight count, pacing and wait times (seconds)."""
+        out = {}
+        for host, state in self._hosts.items():
+            out[host] = {
+                "queued": len(state.queue),
+                "active": state.active,
+                "limit": state.limit,
+                "delay": state.delay,
+                "paused_for": max(0.0, state.paused_until - time.monotonic()),
+                "dispatched": state.dispatched,
+                "avg_queue_wait": state.queue_wait / state.dispatched if state.dispatched else 0.0,
+                "max_queue_wait": state.max_queue_wait,
+                "rate_limit_wait": state.pace_wait,
+            }
+        return out
@@ -0,0 +1,212 @@
+"""
+Host-sharded crawling. Every host belongs to exactly one of N shards (a stable hash of its
+politeness key), so each shard's crawler is the only one pacing its hosts and politeness holds
+across processes and machines. Links to a host owned by another shard go through a ShardQueue:
+  - ShardQueue:       the exchange interface; a Redis or message-queue backend implements it
+  - SqliteShardQueue: local backend, one SQLite file shared by the shard processes of a machine
+                      (or by machines on a filesystem with working SQLite locking)
+  - ShardExchange:    one shard's side of it: routing, batched sends, inbox polling, idleness
+Termination: a shard reports itself idle once its frontier, workers and outbox are empty. The
+crawl is over when all shards are idle and no message is waiting. Both are read in one
+snapshot, and receiving messages marks the receiver busy atomically, so no link is lost
+between shards.
+"""
+
+import os
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+
+from webcreeper.creeper_core.urlset import fingerprint64
+
+
+def shard_of(host: str, num_shards: int) -> int:
+    """Shard owning `host` (a politeness key such as BaseAgent._host_key returns)."""
+    return fingerprint64(host) % num_shards if num_shards > 1 else 0
+
+
+class ShardQueue(ABC):
+    """Cross-shard link exchange. Implementations must be picklable (they are sent to shard processes)."""
+
+    @abstractmethod
+    def reset(self):
+        """Drop all messages and shard states; call once before the shards start."""
+
+    @abstractmethod
+    def send(self, messages: list[tuple[int, str, int]]):
+        """Queue (shard, url, depth) messages."""
+
+    @abstractmethod
+    def receive(self, shard: int, limit: int) -> list[tuple[str, int]]:
+        """Take up to `limit` (url, depth) messages for `shard`; if any, the shard is marked busy in the same step."""
+
+    @abstractmethod
+    def set_idle(self, shard: int, idle: bool):
+        pass
+
+    @abstractmethod
+    def finished(self, num_shards: int) -> bool:
+        """True if all `num_shards` shards have reported idle and no message is waiting."""
+
+    def close(self):
+        pass
+
+
+class SqliteShardQueue(ShardQueue):
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS messages (
+            id INTEGER PRIMARY KEY, shard INTEGER NOT NULL, url TEXT NOT NULL, depth INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS messages_shard ON messages (shard, id);
+        CREATE TABLE IF NOT EXISTS shards (shard INTEGER PRIMARY KEY, idle INTEGER NOT NULL, updated_at REAL NOT NULL);
+    """
+
+    def __init__(self, path: str, timeout: float = 30.0):
+        self.path = path
+        self.timeout = timeout
+        self._conn = None
+
+    def __getstate__(self):
+        return {"path": self.path, "timeout": self.timeout, "_conn": None}
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Autocommit; multi-statement steps use explicit IMMEDIATE transactions.
+            self._conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(self.SCHEMA)
+        return self._conn
+
+    def reset(self):
+        conn = self._db()
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("DELETE FROM messages")
+        conn.execute("DELETE FROM shards")
+        conn.execute("COMMIT")
+
+    def send(self, messages: list[tuple[int, str, int]]):
+        if messages:
+            conn = self._db()
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany("INSERT INTO messages (shard, url, depth) VALUES (?, ?, ?)", messages)
+            conn.execute("COMMIT")
+
+    def receive(self, shard: int, limit: int) -> list[tuple[str, int]]:
+        conn = self._db()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(
+                "SELECT id, url, depth FROM messages WHERE shard = ? ORDER BY id LIMIT ?", (shard, limit)
+            ).fetchall()
+            if rows:
+                conn.execute("DELETE FROM messages WHERE shard = ? AND id <= ?", (shard, rows[-1][0]))
+                self._set_idle(conn, shard, False)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return [(url, depth) for _, url, depth in rows]
+
+    @staticmethod
+    def _set_idle(conn, shard: int, idle: bool):
+        conn.execute(
+            "INSERT OR REPLACE INTO shards (shard, idle, updated_at) VALUES (?, ?, ?)", (shard, int(idle), time.time())
+        )
+
+    def set_idle(self, shard: int, idle: bool):
+        self._set_idle(self._db(), shard, idle)
+
+    def finished(self, num_shards: int) -> bool:
+        conn = self._db()
+        conn.execute("BEGIN")  # one read snapshot for both queries
+        try:
+            idle = conn.execute("SELECT COUNT(*) FROM shards WHERE idle = 1").fetchone()[0]
+            waiting = conn.execute("SELECT EXISTS (SELECT 1 FROM messages)").fetchone()[0]
+        finally:
+            conn.execute("COMMIT")
+        return idle >= num_shards and not waiting
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def make_shard_queue(spec) -> ShardQueue:
+    """A ShardQueue as given, or a SqliteShardQueue for a file path."""
+    if isinstance(spec, ShardQueue):
+        return spec
+    if isinstance(spec, (str, os.PathLike)):
+        return SqliteShardQueue(os.fspath(spec))
+    raise ValueError(f"shard_queue must be a ShardQueue or a SQLite file path, not {spec!r}")
+
+
+class ShardExchange:
+    """
+    One shard's view of the exchange: URLs on hosts it does not own are batched into its
+    outbox; the inbox is polled every `poll_interval` seconds.
+    """
+
+    def __init__(self, queue: ShardQueue, index: int, count: int, poll_interval: float = 0.5, batch_size: int = 500):
+        if not 0 <= index < count:
+            raise ValueError(f"shard_index {index} is outside 0..{count - 1}")
+        self.queue = queue
+        self.index = index
+        self.count = count
+        self.poll_interval = poll_interval
+        self.batch_size = max(1, int(batch_size))
+        self.sent = 0
+        self.received = 0
+        self._outbox = []
+        self._idle = None
+        self._polled_at = 0.0
+
+    def owns(self, host: str) -> bool:
+        return shard_of(host, self.count) == self.index
+
+    def route(self, host: str, url: str, depth: int) -> bool:
+        """Queue url for its owner if that is another shard; False if it is ours."""
+        owner = shard_of(host, self.count)
+        if owner == self.index:
+            return False
+        self._outbox.append((owner, url, depth))
+        if len(self._outbox) >= self.batch_size:
+            self.flush()
+        return True
+
+    def flush(self):
+        if self._outbox:
+            outbox, self._outbox = self._outbox, []
+            self.queue.send(outbox)
+            self.sent += len(outbox)
+
+    def start(self):
+        self._mark_idle(False)
+
+    def poll(self) -> list[tuple[str, int]]:
+        """Send the outbox and, at most every poll_interval, take (url, depth) messages addressed to us."""
+        self.flush()
+        now = time.monotonic()
+        if now - self._polled_at < self.poll_interval:
+            return []
+        self._polled_at = now
+        messages = self.queue.receive(self.index, self.batch_size)
+        if messages:
+            self._idle = False
+            self.received += len(messages)
+        return messages
+
+    def finished(self) -> bool:
+        """Report this shard idle (nothing local left to do) and check whether every shard is."""
+        self.flush()
+        self._mark_idle(True)
+        return self.queue.finished(self.count)
+
+    def _mark_idle(self, idle: bool):
+        if self._idle is not idle:
+            self.queue.set_idle(self.index, idle)
+            self._idle = idle
@@ -0,0 +1,113 @@
+"""
+Near-duplicate detection with 64-bit SimHash (Charikar) and a banded Hamming-distance index
+(Manku et al., "Detecting Near-Duplicates for Web Crawling").
+
+Pages whose visible text differs only in small parts (timestamps, counters, footers) get
+fingerprints a few bits apart; pages with unrelated text differ in ~32 bits.
+"""
+
+import re
+from array import array
+from collections import Counter
+from hashlib import blake2b
+
+_WORD_RE = re.compile(r"\w+")
+
+# Bit-sliced accumulation: every fingerprint bit gets its own 32-bit counter lane inside one
+# big integer, so summing N feature hashes costs N big-int additions instead of 64 * N steps.
+_LANE = 32
+_LANE_MASK = (1 << _LANE) - 1
+_SPREAD = [sum(1 << (_LANE * k) for k in range(8) if b >> k & 1) for b in range(256)]
+
+
+def _spread(digest: bytes) -> int:
+    out = 0
+    for j, b in enumerate(digest):
+        if b:
+            out |= _SPREAD[b] << (_LANE * 8 * j)
+    return out
+
+
+def simhash64(text: str, shingle_size: int = 3) -> int | None:
+    """
+    SimHash of `text` over word shingles (lowercased, `shingle_size` words each, weighted by
+    frequency). Returns None for text without words.
+    """
+    words = _WORD_RE.findall(text.lower()) if text else []
+    if not words:
+        return None
+    n = max(1, min(shingle_size, len(words)))
+    features = Counter(" ".join(words[i : i + n]) for i in range(len(words) - n + 1))
+
+    acc = 0
+    total = 0
+    for feature, weight in features.items():
+        acc += weight * _spread(blake2b(feature.encode("utf-8", "surrogatepass"), digest_size=8).digest())
+        total += weight
+
+    fp = 0
+    for i in range(64):
+        if 2 * ((acc >> (_LANE * i)) & _LANE_MASK) > total:
+            fp |= 1 << i
+    return fp
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+class SimHashIndex:
+    """
+    Fingerprints indexed for "is there one within `max_distance` bits?" lookups.
+
+    The 64 bits are split into `max_distance + 1` bands; two fingerprints within the distance
+    agree exactly on at least one band (pigeonhole), so only that band's bucket is scanned.
+    Each bucket is an array of uint64, so the index costs ~8 bytes per page per band.
+    """
+
+    def __init__(self, max_distance: int = 3):
+        if not 0 <= max_distance < 64:
+            raise ValueError("max_distance must be between 0 and 63")
+        self.max_distance = max_distance
+        num_bands = max_distance + 1
+        width, extra = divmod(64, num_bands)
+        self._bands = []  # (shift, mask) per band
+        shift = 0
+        for i in range(num_bands):
+            bits = width + (1 if i < extra else 0)
+            self._bands.append((shift, (1 << bits) - 1))
+            shift += bits
+        self._tables = [{} for _ in self._bands]  # band value -> array("Q") of fingerprints
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def find(self, fp: int) -> int | None:
+        """A stored fingerprint within max_distance of `fp`, or None."""
+        limit = self.max_distance
+        for (shift, mask), table in zip(self._bands, self._tables):
+            bucket = table.get((fp >> shift) & mask)
+            if bucket is None:
+                continue
+            for other in bucket:
+                if (fp ^ other).bit_count() <= limit:
+                    return other
+        return None
+
+    def add(self, fp: int):
+        for (shift, mask), table in zip(self._bands, self._tables):
+            key = (fp >> shift) & mask
+            bucket = table.get(key)
+            if bucket is None:
+                table[key] = array("Q", (fp,))
+            else:
+                bucket.append(fp)
+        self._len += 1
+
+    def add_if_new(self, fp: int) -> int | None:
+        """Return the near-duplicate of `fp` if there is one; otherwise store `fp` and return None."""
+        match = self.find(fp)
+        if match is None:
+            self.add(fp)
+        return match
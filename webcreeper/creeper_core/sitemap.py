@@ -0,0 +1,190 @@
+"""
+Streaming sitemap parsing (sitemaps.org protocol):
+  - <urlset> sitemaps, <sitemapindex> files pointing at more sitemaps, and plain-text sitemaps
+    (one URL per line)
+  - gzip is detected from the magic bytes and inflated incrementally
+  - Only <loc> / <lastmod> of the protocol's namespace, directly inside <url> / <sitemap>, are
+    read: extension fields such as <image:loc> never replace the page URL
+  - Bytes are fed as they arrive: each finished <url> / <sitemap> element is returned and
+    dropped from the tree, so memory stays bounded by one entry, not the file
+"""
+
+import re
+import xml.etree.ElementTree as ET
+import zlib
+from datetime import datetime, timezone
+from typing import NamedTuple
+
+# The protocol's limit per (uncompressed) file; also caps what a gzip bomb can inflate to.
+MAX_SITEMAP_BYTES = 50 * 1024 * 1024
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_INFLATE_STEP = 1024 * 1024
+_DATE_RE = re.compile(r"^\d{4}(-\d{2}(-\d{2})?)?$")
+
+# sitemaps.org, the legacy Google namespace, and sitemaps that declare none.
+SITEMAP_NAMESPACES = frozenset(
+    {"http://www.sitemaps.org/schemas/sitemap/0.9", "http://www.google.com/schemas/sitemap/0.84", ""}
+)
+
+
+class SitemapError(ValueError):
+    pass
+
+
+class SitemapEntry(NamedTuple):
+    loc: str
+    lastmod: float | None = None  # epoch seconds
+    sitemap: bool = False  # True for a <sitemap> entry of a sitemap index
+
+
+def parse_lastmod(value: str | None) -> float | None:
+    """W3C datetime ("2024-05-01", "2024-05-01T10:00Z", "2024-05-01T10:00:00+02:00") as epoch seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        if _DATE_RE.match(value):
+            parts = [int(p) for p in value.split("-")] + [1, 1]
+            dt = datetime(parts[0], parts[1], parts[2], tzinfo=timezone.utc)
+        else:
+            dt = datetime.fromisoformat(value[:-1] + "+00:00" if value.endswith(("Z", "z")) else value)
+            if dt.tzinfo is None:
+                dt = dt.replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+    return dt.timestamp()
+
+
+def _split_tag(tag: str) -> tuple[str, str]:
+    """ "{namespace}name" -> (namespace, name)"""
+    if tag.startswith("{"):
+        namespace, _, name = tag[1:].partition("}")
+        return namespace, name
+    return "", tag
+
+
+def _protocol_tag(tag: str) -> str | None:
+    """Local name of a sitemap protocol element, None for extension elements (image:, video:, ...)."""
+    namespace, name = _split_tag(tag)
+    return name if namespace in SITEMAP_NAMESPACES else None
+
+
+class SitemapParser:
+    """
+    Incremental parser: feed() bytes as they arrive and get the entries completed so far;
+    close() returns the rest. `kind` is "urlset", "sitemapindex" or "text" once known.
+    Raises SitemapError for malformed XML or more than `max_bytes` of (inflated) content.
+    """
+
+    def __init__(self, max_bytes: int | None = MAX_SITEMAP_BYTES):
+        self.max_bytes = max_bytes
+        self.kind = None
+        self.bytes_parsed = 0
+        self._head = b""  # first bytes, until the format is known
+        self._sniff = b""  # leading whitespace / BOM, until the first byte that tells XML from text
+        self._inflate = None
+        self._xml = None
+        self._root = None
+        self._fields = {}
+        self._depth = 0  # open elements; entries are at 2, their fields at 3
+        self._text_tail = b""
+
+    def feed(self, data: bytes) -> list[SitemapEntry]:
+        if self._xml is None and self.kind != "text":
+            self._head += data
+            if len(self._head) < 2:
+                return []
+            data, self._head = self._head, b""
+            if self._inflate is None and data.startswith(_GZIP_MAGIC):
+                self._inflate = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if self._inflate is None:
+            return self._parse(data)
+        entries = []
+        while data:  # inflate in bounded steps so max_bytes is checked before memory blows up
+            entries += self._parse(self._inflate.decompress(data, _INFLATE_STEP))
+            data = self._inflate.unconsumed_tail
+        return entries
+
+    def close(self) -> list[SitemapEntry]:
+        entries = []
+        if self._head:
+            data, self._head = self._head, b""
+            entries += self._parse(data)
+        if self._inflate is not None:
+            entries += self._parse(self._inflate.flush())
+        if self.kind == "text":
+            entries += self._text_lines(self._text_tail, final=True)
+        elif self._xml is not None:
+            try:
+                self._xml.close()
+            except ET.ParseError as e:
+                raise SitemapError(f"Malformed sitemap: {e}") from None
+            entries += self._drain()
+        return entries
+
+    def _parse(self, data: bytes) -> list[SitemapEntry]:
+        if not data:
+            return []
+        self.bytes_parsed += len(data)
+        if self.max_bytes is not None and self.bytes_parsed > self.max_bytes:
+            raise SitemapError(f"Sitemap larger than {self.max_bytes} bytes")
+        if self.kind is None and self._xml is None:
+            self._sniff += data
+            start = self._sniff.lstrip(b"\xef\xbb\xbf \t\r\n")
+            if not start:
+                return []
+            data, self._sniff = start, b""  # an XML declaration must come first
+            if data[:1] == b"<":
+                self._xml = ET.XMLPullParser(events=("start", "end"))
+            else:
+                self.kind = "text"
+        if self.kind == "text":
+            return self._text_lines(data)
+        try:
+            self._xml.feed(data)
+        except ET.ParseError as e:
+            raise SitemapError(f"Malformed sitemap: {e}") from None
+        return self._drain()
+
+    def _drain(self) -> list[SitemapEntry]:
+        entries = []
+        for event, elem in self._xml.read_events():
+            if event == "start":
+                self._depth += 1
+                if self._depth == 2:
+                    self._fields = {}  # a new entry (or an extension element between entries)
+                if self._root is None:
+                    self._root = elem
+                    self.kind = _split_tag(elem.tag)[1]
+                continue
+            depth, self._depth = self._depth, self._depth - 1
+            tag = _protocol_tag(elem.tag)
+            if depth == 3 and tag in ("loc", "lastmod"):
+                self._fields[tag] = (elem.text or "").strip()
+            elif depth == 2 and tag in ("url", "sitemap"):
+                loc = self._fields.get("loc")
+                if loc:
+                    entries.append(SitemapEntry(loc, parse_lastmod(self._fields.get("lastmod")), tag == "sitemap"))
+                self._fields = {}
+                self._root.clear()  # drop finished entries from the tree
+        return entries
+
+    def _text_lines(self, data: bytes, final: bool = False) -> list[SitemapEntry]:
+        data = self._text_tail + data if not final else data
+        lines = data.split(b"\n")
+        self._text_tail = b"" if final else lines.pop()
+        entries = []
+        for line in lines:
+            url = line.decode("utf-8", "replace").strip()
+            if url.startswith(("http://", "https://")):
+                entries.append(SitemapEntry(url))
+        return entries
+
+
+def parse_sitemap(data: bytes, max_bytes: int | None = MAX_SITEMAP_BYTES) -> tuple[str | None, list[SitemapEntry]]:
+    """Parse a whole sitemap held in memory: (kind, entries)."""
+    parser = SitemapParser(max_bytes)
+    entries = parser.feed(data)
+    entries += parser.close()
+    return parser.kind, entries
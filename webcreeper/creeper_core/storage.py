@@ -1,5 +1,7 @@
+import gzip
 import json
 import os
+import threading
 
 
 def save_jsonl_line(path: str, data: dict):
@@ -19,3 +21,203 @@ def save_json(path: str, data: dict | list):
     os.makedirs(os.path.dirname(path), exist_ok=True)
     with open(path, "w", encoding="utf-8") as f:
         json.dump(data, f, indent=4, ensure_ascii=False)
+
+
+def save_text(path: str, text: str):
+    """
+    Replaces a text file atomically (written to a temp file, then renamed),
+    so readers never see a half-written file.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+COMPRESSION_SUFFIXES = {None: "", "gzip": ".gz", "zstd": ".zst"}
+
+
+def output_path(path: str, compression: str | None = None) -> str:
+    """`path` with the compression suffix added (results.jsonl -> results.jsonl.gz)."""
+    if compression not in COMPRESSION_SUFFIXES:
+        raise ValueError(f"Unknown compression '{compression}'; expected None, 'gzip' or 'zstd'")
+    suffix = COMPRESSION_SUFFIXES[compression]
+    return path if path.endswith(suffix) else path + suffix
+
+
+def insert_suffix(path: str, suffix: str) -> str:
+    """Add `suffix` after the file's stem: (results.jsonl.gz, "1") -> results.1.jsonl.gz."""
+    directory, name = os.path.split(path)
+    stem, dot, ext = name.partition(".")
+    return os.path.join(directory, f"{stem}.{suffix}{dot}{ext}")
+
+
+def part_path(path: str, index: int) -> str:
+    """Rotated part `index` of a JsonlWriter output: results.jsonl, results.1.jsonl, ..."""
+    return path if index == 0 else insert_suffix(path, str(index))
+
+
+def existing_parts(path: str) -> list[str]:
+    """Existing part files of a JsonlWriter output, in write order."""
+    out = []
+    while os.path.exists(part_path(path, len(out))):
+        out.append(part_path(path, len(out)))
+    return out
+
+
+class JsonlWriter:
+    """
+    Buffered JSON Lines writer for high result volumes:
+      - write() only serializes the record into an in-memory batch
+      - A background thread appends batches every `flush_interval` seconds, or as soon as
+        `flush_size` records are waiting, to a file handle kept open between batches
+      - Optional compression: "gzip" or "zstd" (needs the optional 'zstandard' package)
+      - Optional rotation: after `rotate_bytes` (uncompressed) a new part is started:
+        results.jsonl, results.1.jsonl, results.2.jsonl, ...
+    With truncate=False, writing continues in the last existing part.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        compression: str | None = None,
+        flush_size: int = 1000,
+        flush_interval: float = 1.0,
+        rotate_bytes: int | None = None,
+        truncate: bool = False,
+    ):
+        self.path = output_path(path, compression)
+        self.compression = compression
+        self.flush_size = max(1, int(flush_size))
+        self.flush_interval = flush_interval
+        self.rotate_bytes = rotate_bytes
+        self.records_written = 0
+        if compression == "zstd":
+            import zstandard  # noqa: F401  (fail at construction, not in the writer thread)
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        existing = self.parts()
+        if truncate:
+            for part in existing:
+                os.remove(part)
+            existing = []
+        self._part = len(existing) - 1 if existing else 0
+        self._file = None
+        self._bytes = os.path.getsize(existing[-1]) if existing and not compression else 0
+
+        self._buffer = []
+        self._lock = threading.Lock()  # guards _buffer
+        self._io_lock = threading.Lock()  # one batch written at a time
+        self._wake = threading.Event()
+        self._closing = False
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name="webcreeper-jsonl-writer", daemon=True)
+        self._thread.start()
+
+    # -------------------- file parts --------------------
+
+    def part_path(self, index: int) -> str:
+        return part_path(self.path, index)
+
+    def parts(self) -> list[str]:
+        """Existing part files, in write order."""
+        return existing_parts(self.path)
+
+    def _open(self):
+        path = self.part_path(self._part)
+        if self.compression == "gzip":
+            return gzip.open(path, "ab")
+        if self.compression == "zstd":
+            import zstandard
+
+            return zstandard.ZstdCompressor().stream_writer(open(path, "ab"), closefd=True)
+        return open(path, "ab")
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    # -------------------- writing --------------------
+
+    def write(self, record: dict):
+        if self._error is not None:
+            raise self._error
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._buffer.append(line)
+            full = len(self._buffer) >= self.flush_size
+        if full:
+            self._wake.set()
+
+    def _drain(self):
+        with self._io_lock:
+            with self._lock:
+                batch, self._buffer = self._buffer, []
+            if not batch:
+                return
+            if not self.rotate_bytes:
+                self._write_chunk("".join(batch).encode("utf-8"), len(batch))
+                return
+            # Split the batch at part boundaries; a part holds at least one record.
+            chunk, size = [], 0
+            for line in batch:
+                data = line.encode("utf-8")
+                if (self._bytes or chunk) and self._bytes + size + len(data) > self.rotate_bytes:
+                    self._write_chunk(b"".join(chunk), len(chunk))
+                    self._close_file()
+                    self._part += 1
+                    self._bytes = 0
+                    chunk, size = [], 0
+                chunk.append(data)
+                size += len(data)
+            self._write_chunk(b"".join(chunk), len(chunk))
+
+    def _write_chunk(self, data: bytes, records: int):
+        if not data:
+            return
+        if self._file is None:
+            self._file = self._open()
+        self._file.write(data)
+        self._file.flush()
+        self._bytes += len(data)
+        self.records_written += records
+
+    def _run(self):
+        while not self._closing:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self._drain()
+            except Exception as e:  # surfaced to the caller on the next write/flush/close
+                self._error = e
+                return
+
+    def flush(self):
+        """Write everything buffered so far (blocking)."""
+        if self._error is not None:
+            raise self._error
+        self._drain()
+
+    def close(self):
+        if self._closing:
+            return
+        self._closing = True
+        self._wake.set()
+        self._thread.join()
+        try:
+            self.flush()
+        finally:
+            with self._io_lock:
+                self._close_file()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,198 @@
+"""
+Memory-bounded URL membership sets (selected with the `url_set` setting):
+  - "set":         plain Python set of URL strings (exact, largest)
+  - "fingerprint": 64-bit URL fingerprints in an array-backed hash table
+                   (~16-32 bytes per URL; false positives ~n / 2**64, negligible)
+  - "bloom":       scalable Bloom filter (~2 bytes per URL at 0.1% error;
+                   a false positive makes an unseen URL look already seen)
+"""
+
+import math
+from array import array
+from hashlib import blake2b
+
+
+def fingerprint64(url: str) -> int:
+    """Stable 64-bit fingerprint of a URL string."""
+    return int.from_bytes(blake2b(url.encode("utf-8", "surrogatepass"), digest_size=8).digest(), "little")
+
+
+class FingerprintSet:
+    """
+    Set of URLs stored as 64-bit fingerprints in an open-addressing table (array of uint64,
+    linear probing, resized at 50% load). URL strings are not kept, so it cannot be iterated.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        size = 1 << max(4, (max(1, capacity) * 2 - 1).bit_length())
+        self._table = array("Q", bytes(8 * size))
+        self._mask = size - 1
+        self._len = 0
+
+    @staticmethod
+    def _fingerprint(url: str) -> int:
+        return fingerprint64(url) or 1  # 0 marks an empty slot
+
+    def _slot(self, fp: int) -> int:
+        table, mask = self._table, self._mask
+        i = fp & mask
+        while True:
+            value = table[i]
+            if value == 0 or value == fp:
+                return i
+            i = (i + 1) & mask
+
+    def add(self, url: str):
+        fp = self._fingerprint(url)
+        i = self._slot(fp)
+        if self._table[i] == 0:
+            self._table[i] = fp
+            self._len += 1
+            if self._len * 2 > len(self._table):
+                self._grow()
+
+    def update(self, urls):
+        for url in urls:
+            self.add(url)
+
+    def __contains__(self, url) -> bool:
+        if not isinstance(url, str):
+            return False
+        fp = self._fingerprint(url)
+        return self._table[self._slot(fp)] == fp
+
+    def __len__(self) -> int:
+        return self._len
+
+    def _grow(self):
+        old = self._table
+        self._table = array("Q", bytes(16 * len(old)))
+        self._mask = len(self._table) - 1
+        for fp in old:
+            if fp:
+                self._table[self._slot(fp)] = fp
+
+    def nbytes(self) -> int:
+        return self._table.itemsize * len(self._table)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter sized for `capacity` items at `error_rate`."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = max(1, int(capacity))
+        self.num_bits = max(8, math.ceil(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def contains(self, h1: int, h2: int) -> bool:
+        bits, m = self.bits, self.num_bits
+        p = h1 % m
+        step = h2 % m
+        for _ in range(self.num_hashes):
+            if not bits[p >> 3] & (1 << (p & 7)):
+                return False
+            p = (p + step) % m
+        return True
+
+    def add(self, h1: int, h2: int):
+        bits, m = self.bits, self.num_bits
+        p = h1 % m
+        step = h2 % m
+        for _ in range(self.num_hashes):
+            bits[p >> 3] |= 1 << (p & 7)
+            p = (p + step) % m
+        self.count += 1
+
+
+class ScalableBloomFilter:
+    """
+    Bloom filter that grows as items arrive: when the current stage is full a new one is added
+    with `growth`x the capacity and a tighter error rate, keeping the overall false-positive
+    rate under `error_rate` (Almeida et al., "Scalable Bloom Filters").
+    """
+
+    TIGHTENING = 0.9
+
+    def __init__(self, initial_capacity: int = 100_000, error_rate: float = 0.001, growth: int = 2):
+        self.initial_capacity = initial_capacity
+        self.error_rate = error_rate
+        self.growth = growth
+        self._filters = []
+        self._len = 0
+
+    @staticmethod
+    def _hashes(url: str) -> tuple[int, int]:
+        digest = blake2b(url.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+    def _contains(self, h1: int, h2: int) -> bool:
+        return any(f.contains(h1, h2) for f in self._filters)
+
+    def add(self, url: str):
+        h1, h2 = self._hashes(url)
+        if self._contains(h1, h2):
+            return
+        current = self._filters[-1] if self._filters else None
+        if current is None or current.count >= current.capacity:
+            stage = len(self._filters)
+            current = BloomFilter(
+                self.initial_capacity * (self.growth**stage),
+                self.error_rate * (1 - self.TIGHTENING) * (self.TIGHTENING**stage),
+            )
+            self._filters.append(current)
+        current.add(h1, h2)
+        self._len += 1
+
+    def update(self, urls):
+        for url in urls:
+            self.add(url)
+
+    def __contains__(self, url) -> bool:
+        if not isinstance(url, str):
+            return False
+        return self._contains(*self._hashes(url))
+
+    def __len__(self) -> int:
+        return self._len
+
+    def nbytes(self) -> int:
+        return sum(len(f.bits) for f in self._filters)
+
+
+class DepthSets:
+    """
+    Shallowest depth seen per URL, kept as one URL set per depth (from `make_set`), so a
+    compact `url_set` kind bounds its memory too. Lookups test depths 0, 1, ... in turn.
+    """
+
+    def __init__(self, make_set):
+        self._make_set = make_set
+        self._levels = []
+
+    def add(self, url: str, depth: int):
+        while len(self._levels) <= depth:
+            self._levels.append(self._make_set())
+        self._levels[depth].add(url)
+
+    def shallowest(self, url: str, below: int | None = None) -> int | None:
+        """Smallest depth `url` was added at (only depths < `below` if given), or None."""
+        levels = self._levels if below is None else self._levels[: max(0, below)]
+        for depth, level in enumerate(levels):
+            if url in level:
+                return depth
+        return None
+
+
+URL_SET_KINDS = ("set", "fingerprint", "bloom")
+
+
+def make_url_set(kind: str = "set", error_rate: float = 0.001, initial_capacity: int = 100_000):
+    if kind in (None, "set"):
+        return set()
+    if kind == "fingerprint":
+        return FingerprintSet(initial_capacity)
+    if kind == "bloom":
+        return ScalableBloomFilter(initial_capacity=initial_capacity, error_rate=error_rate)
+    raise ValueError(f"Unknown url_set '{kind}'; expected one of {', '.join(URL_SET_KINDS)}")
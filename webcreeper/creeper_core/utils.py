@@ -1,5 +1,6 @@
 import os
 from logging import INFO, FileHandler, Formatter, StreamHandler, getLogger
+from urllib.parse import urlparse, urlunparse
 
 
 def configure_logging(module_name: str, log_file: str = "./log/crawler.log"):
@@ -28,3 +29,10 @@ def configure_logging(module_name: str, log_file: str = "./log/crawler.log"):
 
     logger.setLevel(INFO)
     return logger
+
+
+def strip_fragment(url: str) -> str:
+    """Returns url without its #fragment."""
+    parts = list(urlparse(url))
+    parts[5] = ""  # fragment
+    return urlunparse(parts)
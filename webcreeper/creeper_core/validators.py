@@ -0,0 +1,129 @@
+import json
+import os
+import sqlite3
+import time
+
+
+class FetchResult(tuple):
+    """
+    What fetch_async returns: still unpacks as `(text, content_type)`, with response details
+    as attributes. `not_modified` is True for a 304 answer to a conditional GET (text is None).
+    """
+
+    def __new__(
+        cls, text, content_type: str, status: int = 200, url: str | None = None, headers=None, not_modified=False
+    ):
+        out = super().__new__(cls, (text, content_type))
+        out.status = status
+        out.url = url
+        out.headers = headers or {}
+        out.not_modified = not_modified
+        return out
+
+    @property
+    def etag(self):
+        return self.headers.get("ETag")
+
+    @property
+    def last_modified(self):
+        return self.headers.get("Last-Modified")
+
+
+class ValidatorCache:
+    """
+    HTTP validators from earlier crawls in SQLite, keyed by canonical URL, for conditional GET:
+      - ETag / Last-Modified are sent back as If-None-Match / If-Modified-Since
+      - The page's content hash and extracted links are kept too, so a 304 still yields a
+        complete graph without downloading the page
+    Writes are buffered and committed every `flush_size` updates and on flush()/close().
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS validators (
+            url TEXT PRIMARY KEY,
+            etag TEXT,
+            last_modified TEXT,
+            content_hash TEXT,
+            links TEXT,
+            fetched_at REAL NOT NULL
+        );
+    """
+
+    def __init__(self, path: str, flush_size: int = 500):
+        self.path = path
+        self.flush_size = flush_size
+        self._conn = None
+        self._pending = {}  # url -> row not yet committed
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(self.SCHEMA)
+        return self._conn
+
+    def get(self, url: str) -> dict | None:
+        """{"etag", "last_modified", "content_hash", "links", "fetched_at"} for `url`, or None.
+        `fetched_at` is the time of the last full (200) download.
+        """
+        row = self._pending.get(url)
+        if row is None:
+            row = (
+                self._db()
+                .execute(
+                    "SELECT url, etag, last_modified, content_hash, links, fetched_at FROM validators WHERE url = ?",
+                    (url,),
+                )
+                .fetchone()
+            )
+            if row is None:
+                return None
+        _, etag, last_modified, content_hash, links, fetched_at = row
+        return {
+            "etag": etag,
+            "last_modified": last_modified,
+            "content_hash": content_hash,
+            "links": json.loads(links) if links is not None else None,
+            "fetched_at": fetched_at,
+        }
+
+    def conditional_headers(self, url: str) -> dict:
+        entry = self.get(url)
+        headers = {}
+        if entry:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def set(self, url: str, etag: str | None, last_modified: str | None, content_hash: str | None = None, links=None):
+        links_json = json.dumps(links, ensure_ascii=False) if links is not None else None
+        self._pending[url] = (url, etag, last_modified, content_hash, links_json, time.time())
+        if len(self._pending) >= self.flush_size:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        with self._db() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO validators (url, etag, last_modified, content_hash, links, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                list(self._pending.values()),
+            )
+        self._pending.clear()
+
+    def __len__(self) -> int:
+        self.flush()
+        return self._db().execute("SELECT COUNT(*) FROM validators").fetchone()[0]
+
+    def close(self):
+        self.flush()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None